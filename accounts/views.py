@@ -60,7 +60,7 @@ class IsDirectorOrSuperuser(permissions.BasePermission):
 
 
 class ParentListView(generics.ListAPIView):
-    queryset = ParentProfile.objects.select_related("user").all()
+    queryset = ParentProfile.objects.select_related("user").order_by("id")
     serializer_class = ParentListSerializer
     permission_classes = [IsAuthenticated, IsDirectorOrSuperuser]
 
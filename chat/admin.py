@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import ChatRoom, Message, UserOnlineStatus
+from .models import ChatRoom, Message, RoomReadState, UserOnlineStatus
 
 
 @admin.register(ChatRoom)
@@ -20,3 +20,8 @@ class MessageAdmin(admin.ModelAdmin):
 class UserOnlineStatusAdmin(admin.ModelAdmin):
     list_display = ("user", "is_online", "last_seen")
     list_filter = ("is_online",)
+
+
+@admin.register(RoomReadState)
+class RoomReadStateAdmin(admin.ModelAdmin):
+    list_display = ("user", "room", "unread_count", "last_read_at", "updated_at")
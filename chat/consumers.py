@@ -3,8 +3,13 @@ import json
 from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
 
-from .models import ChatRoom, Message, UserOnlineStatus
+from .models import ChatRoom, Message, RoomReadState, UserOnlineStatus
 from .permissions import can_access_room
+from .services import room_member_ids
+
+
+def user_group_name(user_id):
+    return f"chat_user_{user_id}"
 
 
 class ChatConsumer(AsyncWebsocketConsumer):
@@ -26,13 +31,17 @@ class ChatConsumer(AsyncWebsocketConsumer):
             await self.close(code=4003)
             return
 
+        self.user_group_name = user_group_name(user.id)
         await self.channel_layer.group_add(self.room_group_name, self.channel_name)
+        await self.channel_layer.group_add(self.user_group_name, self.channel_name)
         await self._set_online_status(user, True)
         await self.accept()
 
     async def disconnect(self, close_code):
         if hasattr(self, "room_group_name"):
             await self.channel_layer.group_discard(self.room_group_name, self.channel_name)
+        if hasattr(self, "user_group_name"):
+            await self.channel_layer.group_discard(self.user_group_name, self.channel_name)
 
         user = self.scope.get("user")
         if user and user.is_authenticated:
@@ -73,10 +82,22 @@ class ChatConsumer(AsyncWebsocketConsumer):
             },
         }
         await self.channel_layer.group_send(self.room_group_name, payload)
+        for user_id, unread_count in message["unread_counts"].items():
+            await self.channel_layer.group_send(
+                user_group_name(user_id),
+                {"type": "chat.unread", "room_id": message["room_id"], "unread_count": unread_count},
+            )
 
     async def chat_message(self, event):
         await self.send(text_data=json.dumps(event["message"]))
 
+    async def chat_unread(self, event):
+        await self.send(
+            text_data=json.dumps(
+                {"event": "unread", "room_id": event["room_id"], "unread_count": event["unread_count"]}
+            )
+        )
+
     @database_sync_to_async
     def _get_room(self, room_id):
         return ChatRoom.objects.select_related("parent", "teacher", "accountant", "director", "driver").filter(pk=room_id).first()
@@ -92,6 +113,12 @@ class ChatConsumer(AsyncWebsocketConsumer):
             sender_id=sender_id,
             content=content,
         )
+        recipient_ids = room_member_ids(message.room) - {message.sender_id}
+        unread_counts = dict(
+            RoomReadState.objects.filter(room_id=message.room_id, user_id__in=recipient_ids).values_list(
+                "user_id", "unread_count"
+            )
+        )
         sender = message.sender
         return {
             "id": message.id,
@@ -101,6 +128,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
             "sender_name": sender.full_name or sender.phone_number,
             "sender_role": sender.role,
             "created_at": message.created_at.isoformat(),
+            "unread_counts": unread_counts,
         }
 
     @database_sync_to_async
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from chat.services import reconcile_rooms
+
+
+class Command(BaseCommand):
+    help = "Creates any missing chat rooms between parents, staff, drivers and class teachers."
+
+    def handle(self, *args, **options):
+        created = reconcile_rooms()
+        self.stdout.write(self.style.SUCCESS(f"Done. Created rooms: {created}"))
@@ -0,0 +1,66 @@
+# Generated by Django 4.2.30 on 2026-10-18 03:45
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_unread_counts(apps, schema_editor):
+    ChatRoom = apps.get_model('chat', 'ChatRoom')
+    Message = apps.get_model('chat', 'Message')
+    RoomReadState = apps.get_model('chat', 'RoomReadState')
+
+    unread_by_room = {}
+    rows = (
+        Message.objects.filter(is_read=False)
+        .values('room_id', 'sender_id')
+        .annotate(total=models.Count('id'))
+        .order_by()
+    )
+    for row in rows:
+        unread_by_room.setdefault(row['room_id'], {})[row['sender_id']] = row['total']
+
+    states = []
+    rooms = ChatRoom.objects.filter(id__in=list(unread_by_room)).values(
+        'id', 'parent_id', 'teacher_id', 'accountant_id', 'director_id', 'driver_id'
+    )
+    for room in rooms:
+        by_sender = unread_by_room[room['id']]
+        total = sum(by_sender.values())
+        member_ids = {
+            room[field]
+            for field in ('parent_id', 'teacher_id', 'accountant_id', 'director_id', 'driver_id')
+            if room[field]
+        }
+        for user_id in member_ids:
+            unread = total - by_sender.get(user_id, 0)
+            if unread:
+                states.append(RoomReadState(user_id=user_id, room_id=room['id'], unread_count=unread))
+    RoomReadState.objects.bulk_create(states, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('chat', '0002_alter_chatroom_options_alter_message_options_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomReadState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('unread_count', models.PositiveIntegerField(default=0)),
+                ('last_read_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='read_states', to='chat.chatroom')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chat_read_states', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='roomreadstate',
+            constraint=models.UniqueConstraint(fields=('user', 'room'), name='unique_user_room_read_state'),
+        ),
+        migrations.RunPython(backfill_unread_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,69 @@
+from django.db import migrations
+from django.db.models import Q
+
+PARTY_FIELDS = ("parent_id", "teacher_id", "accountant_id", "director_id", "driver_id", "student_id")
+
+
+def backfill_missing_rooms(apps, schema_editor):
+    """
+    Create the rooms that were never provisioned because a class teacher, bus
+    driver or role was assigned after the row was created. Mirrors
+    ``chat.services.reconcile_rooms`` on the historical models.
+    """
+    ChatRoom = apps.get_model("chat", "ChatRoom")
+    User = apps.get_model("accounts", "User")
+    Student = apps.get_model("students", "Student")
+    BusAssignment = apps.get_model("transport", "BusAssignment")
+
+    parent_ids = list(User.objects.filter(role="PARENT").values_list("id", flat=True))
+    driver_ids = list(User.objects.filter(role="DRIVER").values_list("id", flat=True))
+    director_ids = list(
+        User.objects.filter(Q(role="DIRECTOR") | Q(is_superuser=True)).distinct().values_list("id", flat=True)
+    )
+    accountant_ids = list(User.objects.filter(role="ACCOUNTANT").values_list("id", flat=True))
+
+    specs = []
+    for parent_id in parent_ids:
+        specs += [{"room_type": "PARENT_ADMIN", "parent_id": parent_id, "director_id": i} for i in director_ids]
+        specs += [{"room_type": "PARENT_ACCOUNTANT", "parent_id": parent_id, "accountant_id": i} for i in accountant_ids]
+    for driver_id in driver_ids:
+        specs += [{"room_type": "DRIVER_ADMIN", "driver_id": driver_id, "director_id": i} for i in director_ids]
+        specs += [{"room_type": "DRIVER_ACCOUNTANT", "driver_id": driver_id, "accountant_id": i} for i in accountant_ids]
+    assignments = BusAssignment.objects.filter(bus__driver__isnull=False).values_list(
+        "bus__driver__user_id", "student__parent_id", "student_id"
+    )
+    specs += [
+        {"room_type": "DRIVER_PARENT", "driver_id": driver_id, "parent_id": parent_id, "student_id": student_id}
+        for driver_id, parent_id, student_id in assignments
+        if driver_id and parent_id
+    ]
+    teacher_rows = Student.objects.filter(class_teacher__isnull=False).values_list(
+        "parent_id", "class_teacher__user_id", "id"
+    )
+    specs += [
+        {"room_type": "PARENT_TEACHER", "parent_id": parent_id, "teacher_id": teacher_id, "student_id": student_id}
+        for parent_id, teacher_id, student_id in teacher_rows
+        if parent_id and teacher_id
+    ]
+
+    existing = set(ChatRoom.objects.values_list("room_type", *PARTY_FIELDS).iterator())
+    missing = {}
+    for spec in specs:
+        key = (spec["room_type"],) + tuple(spec.get(field) for field in PARTY_FIELDS)
+        if key not in existing:
+            missing.setdefault(key, ChatRoom(**spec))
+    ChatRoom.objects.bulk_create(missing.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_alter_user_managers_user_username'),
+        ('chat', '0004_message_indexes'),
+        ('students', '0015_section_occupancy'),
+        ('transport', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_missing_rooms, migrations.RunPython.noop),
+    ]
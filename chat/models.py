@@ -86,12 +86,38 @@ class Message(models.Model):
 
     class Meta:
         ordering = ["created_at", "id"]
+        indexes = [
+            models.Index(fields=["room", "created_at", "id"], name="message_room_created_idx"),
+            models.Index(fields=["room", "is_read"], name="message_room_read_idx"),
+        ]
 
     def __str__(self):
         sender_label = self.sender.full_name or self.sender.phone_number
         return f"{sender_label}: {self.content or 'Attachment'}"
 
 
+class RoomReadState(models.Model):
+    """Per-user read cursor and unread counter for a chat room."""
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="chat_read_states"
+    )
+    room = models.ForeignKey(ChatRoom, on_delete=models.CASCADE, related_name="read_states")
+    unread_count = models.PositiveIntegerField(default=0)
+    last_read_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "room"], name="unique_user_room_read_state"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - room {self.room_id}: {self.unread_count} unread"
+
+
 class UserOnlineStatus(models.Model):
 
     user = models.OneToOneField(
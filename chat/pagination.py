@@ -0,0 +1,79 @@
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+
+
+def encode_cursor(message):
+    raw = f"{message.created_at.isoformat()}|{message.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        created_at, message_id = base64.urlsafe_b64decode(cursor.encode()).decode().rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(message_id)
+    except (TypeError, ValueError, UnicodeDecodeError):
+        raise NotFound("Invalid cursor.")
+
+
+class MessageKeysetPagination(BasePagination):
+    """
+    Keyset pagination over ``(created_at, id)``, matching ``Message.Meta.ordering``.
+
+    Without a cursor the newest ``limit`` messages are returned. ``?before=``
+    walks back through older history and ``?after=`` fetches newer messages.
+    Every page is returned oldest first.
+    """
+
+    default_limit = 50
+    max_limit = 200
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params.get("limit", self.default_limit))
+        except (TypeError, ValueError):
+            return self.default_limit
+        return max(1, min(limit, self.max_limit))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        limit = self.get_limit(request)
+        before = request.query_params.get("before")
+        after = request.query_params.get("after")
+
+        if after:
+            created_at, message_id = decode_cursor(after)
+            queryset = queryset.filter(
+                Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=message_id)
+            ).order_by("created_at", "id")
+            rows = list(queryset[: limit + 1])
+            self.has_newer = len(rows) > limit
+            self.has_older = True
+            page = rows[:limit]
+        else:
+            if before:
+                created_at, message_id = decode_cursor(before)
+                queryset = queryset.filter(
+                    Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=message_id)
+                )
+            rows = list(queryset.order_by("-created_at", "-id")[: limit + 1])
+            self.has_older = len(rows) > limit
+            self.has_newer = bool(before)
+            page = rows[:limit][::-1]
+
+        self.page = page
+        return page
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "results": data,
+                "before": encode_cursor(self.page[0]) if self.page else None,
+                "after": encode_cursor(self.page[-1]) if self.page else None,
+                "has_older": self.has_older,
+                "has_newer": self.has_newer,
+            }
+        )
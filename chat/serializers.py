@@ -31,6 +31,8 @@ class MessageSerializer(serializers.ModelSerializer):
 
 class ChatRoomSerializer(serializers.ModelSerializer):
     last_message = serializers.SerializerMethodField()
+    last_message_preview = serializers.CharField(read_only=True, allow_null=True, default=None)
+    last_message_at = serializers.DateTimeField(read_only=True, allow_null=True, default=None)
     unread_count = serializers.SerializerMethodField()
     counterpart_name = serializers.SerializerMethodField()
     counterpart_role = serializers.SerializerMethodField()
@@ -48,6 +50,8 @@ class ChatRoomSerializer(serializers.ModelSerializer):
             "student",
             "created_at",
             "last_message",
+            "last_message_preview",
+            "last_message_at",
             "unread_count",
             "counterpart_name",
             "counterpart_role",
@@ -55,12 +59,18 @@ class ChatRoomSerializer(serializers.ModelSerializer):
         read_only_fields = fields
 
     def get_last_message(self, obj):
-        last_message = obj.messages.select_related("sender").order_by("-created_at", "-id").first()
+        last_messages = self.context.get("last_messages")
+        if last_messages is not None and hasattr(obj, "last_message_id"):
+            last_message = last_messages.get(obj.last_message_id)
+        else:
+            last_message = obj.messages.select_related("sender").order_by("-created_at", "-id").first()
         if not last_message:
             return None
         return MessageSerializer(last_message, context=self.context).data
 
     def get_unread_count(self, obj):
+        if hasattr(obj, "unread_total"):
+            return obj.unread_total
         request = self.context.get("request")
         user = getattr(request, "user", None)
         if not user or not user.is_authenticated:
@@ -1,9 +1,12 @@
-from django.db.models import Q
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
+from django.utils import timezone
 
 from accounts.models import User
+from students.models import Student
 from transport.models import BusAssignment
 
-from .models import ChatRoom, Message
+from .models import ChatRoom, Message, RoomReadState
 
 
 def _find_or_create_room(**kwargs):
@@ -33,54 +36,98 @@ def create_parent_teacher_room(student):
     )
 
 
-def ensure_parent_staff_rooms(parent):
-    rooms = []
-    for director in _director_users():
-        room = _find_or_create_room(
-            room_type="PARENT_ADMIN",
-            parent=parent,
-            director=director,
-        )
-        rooms.append(room)
+ROOM_PARTY_FIELDS = ("parent_id", "teacher_id", "accountant_id", "director_id", "driver_id", "student_id")
 
-    for accountant in _accountant_users():
-        room = _find_or_create_room(
-            room_type="PARENT_ACCOUNTANT",
-            parent=parent,
-            accountant=accountant,
-        )
-        rooms.append(room)
-    return rooms
+# Above this many distinct ids a party column is not used to narrow the
+# existence query; the rows are diffed in Python instead.
+MAX_FILTER_IDS = 500
 
 
-def ensure_parent_rooms(parent):
-    rooms = ensure_parent_staff_rooms(parent)
-    students = parent.children.select_related("class_teacher__user").all()
-    for student in students:
-        room = create_parent_teacher_room(student)
-        if room:
-            rooms.append(room)
-    return rooms
+def _room_key(spec):
+    return (spec["room_type"],) + tuple(spec.get(field) for field in ROOM_PARTY_FIELDS)
 
 
-def ensure_driver_staff_rooms(driver_user):
-    rooms = []
-    for director in _director_users():
-        room = _find_or_create_room(
-            room_type="DRIVER_ADMIN",
-            driver=driver_user,
-            director=director,
-        )
-        rooms.append(room)
+def bulk_ensure_rooms(specs):
+    """
+    Create every room described in ``specs`` that does not exist yet.
+
+    Each spec maps ``room_type`` and the ``*_id`` party columns to values.
+    Existing rooms are looked up with one query per room type and the missing
+    ones are inserted with a single ``bulk_create``. Returns the number of
+    rooms created.
+    """
+    wanted = {}
+    for spec in specs:
+        wanted.setdefault(_room_key(spec), spec)
+    if not wanted:
+        return 0
 
-    for accountant in _accountant_users():
-        room = _find_or_create_room(
-            room_type="DRIVER_ACCOUNTANT",
-            driver=driver_user,
-            accountant=accountant,
+    specs_by_type = {}
+    for spec in wanted.values():
+        specs_by_type.setdefault(spec["room_type"], []).append(spec)
+
+    existing = set()
+    for room_type, type_specs in specs_by_type.items():
+        filters = {"room_type": room_type}
+        for field in ROOM_PARTY_FIELDS:
+            values = {spec.get(field) for spec in type_specs}
+            if values == {None}:
+                filters[f"{field}__isnull"] = True
+            elif None not in values and len(values) <= MAX_FILTER_IDS:
+                filters[f"{field}__in"] = values
+        rows = ChatRoom.objects.filter(**filters).values_list(*ROOM_PARTY_FIELDS)
+        existing.update((room_type,) + tuple(row) for row in rows)
+
+    missing = [ChatRoom(**spec) for key, spec in wanted.items() if key not in existing]
+    ChatRoom.objects.bulk_create(missing, batch_size=500)
+    return len(missing)
+
+
+def _staff_room_specs(parent_ids, driver_ids, director_ids, accountant_ids):
+    specs = []
+    for parent_id in parent_ids:
+        specs.extend(
+            {"room_type": "PARENT_ADMIN", "parent_id": parent_id, "director_id": director_id}
+            for director_id in director_ids
+        )
+        specs.extend(
+            {"room_type": "PARENT_ACCOUNTANT", "parent_id": parent_id, "accountant_id": accountant_id}
+            for accountant_id in accountant_ids
         )
-        rooms.append(room)
-    return rooms
+    for driver_id in driver_ids:
+        specs.extend(
+            {"room_type": "DRIVER_ADMIN", "driver_id": driver_id, "director_id": director_id}
+            for director_id in director_ids
+        )
+        specs.extend(
+            {"room_type": "DRIVER_ACCOUNTANT", "driver_id": driver_id, "accountant_id": accountant_id}
+            for accountant_id in accountant_ids
+        )
+    return specs
+
+
+def _driver_parent_room_specs(assignments):
+    rows = assignments.filter(bus__driver__isnull=False, student__isnull=False).values_list(
+        "bus__driver__user_id", "student__parent_id", "student_id"
+    )
+    return [
+        {"room_type": "DRIVER_PARENT", "driver_id": driver_id, "parent_id": parent_id, "student_id": student_id}
+        for driver_id, parent_id, student_id in rows
+        if parent_id
+    ]
+
+
+def _ids(queryset):
+    return list(queryset.values_list("id", flat=True))
+
+
+def ensure_driver_staff_rooms(driver_user):
+    bulk_ensure_rooms(
+        _staff_room_specs([], [driver_user.id], _ids(_director_users()), _ids(_accountant_users()))
+    )
+    return list(
+        ChatRoom.objects.filter(driver=driver_user, room_type__in=["DRIVER_ADMIN", "DRIVER_ACCOUNTANT"]).order_by("id")
+    )
 
 
 def ensure_driver_parent_room(student, driver_user):
@@ -95,84 +142,119 @@ def ensure_driver_parent_room(student, driver_user):
     return room
 
 
-def ensure_driver_parent_rooms_for_driver(driver_user):
-    rooms = []
-    assignments = (
-        BusAssignment.objects.filter(bus__driver__user=driver_user)
-        .select_related("student", "student__parent")
-        .distinct()
-    )
-    for assignment in assignments:
-        room = ensure_driver_parent_room(assignment.student, driver_user)
-        if room:
-            rooms.append(room)
-    return rooms
+def ensure_driver_parent_rooms(assignments):
+    """Create the missing DRIVER_PARENT rooms for the bus assignments in ``assignments``."""
+    return bulk_ensure_rooms(_driver_parent_room_specs(assignments))
 
 
 def ensure_driver_rooms(driver_user):
-    rooms = ensure_driver_staff_rooms(driver_user)
-    rooms.extend(ensure_driver_parent_rooms_for_driver(driver_user))
-    return rooms
+    bulk_ensure_rooms(
+        _staff_room_specs([], [driver_user.id], _ids(_director_users()), _ids(_accountant_users()))
+        + _driver_parent_room_specs(BusAssignment.objects.filter(bus__driver__user=driver_user))
+    )
 
 
 def ensure_staff_rooms(user):
-    rooms = []
-    if user.role == "ACCOUNTANT":
-        parents = User.objects.filter(role="PARENT").distinct()
-        for parent in parents:
-            room = _find_or_create_room(
-                room_type="PARENT_ACCOUNTANT",
-                parent=parent,
-                accountant=user,
-            )
-            rooms.append(room)
-
-        assignments = (
-            BusAssignment.objects.select_related("student", "student__parent", "bus__driver__user")
-            .filter(bus__driver__isnull=False)
-            .distinct()
-        )
-        for assignment in assignments:
-            room = _find_or_create_room(
-                room_type="DRIVER_ACCOUNTANT",
-                driver=assignment.bus.driver.user,
-                accountant=user,
-            )
-            rooms.append(room)
-
-    if user.role == "DIRECTOR" or user.is_superuser:
-        parents = User.objects.filter(role="PARENT").distinct()
-        for parent in parents:
-            room = _find_or_create_room(
-                room_type="PARENT_ADMIN",
-                parent=parent,
-                director=user,
-            )
-            rooms.append(room)
-
-        assignments = (
-            BusAssignment.objects.select_related("student", "student__parent", "bus__driver__user")
-            .filter(bus__driver__isnull=False)
-            .distinct()
+    director_ids = [user.id] if user.role == "DIRECTOR" or user.is_superuser else []
+    accountant_ids = [user.id] if user.role == "ACCOUNTANT" else []
+    return bulk_ensure_rooms(
+        _staff_room_specs(
+            _ids(User.objects.filter(role="PARENT")),
+            _ids(User.objects.filter(role="DRIVER")),
+            director_ids,
+            accountant_ids,
         )
-        for assignment in assignments:
-            room = _find_or_create_room(
-                room_type="DRIVER_ADMIN",
-                driver=assignment.bus.driver.user,
-                director=user,
-            )
-            rooms.append(room)
-    return rooms
+    )
 
 
 def ensure_rooms_for_user(user):
+    """Provision every room a newly created user, or one whose role changed, belongs in."""
     if user.role == "PARENT":
-        return ensure_parent_rooms(user)
+        return bulk_ensure_rooms(
+            _staff_room_specs([user.id], [], _ids(_director_users()), _ids(_accountant_users()))
+        )
     if user.role == "DRIVER":
         return ensure_driver_rooms(user)
     if user.role in {"ACCOUNTANT", "DIRECTOR"} or user.is_superuser:
         return ensure_staff_rooms(user)
-    return []
+    return 0
+
+
+def reconcile_rooms():
+    """Create every missing room for the whole school in one batched pass."""
+    specs = _staff_room_specs(
+        _ids(User.objects.filter(role="PARENT")),
+        _ids(User.objects.filter(role="DRIVER")),
+        _ids(_director_users()),
+        _ids(_accountant_users()),
+    )
+    specs.extend(_driver_parent_room_specs(BusAssignment.objects.all()))
+    teacher_rows = Student.objects.filter(class_teacher__isnull=False).values_list(
+        "parent_id", "class_teacher__user_id", "id"
+    )
+    specs.extend(
+        {"room_type": "PARENT_TEACHER", "parent_id": parent_id, "teacher_id": teacher_id, "student_id": student_id}
+        for parent_id, teacher_id, student_id in teacher_rows
+        if parent_id and teacher_id
+    )
+    return bulk_ensure_rooms(specs)
+
+
+def room_member_ids(room):
+    return {
+        user_id
+        for user_id in (room.parent_id, room.teacher_id, room.accountant_id, room.director_id, room.driver_id)
+        if user_id
+    }
+
+
+def record_new_message(message):
+    """
+    Bump the unread counter of every room member except the sender.
+
+    Called from the ``Message`` post_save signal. Missing ``RoomReadState``
+    rows are inserted first so the increment is a single UPDATE. Returns the
+    ids of the users whose counter changed.
+    """
+    recipient_ids = room_member_ids(message.room) - {message.sender_id}
+    if not recipient_ids:
+        return set()
+    RoomReadState.objects.bulk_create(
+        [RoomReadState(user_id=user_id, room_id=message.room_id) for user_id in recipient_ids],
+        ignore_conflicts=True,
+    )
+    RoomReadState.objects.filter(room_id=message.room_id, user_id__in=recipient_ids).update(
+        unread_count=F("unread_count") + 1
+    )
+    return recipient_ids
+
+
+def mark_room_read(room, user, message_ids=None):
+    """
+    Mark messages sent by others in ``room`` as read for ``user``.
+
+    With ``message_ids`` only those messages are marked and the counter is
+    decremented by the number updated; otherwise the whole room is marked and
+    the counter reset. Returns the number of messages updated.
+    """
+    unread = room.messages.filter(is_read=False).exclude(sender=user)
+    if message_ids is not None:
+        unread = unread.filter(id__in=message_ids)
+    updated = unread.update(is_read=True)
+
+    states = RoomReadState.objects.filter(room=room, user=user)
+    if message_ids is None:
+        states.update(unread_count=0, last_read_at=timezone.now())
+    elif updated:
+        states.update(unread_count=Greatest(F("unread_count") - updated, 0), last_read_at=timezone.now())
+    return updated
+
+
+def unread_count_for(user, room_id):
+    return (
+        RoomReadState.objects.filter(user=user, room_id=room_id).values_list("unread_count", flat=True).first()
+        or 0
+    )
 
 
 def create_system_message(room, sender, content):
@@ -0,0 +1,30 @@
+from django.db.models.signals import post_init, post_save
+from django.dispatch import receiver
+
+from accounts.models import User
+from .models import Message
+from .services import ensure_rooms_for_user, record_new_message
+
+
+def _access_of(instance):
+    # Read from __dict__ so deferred fields are not fetched.
+    return instance.__dict__.get("role"), instance.__dict__.get("is_superuser")
+
+
+@receiver(post_init, sender=User)
+def remember_loaded_access(sender, instance, **kwargs):
+    instance._loaded_access = _access_of(instance)
+
+
+@receiver(post_save, sender=User)
+def provision_user_rooms(sender, instance, created, **kwargs):
+    access = _access_of(instance)
+    if created or access != instance._loaded_access:
+        ensure_rooms_for_user(instance)
+    instance._loaded_access = access
+
+
+@receiver(post_save, sender=Message)
+def count_unread_message(sender, instance, created, **kwargs):
+    if created:
+        record_new_message(instance)
@@ -1,9 +1,12 @@
+from io import StringIO
+
+from django.core.management import call_command
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
 
 from accounts.models import DriverProfile, User
-from chat.models import ChatRoom, Message
+from chat.models import ChatRoom, Message, RoomReadState
 from employees.models import Employee
 from students.models import Student
 from transport.models import Bus, BusAssignment, DriverAlert, Route
@@ -87,7 +90,7 @@ class ChatApiTests(APITestCase):
         response = self.client.get(reverse("chat-room-list"))
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        room_ids = {item["id"] for item in response.data}
+        room_ids = {item["id"] for item in response.data["results"]}
         self.assertIn(self.room.id, room_ids)
         self.assertFalse(ChatRoom.objects.filter(id__in=room_ids, parent=self.other_parent).exists())
 
@@ -131,7 +134,7 @@ class ChatApiTests(APITestCase):
         response = self.client.get(reverse("chat-room-messages", kwargs={"room_id": self.room.id}))
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data[0]["content"], "Please review")
+        self.assertEqual(response.data["results"][0]["content"], "Please review")
         self.assertEqual(Message.objects.get(room=self.room).is_read, True)
 
     def test_room_unread_count_denies_non_member(self):
@@ -147,7 +150,7 @@ class ChatApiTests(APITestCase):
         response = self.client.get(reverse("chat-room-list"))
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        room_types = {item["room_type"] for item in response.data}
+        room_types = {item["room_type"] for item in response.data["results"]}
         self.assertIn("PARENT_ACCOUNTANT", room_types)
         self.assertIn("PARENT_ADMIN", room_types)
         self.assertNotIn("DRIVER_PARENT", room_types)
@@ -188,3 +191,161 @@ class ChatApiTests(APITestCase):
             Message.objects.filter(room__room_type="DRIVER_PARENT", room__parent=self.parent, sender=self.driver).count(),
             1,
         )
+
+    def test_room_list_query_count_does_not_grow_with_rooms(self):
+        for index in range(5):
+            parent = User.objects.create_user(
+                phone_number=f"091200010{index}",
+                password="pass1234",
+                role="PARENT",
+                full_name=f"Parent {index}",
+            )
+            room = ChatRoom.objects.create(room_type="PARENT_ACCOUNTANT", parent=parent, accountant=self.accountant)
+            Message.objects.create(room=room, sender=parent, content=f"Hello {index}")
+            Message.objects.create(room=room, sender=parent, content=f"Latest {index}")
+        self.client.force_authenticate(self.accountant)
+
+        # Page count, page of rooms and the latest messages.
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse("chat-room-list"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rooms = {item["id"]: item for item in response.data["results"] if item["last_message"]}
+        self.assertEqual(len(rooms), 5)
+        for item in rooms.values():
+            self.assertEqual(item["unread_count"], 2)
+            self.assertTrue(item["last_message"]["content"].startswith("Latest"))
+            self.assertEqual(item["last_message_preview"], item["last_message"]["content"])
+
+    def test_new_staff_user_is_provisioned_rooms_with_existing_parents(self):
+        accountant = User.objects.create_user(
+            phone_number="0912000020",
+            password="pass1234",
+            role="ACCOUNTANT",
+            full_name="Second Accountant",
+        )
+
+        parent_ids = set(
+            ChatRoom.objects.filter(room_type="PARENT_ACCOUNTANT", accountant=accountant).values_list("parent_id", flat=True)
+        )
+        self.assertEqual(parent_ids, {self.parent.id, self.other_parent.id})
+        self.assertTrue(
+            ChatRoom.objects.filter(room_type="DRIVER_ACCOUNTANT", accountant=accountant, driver=self.driver).exists()
+        )
+
+    def test_role_change_provisions_staff_rooms(self):
+        user = User.objects.create_user(
+            phone_number="0912000021",
+            password="pass1234",
+            role="TEACHER",
+            full_name="Future Accountant",
+        )
+        self.assertFalse(ChatRoom.objects.filter(accountant=user).exists())
+
+        user = User.objects.get(pk=user.pk)
+        user.role = "ACCOUNTANT"
+        user.save()
+
+        self.assertTrue(ChatRoom.objects.filter(room_type="PARENT_ACCOUNTANT", accountant=user, parent=self.parent).exists())
+        self.assertTrue(ChatRoom.objects.filter(room_type="DRIVER_ACCOUNTANT", accountant=user, driver=self.driver).exists())
+
+    def test_class_teacher_assigned_later_gets_parent_teacher_room(self):
+        student = Student.objects.create(
+            first_name="Kid",
+            last_name="Two",
+            dob="2018-01-01",
+            gender="F",
+            category="KG",
+            grade_level="KG1",
+            transport="FOOT",
+            parent=self.other_parent,
+            class_name="KG1A",
+        )
+        self.assertFalse(ChatRoom.objects.filter(room_type="PARENT_TEACHER", student=student).exists())
+
+        student = Student.objects.get(pk=student.pk)
+        student.class_teacher = self.teacher_employee
+        student.save()
+
+        self.assertTrue(
+            ChatRoom.objects.filter(
+                room_type="PARENT_TEACHER", parent=self.other_parent, teacher=self.teacher, student=student
+            ).exists()
+        )
+
+    def test_bus_driver_change_creates_driver_parent_rooms(self):
+        BusAssignment.objects.create(student=self.student, bus=self.bus)
+        driver = User.objects.create_user(
+            phone_number="0912000022",
+            password="pass1234",
+            role="DRIVER",
+            full_name="Relief Driver",
+        )
+        bus = Bus.objects.get(pk=self.bus.pk)
+        bus.driver = DriverProfile.objects.create(user=driver, license_number="DR-456")
+        bus.save()
+
+        self.assertTrue(
+            ChatRoom.objects.filter(room_type="DRIVER_PARENT", driver=driver, parent=self.parent, student=self.student).exists()
+        )
+
+    def test_sync_chat_rooms_recreates_missing_rooms_once(self):
+        ChatRoom.objects.filter(room_type="PARENT_ADMIN").delete()
+        teacher_rooms = ChatRoom.objects.filter(room_type="PARENT_TEACHER").count()
+
+        call_command("sync_chat_rooms", stdout=StringIO())
+        call_command("sync_chat_rooms", stdout=StringIO())
+
+        self.assertEqual(
+            ChatRoom.objects.filter(room_type="PARENT_ADMIN", director=self.director).count(),
+            2,
+        )
+        self.assertEqual(ChatRoom.objects.filter(room_type="PARENT_TEACHER").count(), teacher_rooms)
+
+    def test_unread_counters_follow_new_messages_and_mark_read(self):
+        self.client.force_authenticate(self.teacher)
+        for content in ("First", "Second"):
+            self.client.post(
+                reverse("chat-room-messages", kwargs={"room_id": self.room.id}),
+                data={"content": content},
+                format="json",
+            )
+
+        self.assertEqual(RoomReadState.objects.get(room=self.room, user=self.parent).unread_count, 2)
+        self.assertFalse(RoomReadState.objects.filter(room=self.room, user=self.teacher).exists())
+
+        self.client.force_authenticate(self.parent)
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("chat-unread-count"))
+        self.assertEqual(response.data["unread_count"], 2)
+
+        response = self.client.post(reverse("chat-room-read", kwargs={"room_id": self.room.id}))
+        self.assertEqual(response.data["updated"], 2)
+
+        response = self.client.get(reverse("chat-room-unread-count", kwargs={"room_id": self.room.id}))
+        self.assertEqual(response.data["unread"], 0)
+        self.assertIsNotNone(RoomReadState.objects.get(room=self.room, user=self.parent).last_read_at)
+
+    def test_message_history_is_paginated_with_cursors(self):
+        for index in range(5):
+            Message.objects.create(room=self.room, sender=self.teacher, content=f"Message {index}")
+        self.client.force_authenticate(self.parent)
+        url = reverse("chat-room-messages", kwargs={"room_id": self.room.id})
+
+        response = self.client.get(url, {"limit": 2})
+
+        self.assertEqual([item["content"] for item in response.data["results"]], ["Message 3", "Message 4"])
+        self.assertTrue(response.data["has_older"])
+        self.assertEqual(Message.objects.filter(room=self.room, is_read=True).count(), 2)
+        self.assertEqual(RoomReadState.objects.get(room=self.room, user=self.parent).unread_count, 3)
+
+        response = self.client.get(url, {"limit": 2, "before": response.data["before"]})
+        self.assertEqual([item["content"] for item in response.data["results"]], ["Message 1", "Message 2"])
+
+        response = self.client.get(url, {"limit": 10, "before": response.data["before"]})
+        self.assertEqual([item["content"] for item in response.data["results"]], ["Message 0"])
+        self.assertFalse(response.data["has_older"])
+
+        response = self.client.get(url, {"after": response.data["after"]})
+        self.assertEqual(len(response.data["results"]), 4)
+        self.assertFalse(response.data["has_newer"])
@@ -1,13 +1,15 @@
-from django.db.models import Q
+from django.db.models import IntegerField, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
 from rest_framework import generics, permissions, status
 from rest_framework.exceptions import PermissionDenied
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from .models import ChatRoom, Message
+from .models import ChatRoom, Message, RoomReadState
+from .pagination import MessageKeysetPagination
 from .permissions import can_access_room
 from .serializers import ChatRoomSerializer, MessageSerializer
-from .services import ensure_rooms_for_user
+from .services import mark_room_read, unread_count_for
 
 
 def _rooms_for_user(user):
@@ -27,18 +29,39 @@ def _rooms_for_user(user):
     ).distinct()
 
 
+def _with_room_activity(rooms, user):
+    """Annotate the latest message and the user's unread count on each room."""
+    latest_messages = Message.objects.filter(room=OuterRef("pk")).order_by("-created_at", "-id")
+    unread_counts = RoomReadState.objects.filter(room=OuterRef("pk"), user=user).values("unread_count")
+    return rooms.annotate(
+        last_message_id=Subquery(latest_messages.values("id")[:1]),
+        last_message_preview=Subquery(latest_messages.values("content")[:1]),
+        last_message_at=Subquery(latest_messages.values("created_at")[:1]),
+        unread_total=Coalesce(Subquery(unread_counts[:1], output_field=IntegerField()), 0),
+    )
+
+
 class ChatRoomListView(generics.ListAPIView):
     serializer_class = ChatRoomSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        ensure_rooms_for_user(self.request.user)
-        return _rooms_for_user(self.request.user)
+        rooms = _with_room_activity(_rooms_for_user(self.request.user), self.request.user)
+        return rooms.order_by("-created_at", "-id")
+
+    def list(self, request, *args, **kwargs):
+        rooms = self.paginate_queryset(self.filter_queryset(self.get_queryset()))
+        last_message_ids = [room.last_message_id for room in rooms if room.last_message_id]
+        context = self.get_serializer_context()
+        context["last_messages"] = Message.objects.select_related("sender").in_bulk(last_message_ids)
+        serializer = self.get_serializer(rooms, many=True, context=context)
+        return self.get_paginated_response(serializer.data)
 
 
 class MessageListCreateView(generics.ListCreateAPIView):
     serializer_class = MessageSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = MessageKeysetPagination
 
     def get_room(self):
         room = ChatRoom.objects.select_related("parent", "teacher", "accountant", "director", "driver").filter(
@@ -59,8 +82,15 @@ class MessageListCreateView(generics.ListCreateAPIView):
         if room is None:
             return Response({"error": "Room not found or access denied."}, status=status.HTTP_404_NOT_FOUND)
 
-        room.messages.filter(is_read=False).exclude(sender=request.user).update(is_read=True)
-        return super().list(request, *args, **kwargs)
+        page = self.paginate_queryset(Message.objects.filter(room=room).select_related("sender"))
+        unread_ids = [message.id for message in page if not message.is_read and message.sender_id != request.user.id]
+        if unread_ids:
+            mark_room_read(room, request.user, message_ids=unread_ids)
+            for message in page:
+                if message.id in unread_ids:
+                    message.is_read = True
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
     def perform_create(self, serializer):
         room = self.get_room()
@@ -73,12 +103,8 @@ class UnreadMessageCountView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        rooms = _rooms_for_user(request.user)
-        count = Message.objects.filter(
-            room__in=rooms,
-            is_read=False,
-        ).exclude(sender=request.user).count()
-        return Response({"unread_count": count})
+        count = RoomReadState.objects.filter(user=request.user).aggregate(total=Sum("unread_count"))["total"]
+        return Response({"unread_count": count or 0})
 
 
 class RoomUnreadCountView(APIView):
@@ -89,11 +115,7 @@ class RoomUnreadCountView(APIView):
         if room is None or not can_access_room(request.user, room):
             return Response({"error": "Room not found or access denied."}, status=status.HTTP_404_NOT_FOUND)
 
-        count = Message.objects.filter(
-            room_id=room_id,
-            is_read=False,
-        ).exclude(sender=request.user).count()
-        return Response({"unread": count})
+        return Response({"unread": unread_count_for(request.user, room_id)})
 
 
 class MarkRoomReadView(APIView):
@@ -104,5 +126,5 @@ class MarkRoomReadView(APIView):
         if room is None or not can_access_room(request.user, room):
             return Response({"error": "Room not found or access denied."}, status=status.HTTP_404_NOT_FOUND)
 
-        updated = room.messages.filter(is_read=False).exclude(sender=request.user).update(is_read=True)
+        updated = mark_room_read(room, request.user)
         return Response({"updated": updated}, status=status.HTTP_200_OK)
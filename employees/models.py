@@ -40,5 +40,11 @@ class Attendance(models.Model):
     date = models.DateField(auto_now_add=True)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["employee", "status", "date"], name="attendance_emp_status_date_idx"),
+            models.Index(fields=["-date", "-id"], name="attendance_date_idx"),
+        ]
+
     def __str__(self):
         return f"{self.employee.user.phone_number} - {self.date}"
\ No newline at end of file
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from kgsystems.serializers import SparseFieldsetMixin
 from .models import Employee, Attendance
 
 User = get_user_model()
@@ -26,7 +27,7 @@ class EmployeeSerializer(serializers.ModelSerializer):
 # ================================
 # ATTENDANCE SERIALIZER
 # ================================
-class AttendanceSerializer(serializers.ModelSerializer):
+class AttendanceSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     employee_phone = serializers.CharField(source='employee.user.phone_number', read_only=True)
 
     class Meta:
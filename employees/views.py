@@ -3,6 +3,8 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 
+from kgsystems.pagination import AttendanceCursorPagination
+
 from .models import Employee, Attendance
 from .serializers import (
     EmployeeSerializer,
@@ -56,7 +58,7 @@ class EmployeeRegisterView(APIView):
 # =====================================================
 
 class EmployeeListView(generics.ListAPIView):
-    queryset = Employee.objects.all()
+    queryset = Employee.objects.order_by("id")
     serializer_class = EmployeeSerializer
     permission_classes = [IsAuthenticated, IsDirectorOrAccountant]
 
@@ -69,6 +71,7 @@ class EmployeeListView(generics.ListAPIView):
 class AttendanceListView(generics.ListAPIView):
     serializer_class = AttendanceSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = AttendanceCursorPagination
 
     def get_queryset(self):
         user = self.request.user
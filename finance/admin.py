@@ -9,6 +9,7 @@ from .models import (
     ExpenseRequest,
     Invoice,
     LedgerEntry,
+    MonthlyLedgerSummary,
     Payment,
     Payroll,
     PayrollSetting,
@@ -85,6 +86,12 @@ class LedgerEntryAdmin(admin.ModelAdmin):
     list_filter = ('entry_type',)
 
 
+@admin.register(MonthlyLedgerSummary)
+class MonthlyLedgerSummaryAdmin(admin.ModelAdmin):
+    list_display = ('month', 'bank_account', 'entry_type', 'income_total', 'expense_total', 'entry_count')
+    list_filter = ('month', 'entry_type')
+
+
 @admin.register(ExpenseRequest)
 class ExpenseRequestAdmin(admin.ModelAdmin):
     list_display = ('title', 'category', 'amount', 'status', 'requested_by', 'created_at')
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from finance.services import rebuild_monthly_ledger_summary
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the monthly ledger summary table from ledger entries."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--month", help="Only rebuild this YYYY-MM month.")
+
+    def handle(self, *args, **options):
+        month = options.get("month")
+        try:
+            written = rebuild_monthly_ledger_summary(month)
+        except ValueError:
+            raise CommandError("Invalid month format. Use YYYY-MM.")
+        self.stdout.write(self.style.SUCCESS(f"Done. Summary rows written: {written}"))
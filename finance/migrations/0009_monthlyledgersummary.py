@@ -0,0 +1,66 @@
+# Generated by Django 4.2.30 on 2026-10-18 03:54
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncMonth
+
+
+def backfill_monthly_summary(apps, schema_editor):
+    LedgerEntry = apps.get_model('finance', 'LedgerEntry')
+    MonthlyLedgerSummary = apps.get_model('finance', 'MonthlyLedgerSummary')
+    rows = (
+        LedgerEntry.objects.annotate(period=TruncMonth('created_at'))
+        .values('period', 'bank_account_id', 'entry_type')
+        .annotate(
+            income=Sum('amount_delta', filter=Q(amount_delta__gt=0)),
+            expense=Sum('amount_delta', filter=Q(amount_delta__lt=0)),
+            total=Count('id'),
+        )
+        .order_by()
+    )
+    MonthlyLedgerSummary.objects.bulk_create(
+        [
+            MonthlyLedgerSummary(
+                month=row['period'].strftime('%Y-%m'),
+                bank_account_id=row['bank_account_id'],
+                entry_type=row['entry_type'],
+                income_total=row['income'] or 0,
+                expense_total=-(row['expense'] or 0),
+                entry_count=row['total'],
+            )
+            for row in rows
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0008_bankaccount_is_default'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyLedgerSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.CharField(max_length=7)),
+                ('entry_type', models.CharField(choices=[('STUDENT_FEE', 'Student Fee'), ('REGISTRATION_FEE', 'Registration Fee'), ('TRANSPORT_FEE', 'Transport Fee'), ('MONTHLY_FEE', 'Monthly Fee'), ('MANUAL_INCOME', 'Manual Income'), ('SALARY_PAYMENT', 'Salary Payment'), ('EXPENSE_PAYMENT', 'Expense Payment'), ('CREDIT_GIVEN', 'Credit Given'), ('CREDIT_REPAYMENT', 'Credit Repayment'), ('OTHER', 'Other')], max_length=30)),
+                ('income_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('expense_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('entry_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('bank_account', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='monthly_summaries', to='finance.bankaccount')),
+            ],
+            options={
+                'ordering': ['-month', 'entry_type'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='monthlyledgersummary',
+            constraint=models.UniqueConstraint(fields=('month', 'bank_account', 'entry_type'), name='unique_monthly_ledger_summary'),
+        ),
+        migrations.RunPython(backfill_monthly_summary, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 4.2.30 on 2026-10-18 03:56
+
+from django.db import migrations, models
+from django.db.models import Case, Count, IntegerField, Value, When
+
+
+def remove_duplicate_payrolls(apps, schema_editor):
+    """
+    Keep one payroll per (employee, month) before the unique constraint goes in.
+
+    A paid payroll wins, since its money already left the account; otherwise
+    the newest row, which is the one payroll generation kept updating.
+    """
+    Payroll = apps.get_model("finance", "Payroll")
+    duplicates = (
+        Payroll.objects.values("employee_id", "month")
+        .annotate(total=Count("id"))
+        .filter(total__gt=1)
+        .order_by()
+    )
+    paid_first = Case(When(status="PAID", then=Value(0)), default=Value(1), output_field=IntegerField())
+    for row in duplicates:
+        ids = list(
+            Payroll.objects.filter(employee_id=row["employee_id"], month=row["month"])
+            .order_by(paid_first, "-id")
+            .values_list("id", flat=True)
+        )
+        Payroll.objects.filter(id__in=ids[1:]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0009_monthlyledgersummary'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_payrolls, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='bonus',
+            index=models.Index(fields=['month', 'employee'], name='bonus_month_employee_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='dashboardnotification',
+            index=models.Index(fields=['recipient', 'is_hidden', '-created_at'], name='dash_notif_recipient_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='deduction',
+            index=models.Index(fields=['month', 'employee'], name='deduction_month_employee_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ledgerentry',
+            index=models.Index(fields=['-created_at', '-id'], name='ledger_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ledgerentry',
+            index=models.Index(fields=['bank_account', '-created_at'], name='ledger_bank_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ledgerentry',
+            index=models.Index(fields=['entry_type', '-created_at'], name='ledger_type_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payroll',
+            index=models.Index(fields=['month', 'status'], name='payroll_month_status_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='payroll',
+            constraint=models.UniqueConstraint(fields=('employee', 'month'), name='unique_employee_month_payroll'),
+        ),
+    ]
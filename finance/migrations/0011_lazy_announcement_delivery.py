@@ -0,0 +1,49 @@
+# Generated by Django 4.2.30 on 2026-10-18 04:02
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def mark_existing_announcements_fanned_out(apps, schema_editor):
+    Announcement = apps.get_model('finance', 'Announcement')
+    Announcement.objects.update(fanned_out=True)
+    Announcement.objects.filter(title__startswith='Driver Delay Alert').update(category='DRIVER_DELAY')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0010_payroll_unique_and_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='announcement',
+            name='category',
+            field=models.CharField(choices=[('ANNOUNCEMENT', 'Announcement'), ('DRIVER_DELAY', 'Driver Delay')], default='ANNOUNCEMENT', max_length=30),
+        ),
+        migrations.AddField(
+            model_name='announcement',
+            name='fanned_out',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='dashboardnotification',
+            name='announcement',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='dashboard_notifications', to='finance.announcement'),
+        ),
+        migrations.AlterField(
+            model_name='announcement',
+            name='audience',
+            field=models.CharField(choices=[('PARENTS', 'Parents'), ('STAFF', 'Staff'), ('ALL', 'All'), ('PARENTS_AND_OFFICE', 'Parents, Directors and Accountants')], default='ALL', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='announcement',
+            index=models.Index(fields=['fanned_out', 'audience', 'created_at'], name='announcement_pending_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='dashboardnotification',
+            constraint=models.UniqueConstraint(fields=('recipient', 'announcement'), name='unique_recipient_announcement'),
+        ),
+        migrations.RunPython(mark_existing_announcements_fanned_out, migrations.RunPython.noop),
+    ]
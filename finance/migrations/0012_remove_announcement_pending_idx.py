@@ -0,0 +1,32 @@
+# Generated by Django 4.2.30 on 2026-10-18 04:50
+
+from django.db import migrations
+
+
+def queue_pending_announcements(apps, schema_editor):
+    # Announcements posted while delivery was lazy are fanned out by the job
+    # worker; copies already delivered are skipped by the unique constraint.
+    Announcement = apps.get_model('finance', 'Announcement')
+    Job = apps.get_model('jobs', 'Job')
+    Job.objects.bulk_create(
+        [
+            Job(name='finance.fan_out_announcement', payload={'announcement_id': announcement_id})
+            for announcement_id in Announcement.objects.filter(fanned_out=False).values_list('id', flat=True)
+        ]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0011_lazy_announcement_delivery'),
+        ('jobs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='announcement',
+            name='announcement_pending_idx',
+        ),
+        migrations.RunPython(queue_pending_announcements, migrations.RunPython.noop),
+    ]
@@ -3,6 +3,7 @@ from django.db import models
 from django.db.models import Sum
 from students.models import Parent
 from accounts.models import User
+from kgsystems.cache import get_cached, get_cached_singleton, invalidate, memoized
 
 class Invoice(models.Model):
     parent = models.ForeignKey(Parent, on_delete=models.CASCADE, related_name='invoices')
@@ -80,6 +81,14 @@ class Payroll(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["employee", "month"], name="unique_employee_month_payroll"),
+        ]
+        indexes = [
+            models.Index(fields=["month", "status"], name="payroll_month_status_idx"),
+        ]
+
     def __str__(self):
         return f"{self.employee} - {self.month}"
 
@@ -89,12 +98,22 @@ class Bonus(models.Model):
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     reason = models.TextField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["month", "employee"], name="bonus_month_employee_idx"),
+        ]
+
 class Deduction(models.Model):
     employee = models.ForeignKey(Employee, on_delete=models.CASCADE)
     month = models.CharField(max_length=20)
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     reason = models.TextField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["month", "employee"], name="deduction_month_employee_idx"),
+        ]
+
 
 class PayrollSetting(models.Model):
     # Single active row by convention (id=1)
@@ -106,8 +125,9 @@ class PayrollSetting(models.Model):
 
     @classmethod
     def get_current(cls):
-        obj, _ = cls.objects.get_or_create(id=1, defaults={"tax_rate_percent": 0})
-        return obj
+        return get_cached_singleton(
+            cls, lambda: cls.objects.get_or_create(id=1, defaults={"tax_rate_percent": 0})[0]
+        )
 
 
 class DashboardNotification(models.Model):
@@ -127,6 +147,13 @@ class DashboardNotification(models.Model):
         related_name="dashboard_notifications",
     )
     category = models.CharField(max_length=30, choices=CATEGORY_CHOICES, default="SYSTEM")
+    announcement = models.ForeignKey(
+        "Announcement",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="dashboard_notifications",
+    )
     title = models.CharField(max_length=150)
     message = models.TextField()
     is_read = models.BooleanField(default=False)
@@ -135,6 +162,12 @@ class DashboardNotification(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        constraints = [
+            models.UniqueConstraint(fields=["recipient", "announcement"], name="unique_recipient_announcement"),
+        ]
+        indexes = [
+            models.Index(fields=["recipient", "is_hidden", "-created_at"], name="dash_notif_recipient_idx"),
+        ]
 
     def __str__(self):
         return f"{self.recipient} - {self.category} - {self.title}"
@@ -145,6 +178,9 @@ class SchoolAccount(models.Model):
     is_initialized = models.BooleanField(default=False)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Not read through the singleton cache: the balance changes on every
+    # posting, and a cached copy could outlive the invalidation of a
+    # concurrent one.
     @classmethod
     def get_current(cls):
         obj, _ = cls.objects.get_or_create(id=1)
@@ -190,11 +226,46 @@ class LedgerEntry(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["-created_at", "-id"], name="ledger_created_idx"),
+            models.Index(fields=["bank_account", "-created_at"], name="ledger_bank_created_idx"),
+            models.Index(fields=["entry_type", "-created_at"], name="ledger_type_created_idx"),
+        ]
 
     def __str__(self):
         return f"{self.entry_type}: {self.amount_delta}"
 
 
+class MonthlyLedgerSummary(models.Model):
+    """Per month, bank account and entry type ledger totals, kept in step with LedgerEntry."""
+
+    month = models.CharField(max_length=7)  # YYYY-MM
+    bank_account = models.ForeignKey(
+        "BankAccount",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="monthly_summaries",
+    )
+    entry_type = models.CharField(max_length=30, choices=LedgerEntry.ENTRY_TYPE_CHOICES)
+    income_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    expense_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    entry_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-month", "entry_type"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["month", "bank_account", "entry_type"],
+                name="unique_monthly_ledger_summary",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.month} {self.entry_type}: +{self.income_total} / -{self.expense_total}"
+
+
 class ExpenseRequest(models.Model):
     CATEGORY_CHOICES = (
         ("FUEL", "Fuel"),
@@ -310,6 +381,12 @@ class Announcement(models.Model):
         ("PARENTS", "Parents"),
         ("STAFF", "Staff"),
         ("ALL", "All"),
+        ("PARENTS_AND_OFFICE", "Parents, Directors and Accountants"),
+    )
+
+    CATEGORY_CHOICES = (
+        ("ANNOUNCEMENT", "Announcement"),
+        ("DRIVER_DELAY", "Driver Delay"),
     )
 
     REASON_CHOICES = (
@@ -326,9 +403,12 @@ class Announcement(models.Model):
         related_name="created_announcements",
     )
     audience = models.CharField(max_length=20, choices=AUDIENCE_CHOICES, default="ALL")
+    category = models.CharField(max_length=30, choices=CATEGORY_CHOICES, default="ANNOUNCEMENT")
     reason = models.CharField(max_length=20, choices=REASON_CHOICES, default="GENERAL")
     title = models.CharField(max_length=150)
     message = models.TextField()
+    # Set once the announcement has been copied to every recipient's dashboard.
+    fanned_out = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -358,18 +438,55 @@ class BankAccount(models.Model):
     def __str__(self):
         return f"{self.bank_name} - {self.account_name}"
 
+    DIRECTORY_CACHE_KEY = "bank_accounts:directory"
+
+    @classmethod
+    def active_directory(cls):
+        """
+        Cached ``{"default_id", "active_ids"}`` for the active accounts.
+
+        The default is the flagged account, else the first Commercial Bank of
+        Ethiopia account, else the first active account.
+        """
+
+        def load():
+            accounts = list(cls.objects.filter(is_active=True).order_by("id").values_list("id", "is_default", "bank_name"))
+            default_id = next((pk for pk, is_default, _ in accounts if is_default), None)
+            if default_id is None:
+                default_id = next(
+                    (pk for pk, _, bank_name in accounts if bank_name.lower() == "commercial bank of ethiopia"),
+                    None,
+                )
+            if default_id is None and accounts:
+                default_id = accounts[0][0]
+            return {"default_id": default_id, "active_ids": frozenset(pk for pk, _, _ in accounts)}
+
+        return get_cached(cls.DIRECTORY_CACHE_KEY, load)
+
+    @classmethod
+    def resolve(cls, bank_account_id=None):
+        """
+        Return the active account ``bank_account_id`` (the default when ``None``).
+
+        Returns ``None`` for unknown or inactive ids. The instance is memoized
+        for the request, so validation and posting share one lookup.
+        """
+        directory = cls.active_directory()
+        if bank_account_id is None:
+            bank_account_id = directory["default_id"]
+        if bank_account_id not in directory["active_ids"]:
+            return None
+        return memoized(
+            f"bank_accounts:{bank_account_id}",
+            lambda: cls.objects.filter(id=bank_account_id, is_active=True).first(),
+        )
+
     @classmethod
     def get_default(cls):
-        default_account = cls.objects.filter(is_active=True, is_default=True).order_by("id").first()
-        if default_account:
-            return default_account
-        cbe_account = cls.objects.filter(
-            is_active=True,
-            bank_name__iexact="Commercial Bank of Ethiopia",
-        ).order_by("id").first()
-        if cbe_account:
-            return cbe_account
-        return cls.objects.filter(is_active=True).order_by("id").first()
+        return cls.resolve(None)
+
+    def _invalidate_cache(self):
+        invalidate(self.DIRECTORY_CACHE_KEY, f"bank_accounts:{self.pk}")
 
     @classmethod
     def sync_school_account_balance(cls):
@@ -386,9 +503,11 @@ class BankAccount(models.Model):
         if self.is_default:
             self.__class__.objects.exclude(pk=self.pk).update(is_default=False)
         super().save(*args, **kwargs)
+        self._invalidate_cache()
         self.__class__.sync_school_account_balance()
 
     def delete(self, *args, **kwargs):
+        self._invalidate_cache()
         result = super().delete(*args, **kwargs)
         self.__class__.sync_school_account_balance()
         return result
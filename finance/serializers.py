@@ -1,5 +1,7 @@
 from rest_framework import serializers
 
+from kgsystems.serializers import SparseFieldsetMixin
+
 from .models import (
     Announcement,
     BankAccount,
@@ -19,13 +21,13 @@ from .models import (
 from students.models import Student
 
 
-class InvoiceSerializer(serializers.ModelSerializer):
+class InvoiceSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Invoice
         fields = '__all__'
 
 
-class PaymentSerializer(serializers.ModelSerializer):
+class PaymentSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     bank_account_id = serializers.IntegerField(write_only=True, required=False, allow_null=True)
 
     class Meta:
@@ -34,7 +36,7 @@ class PaymentSerializer(serializers.ModelSerializer):
         read_only_fields = ['paid_by', 'paid_at']
 
     def validate_bank_account_id(self, value):
-        if not BankAccount.objects.filter(id=value, is_active=True).exists():
+        if BankAccount.resolve(value) is None:
             raise serializers.ValidationError('Select a valid active bank account.')
         return value
 
@@ -48,7 +50,7 @@ class PaymentSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
-class PayrollSerializer(serializers.ModelSerializer):
+class PayrollSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     employee_name = serializers.CharField(source='employee.user.full_name', read_only=True)
     requested_by_name = serializers.CharField(source='requested_by.full_name', read_only=True)
     reviewed_by_name = serializers.CharField(source='reviewed_by.full_name', read_only=True)
@@ -137,12 +139,16 @@ class PayrollRequestSerializer(serializers.Serializer):
     )
 
 
+class PayrollBulkPaySerializer(PayrollRequestSerializer):
+    bank_account_id = serializers.IntegerField(required=False, allow_null=True)
+
+
 class PayrollReviewSerializer(serializers.Serializer):
     approve = serializers.BooleanField(required=True)
     comment = serializers.CharField(required=False, allow_blank=True)
 
 
-class DashboardNotificationSerializer(serializers.ModelSerializer):
+class DashboardNotificationSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = DashboardNotification
         fields = [
@@ -212,7 +218,7 @@ class InitializeSchoolAccountSerializer(serializers.Serializer):
     initial_balance = serializers.DecimalField(max_digits=14, decimal_places=2)
 
 
-class LedgerEntrySerializer(serializers.ModelSerializer):
+class LedgerEntrySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     created_by_name = serializers.CharField(source='created_by.full_name', read_only=True)
     bank_account_id = serializers.IntegerField(source='bank_account.id', read_only=True)
     bank_name = serializers.CharField(source='bank_account.bank_name', read_only=True)
@@ -241,7 +247,7 @@ class ManualIncomeSerializer(serializers.Serializer):
     description = serializers.CharField(required=False, allow_blank=True)
 
     def validate_bank_account_id(self, value):
-        if not BankAccount.objects.filter(id=value, is_active=True).exists():
+        if BankAccount.resolve(value) is None:
             raise serializers.ValidationError('Select a valid active bank account.')
         return value
 
@@ -331,7 +337,7 @@ class CreditRepaymentSerializer(serializers.ModelSerializer):
         read_only_fields = ['recorded_by', 'created_at']
 
     def validate_bank_account_id(self, value):
-        if not BankAccount.objects.filter(id=value, is_active=True).exists():
+        if BankAccount.resolve(value) is None:
             raise serializers.ValidationError('Select a valid active bank account.')
         return value
 
@@ -354,7 +360,6 @@ class MonthlyReportSerializer(serializers.Serializer):
     total_transport_fee = serializers.DecimalField(max_digits=14, decimal_places=2)
     total_monthly_fee = serializers.DecimalField(max_digits=14, decimal_places=2)
     total_other_income = serializers.DecimalField(max_digits=14, decimal_places=2)
-    entries = LedgerEntrySerializer(many=True)
 
 
 class DriverStudentDetailSerializer(serializers.ModelSerializer):
@@ -413,6 +418,7 @@ class AnnouncementSerializer(serializers.ModelSerializer):
         fields = [
             'id',
             'audience',
+            'category',
             'reason',
             'title',
             'message',
@@ -420,7 +426,7 @@ class AnnouncementSerializer(serializers.ModelSerializer):
             'created_by_name',
             'created_at',
         ]
-        read_only_fields = ['id', 'created_by', 'created_by_name', 'created_at']
+        read_only_fields = ['id', 'category', 'created_by', 'created_by_name', 'created_at']
 
 
 class DriverDelayAlertSerializer(serializers.Serializer):
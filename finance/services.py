@@ -1,30 +1,370 @@
+from calendar import monthrange
+from datetime import date, datetime, time, timedelta
 from decimal import Decimal
+from time import perf_counter
 
+from django.contrib.auth import get_user_model
 from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
 
-from .models import BankAccount, LedgerEntry, SchoolAccount
+from employees.models import Attendance, Employee
+from kgsystems.cache import bump_namespaces
 
+from .models import (
+    Announcement,
+    BankAccount,
+    Bonus,
+    DashboardNotification,
+    Deduction,
+    LedgerEntry,
+    MonthlyLedgerSummary,
+    Payroll,
+    PayrollSetting,
+    SchoolAccount,
+)
 
-def record_account_transaction(*, bank_account=None, amount_delta, entry_type, description="", created_by=None):
-    delta = Decimal(str(amount_delta))
+PAYROLL_AMOUNT_FIELDS = [
+    "base_salary",
+    "total_present_days",
+    "overtime_amount",
+    "total_bonus",
+    "total_deductions",
+    "gross_salary",
+    "tax_rate_percent",
+    "tax_amount",
+    "net_salary",
+]
+PAYROLL_REVIEW_FIELDS = ["status", "review_comment", "reviewed_by", "reviewed_at"]
+NOTIFICATION_BATCH_SIZE = 1000
+
+User = get_user_model()
+
+
+def _elapsed_ms(started):
+    return round((perf_counter() - started) * 1000, 2)
+
+
+def month_datetime_range(month):
+    """Return the aware ``[start, end)`` datetimes of a ``YYYY-MM`` month."""
+    year, month_number = map(int, month.split("-"))
+    first_day = date(year, month_number, 1)
+    next_month = first_day + timedelta(days=monthrange(year, month_number)[1])
+    return (
+        timezone.make_aware(datetime.combine(first_day, time.min)),
+        timezone.make_aware(datetime.combine(next_month, time.min)),
+    )
+
+
+def add_entries_to_monthly_summary(entries):
+    """Fold new ``LedgerEntry`` rows into their ``MonthlyLedgerSummary`` rows, one UPDATE per row."""
+    totals = {}
+    for entry in entries:
+        key = (timezone.localtime(entry.created_at).strftime("%Y-%m"), entry.bank_account_id, entry.entry_type)
+        income, expense, count = totals.get(key, (Decimal("0"), Decimal("0"), 0))
+        delta = entry.amount_delta
+        totals[key] = (income + max(delta, Decimal("0")), expense + max(-delta, Decimal("0")), count + 1)
+
+    now = timezone.now()
+    for (month, bank_account_id, entry_type), (income, expense, count) in totals.items():
+        summary, _ = MonthlyLedgerSummary.objects.get_or_create(
+            month=month,
+            bank_account_id=bank_account_id,
+            entry_type=entry_type,
+        )
+        MonthlyLedgerSummary.objects.filter(pk=summary.pk).update(
+            income_total=F("income_total") + income,
+            expense_total=F("expense_total") + expense,
+            entry_count=F("entry_count") + count,
+            updated_at=now,
+        )
+    # Only closed months have cached reports.
+    current_month = timezone.localdate().strftime("%Y-%m")
+    if any(month < current_month for month, _, _ in totals):
+        bump_namespaces("monthly-report")
+
+
+def add_entry_to_monthly_summary(entry):
+    add_entries_to_monthly_summary([entry])
+
+
+def rebuild_monthly_ledger_summary(month=None):
+    """
+    Recompute ``MonthlyLedgerSummary`` from ``LedgerEntry`` with one grouped
+    query, for one ``YYYY-MM`` month or for the whole ledger. Returns the
+    number of summary rows written.
+    """
+    entries = LedgerEntry.objects.all()
+    summaries = MonthlyLedgerSummary.objects.all()
+    if month:
+        start, end = month_datetime_range(month)
+        entries = entries.filter(created_at__gte=start, created_at__lt=end)
+        summaries = summaries.filter(month=month)
+
+    rows = (
+        entries.annotate(period=TruncMonth("created_at"))
+        .values("period", "bank_account_id", "entry_type")
+        .annotate(
+            income=Sum("amount_delta", filter=Q(amount_delta__gt=0)),
+            expense=Sum("amount_delta", filter=Q(amount_delta__lt=0)),
+            total=Count("id"),
+        )
+        .order_by()
+    )
+    rollup = [
+        MonthlyLedgerSummary(
+            month=row["period"].strftime("%Y-%m"),
+            bank_account_id=row["bank_account_id"],
+            entry_type=row["entry_type"],
+            income_total=row["income"] or Decimal("0"),
+            expense_total=-(row["expense"] or Decimal("0")),
+            entry_count=row["total"],
+        )
+        for row in rows
+    ]
     with transaction.atomic():
-        if bank_account is None:
-            bank_account = BankAccount.get_default()
-        if isinstance(bank_account, int):
-            bank_account = BankAccount.objects.get(pk=bank_account, is_active=True)
+        summaries.delete()
+        MonthlyLedgerSummary.objects.bulk_create(rollup, batch_size=500)
+    bump_namespaces("monthly-report")
+    return len(rollup)
+
+
+def _resolve_bank_accounts(postings):
+    """Map every posting to a ``BankAccount`` through the cached resolver."""
+    resolved = []
+    for posting in postings:
+        bank_account = posting.get("bank_account")
+        if not isinstance(bank_account, BankAccount):
+            # Ids may arrive as strings straight from request data.
+            requested_id = None if bank_account is None else int(bank_account)
+            bank_account = BankAccount.resolve(requested_id)
+            if bank_account is None and requested_id is not None:
+                raise BankAccount.DoesNotExist(f"Bank account {requested_id} does not exist or is inactive.")
         if bank_account is None:
             raise BankAccount.DoesNotExist("No active bank account is configured for this transaction.")
+        resolved.append(bank_account)
+    return resolved
+
+
+def record_account_transactions_bulk(postings):
+    """
+    Post many ledger transactions in one atomic block.
 
+    Each posting is a dict with ``amount_delta`` and ``entry_type`` and
+    optionally ``bank_account`` (instance, id or ``None`` for the default),
+    ``description`` and ``created_by``. Balances get one F() increment per
+    bank account plus one for ``SchoolAccount``, and the entries are inserted
+    with ``bulk_create``. Returns the school account and the new entries.
+    """
+    postings = list(postings)
+    with transaction.atomic():
         account = SchoolAccount.get_current()
-        bank_account.current_balance = (bank_account.current_balance or Decimal("0")) + delta
-        bank_account.save(update_fields=["current_balance", "updated_at"])
+        if not postings:
+            return account, []
+        bank_accounts = _resolve_bank_accounts(postings)
+
+        deltas = [Decimal(str(posting["amount_delta"])) for posting in postings]
+        totals_by_account = {}
+        accounts_by_pk = {}
+        for bank_account, delta in zip(bank_accounts, deltas):
+            totals_by_account[bank_account.pk] = totals_by_account.get(bank_account.pk, Decimal("0")) + delta
+            accounts_by_pk.setdefault(bank_account.pk, []).append(bank_account)
+
+        # F() increments keep concurrent postings from overwriting each other and
+        # avoid BankAccount.save(), which re-sums every account balance. Rows are
+        # locked in pk order, bank accounts before the school account, so two
+        # concurrent batches cannot deadlock on each other.
+        now = timezone.now()
+        for bank_account_pk, total in sorted(totals_by_account.items()):
+            BankAccount.objects.filter(pk=bank_account_pk).update(
+                current_balance=F("current_balance") + total,
+                updated_at=now,
+            )
+        SchoolAccount.objects.filter(pk=account.pk).update(
+            current_balance=F("current_balance") + sum(deltas, Decimal("0")),
+            is_initialized=True,
+            updated_at=now,
+        )
+
+        entries = LedgerEntry.objects.bulk_create(
+            [
+                LedgerEntry(
+                    account=account,
+                    bank_account=bank_account,
+                    entry_type=posting["entry_type"],
+                    amount_delta=delta,
+                    description=posting.get("description", ""),
+                    created_by=posting.get("created_by"),
+                )
+                for posting, bank_account, delta in zip(postings, bank_accounts, deltas)
+            ],
+            batch_size=500,
+        )
+        add_entries_to_monthly_summary(entries)
+
+        for instances in accounts_by_pk.values():
+            instances[0].refresh_from_db(fields=["current_balance", "updated_at"])
+            for instance in instances[1:]:
+                instance.current_balance = instances[0].current_balance
+                instance.updated_at = instances[0].updated_at
         account.refresh_from_db()
-        entry = LedgerEntry.objects.create(
-            account=account,
-            bank_account=bank_account,
-            entry_type=entry_type,
-            amount_delta=delta,
-            description=description,
-            created_by=created_by,
+        # The cached balance responses predate the posting.
+        bump_namespaces("school-account", "bank-accounts")
+    return account, entries
+
+
+def record_account_transaction(*, bank_account=None, amount_delta, entry_type, description="", created_by=None):
+    account, entries = record_account_transactions_bulk(
+        [
+            {
+                "bank_account": bank_account,
+                "amount_delta": amount_delta,
+                "entry_type": entry_type,
+                "description": description,
+                "created_by": created_by,
+            }
+        ]
+    )
+    return account, entries[0]
+
+
+def _totals_by_employee(queryset, aggregate):
+    return dict(queryset.order_by().values("employee_id").annotate(total=aggregate).values_list("employee_id", "total"))
+
+
+def generate_payroll(*, month, start_date, end_date, employee_id=None, overtime_amount=Decimal("0")):
+    """
+    Create or refresh the ``month`` payroll of every employee (or one employee).
+
+    Present days, bonuses and deductions are pre-aggregated per employee with
+    one grouped query each. Missing payrolls are inserted with
+    ``bulk_create`` and existing ones refreshed with ``bulk_update`` in a
+    single transaction; paid payrolls are left untouched.
+    """
+    started = perf_counter()
+    employees = Employee.objects.order_by("id")
+    if employee_id:
+        employees = employees.filter(id=employee_id)
+    salaries = dict(employees.values_list("id", "salary"))
+    employee_ids = list(salaries)
+
+    present_days = _totals_by_employee(
+        Attendance.objects.filter(employee_id__in=employee_ids, status="PRESENT", date__range=[start_date, end_date]),
+        Count("id"),
+    )
+    bonuses = _totals_by_employee(Bonus.objects.filter(employee_id__in=employee_ids, month=month), Sum("amount"))
+    deductions = _totals_by_employee(Deduction.objects.filter(employee_id__in=employee_ids, month=month), Sum("amount"))
+    tax_rate = PayrollSetting.get_current().tax_rate_percent
+    existing = {}
+    for payroll in Payroll.objects.filter(employee_id__in=employee_ids, month=month):
+        existing[payroll.employee_id] = payroll
+    aggregate_ms = _elapsed_ms(started)
+
+    upsert_started = perf_counter()
+    to_create = []
+    to_update = []
+    skipped_paid = 0
+    for employee_id in employee_ids:
+        payroll = existing.get(employee_id)
+        if payroll is not None and payroll.status == "PAID":
+            skipped_paid += 1
+            continue
+
+        base_salary = salaries[employee_id]
+        bonus_total = bonuses.get(employee_id) or Decimal("0")
+        deduction_total = deductions.get(employee_id) or Decimal("0")
+        gross_salary = base_salary + overtime_amount + bonus_total - deduction_total
+        tax_amount = (gross_salary * tax_rate) / Decimal("100") if gross_salary > 0 else Decimal("0")
+        values = {
+            "base_salary": base_salary,
+            "total_present_days": present_days.get(employee_id, 0),
+            "overtime_amount": overtime_amount,
+            "total_bonus": bonus_total,
+            "total_deductions": deduction_total,
+            "gross_salary": gross_salary,
+            "tax_rate_percent": tax_rate,
+            "tax_amount": tax_amount,
+            "net_salary": gross_salary - tax_amount,
+        }
+
+        if payroll is None:
+            to_create.append(Payroll(employee_id=employee_id, month=month, status="PENDING", **values))
+            continue
+        for field, value in values.items():
+            setattr(payroll, field, value)
+        if payroll.status in ["REJECTED", "PENDING"]:
+            payroll.status = "PENDING"
+            payroll.review_comment = ""
+            payroll.reviewed_by = None
+            payroll.reviewed_at = None
+        to_update.append(payroll)
+
+    with transaction.atomic():
+        Payroll.objects.bulk_create(to_create, batch_size=500)
+        Payroll.objects.bulk_update(to_update, PAYROLL_AMOUNT_FIELDS + PAYROLL_REVIEW_FIELDS, batch_size=500)
+
+    return {
+        "generated_payroll_ids": sorted(payroll.id for payroll in to_create + to_update),
+        "created": len(to_create),
+        "updated": len(to_update),
+        "skipped_paid": skipped_paid,
+        "timings_ms": {
+            "aggregate": aggregate_ms,
+            "upsert": _elapsed_ms(upsert_started),
+            "total": _elapsed_ms(started),
+        },
+    }
+
+
+# Recipients of each Announcement.audience, by role.
+ANNOUNCEMENT_AUDIENCES = {
+    "ALL": Q(),
+    "PARENTS": Q(role="PARENT"),
+    "STAFF": ~Q(role="PARENT"),
+    "PARENTS_AND_OFFICE": Q(role__in=["PARENT", "DIRECTOR", "ACCOUNTANT"]),
+}
+
+
+def fan_out_announcement(announcement_id):
+    """
+    Copy an announcement onto the dashboard of every user in its audience.
+
+    Runs in the job worker, so posting stays O(1) in the request path.
+    Recipient ids are streamed and inserted in batches of
+    ``NOTIFICATION_BATCH_SIZE``; the unique (recipient, announcement)
+    constraint lets a retried job skip the copies it already made. Only users
+    who had joined when it was posted receive it.
+    """
+    announcement = Announcement.objects.filter(pk=announcement_id, fanned_out=False).first()
+    if announcement is None:
+        return {"recipients": 0}
+
+    recipient_ids = (
+        User.objects.filter(ANNOUNCEMENT_AUDIENCES[announcement.audience], date_joined__lte=announcement.created_at)
+        .order_by()
+        .values_list("id", flat=True)
+        .iterator(chunk_size=NOTIFICATION_BATCH_SIZE)
+    )
+    recipients = 0
+    batch = []
+    for recipient_id in recipient_ids:
+        batch.append(
+            DashboardNotification(
+                recipient_id=recipient_id,
+                announcement=announcement,
+                category=announcement.category,
+                title=announcement.title,
+                message=announcement.message,
+            )
         )
-    return account, entry
+        if len(batch) == NOTIFICATION_BATCH_SIZE:
+            DashboardNotification.objects.bulk_create(batch, ignore_conflicts=True)
+            recipients += len(batch)
+            batch = []
+    if batch:
+        DashboardNotification.objects.bulk_create(batch, ignore_conflicts=True)
+        recipients += len(batch)
+
+    Announcement.objects.filter(pk=announcement.pk).update(fanned_out=True)
+    return {"recipients": recipients}
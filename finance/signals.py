@@ -0,0 +1,29 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from jobs.services import enqueue_job
+from kgsystems.cache import bump_namespaces, invalidate_singleton_on_save
+
+from .models import Announcement, BankAccount, PayrollSetting, SchoolAccount
+
+post_save.connect(invalidate_singleton_on_save, sender=PayrollSetting)
+post_delete.connect(invalidate_singleton_on_save, sender=PayrollSetting)
+
+
+@receiver([post_save, post_delete], sender=SchoolAccount)
+def invalidate_school_account_responses(sender, **kwargs):
+    bump_namespaces("school-account")
+
+
+@receiver([post_save, post_delete], sender=BankAccount)
+def invalidate_bank_account_responses(sender, **kwargs):
+    bump_namespaces("bank-accounts")
+
+
+@receiver(post_save, sender=Announcement)
+def fan_out_new_announcement(sender, instance, created, **kwargs):
+    if created and not instance.fanned_out:
+        transaction.on_commit(
+            lambda: enqueue_job("finance.fan_out_announcement", {"announcement_id": instance.pk})
+        )
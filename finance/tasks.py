@@ -0,0 +1,22 @@
+from datetime import date
+from decimal import Decimal
+
+from jobs.registry import job_handler
+
+from . import services
+
+
+@job_handler("finance.generate_payroll")
+def generate_payroll(*, month, start_date, end_date, employee_id=None, overtime_amount="0"):
+    return services.generate_payroll(
+        month=month,
+        start_date=date.fromisoformat(start_date),
+        end_date=date.fromisoformat(end_date),
+        employee_id=employee_id,
+        overtime_amount=Decimal(overtime_amount),
+    )
+
+
+@job_handler("finance.fan_out_announcement")
+def fan_out_announcement(*, announcement_id):
+    return services.fan_out_announcement(announcement_id)
@@ -1,12 +1,34 @@
+import warnings
+from datetime import date
 from decimal import Decimal
+from io import StringIO
 
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.paginator import UnorderedObjectListWarning
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
 
 from accounts.models import DriverProfile, User
-from employees.models import Employee
-from finance.models import BankAccount, LedgerEntry, SchoolAccount
+from employees.models import Attendance, Employee
+from finance.models import (
+    Announcement,
+    BankAccount,
+    Bonus,
+    DashboardNotification,
+    Deduction,
+    LedgerEntry,
+    MonthlyLedgerSummary,
+    Payroll,
+    PayrollSetting,
+    SchoolAccount,
+)
+from finance.services import generate_payroll, record_account_transaction, record_account_transactions_bulk
+from finance.views import _pay_payrolls
+from jobs.services import run_pending_jobs
 from students.models import Student
 from transport.models import Bus, BusAssignment, Route
 
@@ -31,46 +53,20 @@ class MonthlyReportViewTests(APITestCase):
         )
 
     def test_monthly_report_includes_fee_summary_totals(self):
-        LedgerEntry.objects.create(
-            account=self.account,
-            bank_account=self.bank_account,
-            entry_type="REGISTRATION_FEE",
-            amount_delta=Decimal("300.00"),
-            description="Registration fee",
-            created_by=self.accountant,
-        )
-        LedgerEntry.objects.create(
-            account=self.account,
-            bank_account=self.bank_account,
-            entry_type="TRANSPORT_FEE",
-            amount_delta=Decimal("50.00"),
-            description="Transport fee",
-            created_by=self.accountant,
-        )
-        LedgerEntry.objects.create(
-            account=self.account,
-            bank_account=self.bank_account,
-            entry_type="MONTHLY_FEE",
-            amount_delta=Decimal("100.00"),
-            description="Monthly fee",
-            created_by=self.accountant,
-        )
-        LedgerEntry.objects.create(
-            account=self.account,
-            bank_account=self.bank_account,
-            entry_type="MANUAL_INCOME",
-            amount_delta=Decimal("25.00"),
-            description="Other income",
-            created_by=self.accountant,
-        )
-        LedgerEntry.objects.create(
-            account=self.account,
-            bank_account=self.bank_account,
-            entry_type="EXPENSE_PAYMENT",
-            amount_delta=Decimal("-40.00"),
-            description="Expense",
-            created_by=self.accountant,
-        )
+        for entry_type, amount in [
+            ("REGISTRATION_FEE", "300.00"),
+            ("TRANSPORT_FEE", "50.00"),
+            ("MONTHLY_FEE", "100.00"),
+            ("MANUAL_INCOME", "25.00"),
+            ("EXPENSE_PAYMENT", "-40.00"),
+        ]:
+            record_account_transaction(
+                bank_account=self.bank_account,
+                amount_delta=Decimal(amount),
+                entry_type=entry_type,
+                description=entry_type.title(),
+                created_by=self.accountant,
+            )
 
         response = self.client.get(reverse("monthly-report"))
 
@@ -82,7 +78,157 @@ class MonthlyReportViewTests(APITestCase):
         self.assertEqual(Decimal(response.data["total_transport_fee"]), Decimal("50.00"))
         self.assertEqual(Decimal(response.data["total_monthly_fee"]), Decimal("100.00"))
         self.assertEqual(Decimal(response.data["total_other_income"]), Decimal("25.00"))
-        self.assertEqual(len(response.data["entries"]), 5)
+        self.assertNotIn("entries", response.data)
+
+        response = self.client.get(reverse("ledger-list"), {"month": response.data["month"]})
+        self.assertEqual(len(response.data["results"]), 5)
+
+    def test_rebuild_command_matches_incremental_summary(self):
+        record_account_transaction(
+            bank_account=self.bank_account,
+            amount_delta=Decimal("120.00"),
+            entry_type="MONTHLY_FEE",
+            created_by=self.accountant,
+        )
+        record_account_transaction(
+            bank_account=self.bank_account,
+            amount_delta=Decimal("-20.00"),
+            entry_type="MONTHLY_FEE",
+            created_by=self.accountant,
+        )
+        incremental = list(
+            MonthlyLedgerSummary.objects.values_list("month", "entry_type", "income_total", "expense_total", "entry_count")
+        )
+
+        call_command("rebuild_ledger_summary", stdout=StringIO())
+
+        rebuilt = list(
+            MonthlyLedgerSummary.objects.values_list("month", "entry_type", "income_total", "expense_total", "entry_count")
+        )
+        self.assertEqual(rebuilt, incremental)
+        self.assertEqual(rebuilt[0][2:], (Decimal("120.00"), Decimal("20.00"), 2))
+
+
+class LedgerPostingTests(APITestCase):
+    def setUp(self):
+        self.bank_account = BankAccount.objects.create(
+            bank_name="Awash Bank",
+            account_name="Fees",
+            account_holder_name="KG Systems",
+            account_number="AWB-001",
+            initial_balance=Decimal("100.00"),
+            current_balance=Decimal("100.00"),
+        )
+        self.other_account = BankAccount.objects.create(
+            bank_name="Dashen Bank",
+            account_name="Payroll",
+            account_holder_name="KG Systems",
+            account_number="DSH-001",
+            initial_balance=Decimal("50.00"),
+            current_balance=Decimal("50.00"),
+        )
+
+    def test_posting_increments_balances_without_resumming_accounts(self):
+        stale = BankAccount.objects.get(pk=self.bank_account.pk)
+        record_account_transaction(bank_account=self.bank_account, amount_delta=Decimal("40.00"), entry_type="MONTHLY_FEE")
+
+        with CaptureQueriesContext(connection) as queries:
+            account, _ = record_account_transaction(
+                bank_account=stale,
+                amount_delta=Decimal("-15.00"),
+                entry_type="EXPENSE_PAYMENT",
+            )
+
+        self.assertFalse(any("SUM(" in query["sql"].upper() for query in queries.captured_queries))
+        self.assertEqual(stale.current_balance, Decimal("125.00"))
+        self.assertEqual(account.current_balance, Decimal("175.00"))
+        self.assertEqual(SchoolAccount.get_current().current_balance, Decimal("175.00"))
+
+    def test_cached_balance_response_is_invalidated_by_posting(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        director = User.objects.create_user(
+            phone_number="0911000019",
+            password="pass1234",
+            role="DIRECTOR",
+            full_name="Director Balance",
+        )
+        self.client.force_authenticate(director)
+        with self.captureOnCommitCallbacks(execute=True):
+            before = self.client.get(reverse("school-account"))
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(reverse("school-account")).data, before.data)
+
+        record_account_transaction(bank_account=self.bank_account, amount_delta=Decimal("25.00"), entry_type="MONTHLY_FEE")
+
+        after = self.client.get(reverse("school-account"))
+        self.assertEqual(Decimal(after.data["current_balance"]), Decimal(before.data["current_balance"]) + Decimal("25.00"))
+
+    def test_bulk_posting_applies_one_update_per_account(self):
+        postings = [
+            {"bank_account": self.bank_account.id, "amount_delta": Decimal("10.00"), "entry_type": "MONTHLY_FEE"}
+            for _ in range(5)
+        ] + [
+            {"bank_account": self.other_account, "amount_delta": Decimal("-5.00"), "entry_type": "EXPENSE_PAYMENT"}
+            for _ in range(5)
+        ]
+
+        with CaptureQueriesContext(connection) as queries:
+            account, entries = record_account_transactions_bulk(postings)
+
+        updates = [query for query in queries.captured_queries if query["sql"].startswith('UPDATE "finance_bankaccount"')]
+        self.assertEqual(len(updates), 2)
+        self.assertEqual(len(entries), 10)
+        self.assertEqual(account.current_balance, Decimal("175.00"))
+        self.other_account.refresh_from_db()
+        self.assertEqual(self.other_account.current_balance, Decimal("25.00"))
+        summary = MonthlyLedgerSummary.objects.get(entry_type="MONTHLY_FEE")
+        self.assertEqual((summary.income_total, summary.entry_count), (Decimal("50.00"), 5))
+
+    def test_bulk_posting_updates_accounts_in_pk_order(self):
+        postings = [
+            {"bank_account": self.other_account, "amount_delta": Decimal("-5.00"), "entry_type": "EXPENSE_PAYMENT"},
+            {"bank_account": self.bank_account, "amount_delta": Decimal("10.00"), "entry_type": "MONTHLY_FEE"},
+        ]
+
+        with CaptureQueriesContext(connection) as queries:
+            record_account_transactions_bulk(postings)
+
+        updated = [
+            query["sql"].rsplit("=", 1)[1].strip()
+            for query in queries.captured_queries
+            if query["sql"].startswith('UPDATE "finance_bankaccount"')
+        ]
+        self.assertEqual(updated, [str(self.bank_account.pk), str(self.other_account.pk)])
+
+    def test_bulk_posting_accepts_bank_account_ids_as_strings(self):
+        record_account_transactions_bulk(
+            [{"bank_account": str(self.other_account.id), "amount_delta": Decimal("20.00"), "entry_type": "MONTHLY_FEE"}]
+        )
+
+        self.other_account.refresh_from_db()
+        self.assertEqual(self.other_account.current_balance, Decimal("70.00"))
+        self.assertEqual(LedgerEntry.objects.get().bank_account_id, self.other_account.id)
+
+
+class SchoolAccountInitializeTests(APITestCase):
+    def test_initialize_reads_the_current_row_not_a_cached_copy(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        accountant = User.objects.create_user(
+            phone_number="0911000043",
+            password="pass1234",
+            role="ACCOUNTANT",
+            full_name="Accountant Initialize",
+        )
+        self.assertFalse(SchoolAccount.get_current().is_initialized)
+        SchoolAccount.objects.filter(id=1).update(is_initialized=True)
+
+        self.client.force_authenticate(accountant)
+        response = self.client.post(reverse("school-account-initialize"), {"initial_balance": "500.00"}, format="json")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(LedgerEntry.objects.exists())
 
 
 class BankAccountApiTests(APITestCase):
@@ -212,3 +358,221 @@ class DriverStudentListTests(APITestCase):
         self.assertEqual(response.data[0]["address"], "Bole")
         self.assertEqual(response.data[0]["bus_number"], "BUS-20")
         self.assertEqual(response.data[0]["route_name"], "Driver Route")
+
+
+class PayrollGenerationTests(APITestCase):
+    def setUp(self):
+        self.accountant = User.objects.create_user(
+            phone_number="0911000030",
+            password="pass1234",
+            role="ACCOUNTANT",
+            full_name="Payroll Accountant",
+        )
+        PayrollSetting.objects.update_or_create(id=1, defaults={"tax_rate_percent": Decimal("10.00")})
+        self.employees = []
+        for index in range(3):
+            user = User.objects.create_user(
+                phone_number=f"091100003{index + 1}",
+                password="pass1234",
+                role="TEACHER",
+                full_name=f"Teacher {index}",
+            )
+            self.employees.append(Employee.objects.create(user=user, role="TEACHER", salary=Decimal("1000.00")))
+        first = self.employees[0]
+        for _ in range(2):
+            Attendance.objects.create(employee=first, status="PRESENT")
+        Attendance.objects.create(employee=first, status="ABSENT")
+        Attendance.objects.filter(employee=first).update(date="2026-03-10")
+        Bonus.objects.create(employee=first, month="2026-03", amount=Decimal("200.00"), reason="Extra class")
+        Deduction.objects.create(employee=first, month="2026-03", amount=Decimal("50.00"), reason="Late")
+        self.paid = Payroll.objects.create(
+            employee=self.employees[1],
+            month="2026-03",
+            base_salary=Decimal("900.00"),
+            net_salary=Decimal("900.00"),
+            status="PAID",
+        )
+        self.rejected = Payroll.objects.create(
+            employee=self.employees[2],
+            month="2026-03",
+            base_salary=Decimal("900.00"),
+            net_salary=Decimal("900.00"),
+            status="REJECTED",
+            review_comment="Wrong amount",
+        )
+
+    def test_payroll_list_pages_are_stable(self):
+        latest = Payroll.objects.create(
+            employee=self.employees[0],
+            month="2026-04",
+            base_salary=Decimal("1000.00"),
+            net_salary=Decimal("1000.00"),
+        )
+        self.client.force_authenticate(self.accountant)
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", UnorderedObjectListWarning)
+            first = self.client.get(reverse("payroll-list"), {"page_size": 2})
+            second = self.client.get(first.data["next"])
+
+        ids = [item["id"] for item in first.data["results"] + second.data["results"]]
+        self.assertEqual(ids, [latest.id, self.paid.id, self.rejected.id])
+        self.assertIsNone(second.data["next"])
+
+    def test_generate_payroll_aggregates_and_upserts_in_bulk(self):
+        with self.assertNumQueries(10):
+            result = generate_payroll(
+                month="2026-03",
+                start_date=date(2026, 3, 1),
+                end_date=date(2026, 3, 31),
+            )
+
+        self.assertEqual((result["created"], result["updated"], result["skipped_paid"]), (1, 1, 1))
+        payroll = Payroll.objects.get(employee=self.employees[0], month="2026-03")
+        self.assertEqual(payroll.total_present_days, 2)
+        self.assertEqual(payroll.gross_salary, Decimal("1150.00"))
+        self.assertEqual(payroll.net_salary, Decimal("1035.00"))
+        self.rejected.refresh_from_db()
+        self.assertEqual(self.rejected.status, "PENDING")
+        self.assertEqual(self.rejected.review_comment, "")
+        self.assertEqual(self.rejected.base_salary, Decimal("1000.00"))
+        self.paid.refresh_from_db()
+        self.assertEqual(self.paid.base_salary, Decimal("900.00"))
+        self.assertEqual(sorted(result["generated_payroll_ids"]), sorted([payroll.id, self.rejected.id]))
+
+    def test_generate_endpoint_returns_phase_timings(self):
+        self.client.force_authenticate(self.accountant)
+
+        response = self.client.post(reverse("payroll-generate"), {"month": "2026-03"}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["generated_payroll_ids"]), 2)
+        self.assertIn("aggregate", response.data["timings_ms"])
+
+    def test_bulk_pay_pays_approved_payrolls_in_one_batch(self):
+        Payroll.objects.filter(pk=self.rejected.pk).update(status="APPROVED")
+        approved = Payroll.objects.create(
+            employee=self.employees[0],
+            month="2026-03",
+            base_salary=Decimal("1000.00"),
+            net_salary=Decimal("1000.00"),
+            status="APPROVED",
+        )
+        director = User.objects.create_user(
+            phone_number="0911000035",
+            password="pass1234",
+            role="DIRECTOR",
+            full_name="Payroll Director",
+        )
+        bank_account = BankAccount.objects.create(
+            bank_name="Bank of Abyssinia",
+            account_name="Payroll",
+            account_holder_name="KG Systems",
+            account_number="BOA-PAY",
+            initial_balance=Decimal("5000.00"),
+            current_balance=Decimal("5000.00"),
+        )
+        self.client.force_authenticate(self.accountant)
+
+        response = self.client.post(
+            reverse("payroll-pay-bulk"),
+            {"payroll_ids": [approved.id, self.rejected.id, self.paid.id], "bank_account_id": bank_account.id},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["paid_payroll_ids"], [self.rejected.id, approved.id])
+        self.assertEqual(response.data["skipped_payroll_ids"], [self.paid.id])
+        self.assertEqual(Payroll.objects.filter(status="PAID").count(), 3)
+        bank_account.refresh_from_db()
+        self.assertEqual(bank_account.current_balance, Decimal("3100.00"))
+        self.assertEqual(DashboardNotification.objects.filter(recipient=director, category="PAYROLL_PAID").count(), 1)
+
+    def test_paying_a_payroll_twice_posts_the_salary_once(self):
+        Payroll.objects.filter(pk=self.rejected.pk).update(status="APPROVED")
+        bank_account = BankAccount.objects.create(
+            bank_name="Bank of Abyssinia",
+            account_name="Payroll",
+            account_holder_name="KG Systems",
+            account_number="BOA-PAY",
+            initial_balance=Decimal("5000.00"),
+            current_balance=Decimal("5000.00"),
+        )
+        self.client.force_authenticate(self.accountant)
+        url = reverse("payroll-pay", kwargs={"pk": self.rejected.pk})
+
+        first = self.client.patch(url, {"bank_account_id": bank_account.id}, format="json")
+        second = self.client.patch(url, {"bank_account_id": bank_account.id}, format="json")
+
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.status_code, status.HTTP_409_CONFLICT)
+        bank_account.refresh_from_db()
+        self.assertEqual(bank_account.current_balance, Decimal("4100.00"))
+        self.assertEqual(LedgerEntry.objects.filter(entry_type="SALARY_PAYMENT").count(), 1)
+
+    def test_stale_approved_payroll_is_not_posted_again(self):
+        stale = Payroll.objects.select_related("employee", "employee__user").get(pk=self.paid.pk)
+        stale.status = "APPROVED"
+
+        self.assertEqual(_pay_payrolls([stale], None, self.accountant), [])
+        self.assertFalse(LedgerEntry.objects.filter(entry_type="SALARY_PAYMENT").exists())
+        self.assertFalse(DashboardNotification.objects.filter(category="PAYROLL_PAID").exists())
+
+
+class AnnouncementDeliveryTests(APITestCase):
+    def setUp(self):
+        self.director = User.objects.create_user(
+            phone_number="0911000040",
+            password="pass1234",
+            role="DIRECTOR",
+            full_name="Director Announce",
+        )
+        self.parent = User.objects.create_user(
+            phone_number="0911000041",
+            password="pass1234",
+            role="PARENT",
+            full_name="Parent Announce",
+        )
+        self.teacher = User.objects.create_user(
+            phone_number="0911000042",
+            password="pass1234",
+            role="TEACHER",
+            full_name="Teacher Announce",
+        )
+
+    def test_announcement_is_stored_once_and_fanned_out_by_a_job(self):
+        self.client.force_authenticate(self.director)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("announcement-create"),
+                {"audience": "PARENTS", "title": "Closed Friday", "message": "School is closed on Friday."},
+                format="json",
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertFalse(DashboardNotification.objects.exists())
+
+        run_pending_jobs()
+
+        self.client.force_authenticate(self.parent)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("dashboard-notifications"))
+        self.assertFalse(any(query["sql"].startswith(("INSERT", "UPDATE")) for query in queries.captured_queries))
+        self.assertEqual([item["title"] for item in response.data["results"]], ["Closed Friday"])
+        self.assertEqual(DashboardNotification.objects.filter(recipient=self.parent).count(), 1)
+        self.assertTrue(Announcement.objects.get().fanned_out)
+
+        self.client.force_authenticate(self.teacher)
+        response = self.client.get(reverse("dashboard-notifications"))
+        self.assertEqual(response.data["results"], [])
+
+    def test_hidden_announcement_stays_hidden(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Announcement.objects.create(created_by=self.director, audience="ALL", title="Sports day", message="Friday")
+        run_pending_jobs()
+        self.client.force_authenticate(self.teacher)
+
+        response = self.client.post(reverse("dashboard-notifications-hide"), {"hide_all": True}, format="json")
+        self.assertEqual(response.data["updated"], 1)
+
+        response = self.client.get(reverse("dashboard-notifications"))
+        self.assertEqual(response.data["results"], [])
@@ -27,6 +27,7 @@ from .views import (
     MonthlyReportView,
     PaymentCreateView,
     PaymentListView,
+    PayrollBulkPayView,
     PayrollDetailView,
     PayrollGenerateView,
     PayrollListView,
@@ -59,6 +60,7 @@ urlpatterns = [
     path('payroll/request-payment/', PayrollRequestPaymentView.as_view(), name='payroll-request-payment'),
     path('payroll/review/<int:pk>/', PayrollReviewView.as_view(), name='payroll-review'),
     path('payroll/pay/<int:pk>/', PayrollPayView.as_view(), name='payroll-pay'),
+    path('payroll/pay/bulk/', PayrollBulkPayView.as_view(), name='payroll-pay-bulk'),
 
     path('bonus/create/', BonusCreateView.as_view(), name='bonus-create'),
     path('deduction/create/', DeductionCreateView.as_view(), name='deduction-create'),
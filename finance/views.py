@@ -3,14 +3,18 @@ from datetime import date
 from decimal import Decimal
 
 from django.contrib.auth import get_user_model
-from django.db.models import Sum
+from django.db import transaction
+from django.db.models import Q, QuerySet, Sum
 from django.utils import timezone
 from rest_framework import generics, permissions, status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from employees.models import Attendance, Employee
+from employees.models import Employee
+from jobs.services import enqueue_job, job_accepted_payload, wants_background
+from kgsystems.cache import cache_response
+from kgsystems.pagination import CreatedAtCursorPagination
 
 from .models import (
     Announcement,
@@ -22,6 +26,7 @@ from .models import (
     ExpenseRequest,
     Invoice,
     LedgerEntry,
+    MonthlyLedgerSummary,
     Payment,
     Payroll,
     PayrollSetting,
@@ -48,6 +53,7 @@ from .serializers import (
     ManualIncomeSerializer,
     MonthlyReportSerializer,
     PaymentSerializer,
+    PayrollBulkPaySerializer,
     PayrollGenerateSerializer,
     PayrollRequestSerializer,
     PayrollReviewSerializer,
@@ -55,7 +61,14 @@ from .serializers import (
     PayrollSettingSerializer,
     SchoolAccountSerializer,
 )
-from .services import record_account_transaction
+from .services import (
+    NOTIFICATION_BATCH_SIZE,
+    add_entry_to_monthly_summary,
+    generate_payroll,
+    month_datetime_range,
+    record_account_transaction,
+    record_account_transactions_bulk,
+)
 from students.models import Student
 from transport.models import BusAssignment
 
@@ -107,31 +120,28 @@ def _month_bounds(month_str):
 
 
 def _notify_users(users, category, title, message):
-    payload = [
-        DashboardNotification(
-            recipient=user,
-            category=category,
-            title=title,
-            message=message,
-        )
-        for user in users
-    ]
-    if payload:
-        DashboardNotification.objects.bulk_create(payload)
+    if isinstance(users, QuerySet):
+        recipient_ids = users.order_by().values_list('id', flat=True).iterator(chunk_size=NOTIFICATION_BATCH_SIZE)
+    else:
+        recipient_ids = (user.id for user in users)
 
-
-def _announcement_recipients(audience):
-    if audience == 'PARENTS':
-        return User.objects.filter(role='PARENT')
-    if audience == 'STAFF':
-        return User.objects.exclude(role='PARENT')
-    return User.objects.all()
+    batch = []
+    for recipient_id in recipient_ids:
+        batch.append(DashboardNotification(recipient_id=recipient_id, category=category, title=title, message=message))
+        if len(batch) == NOTIFICATION_BATCH_SIZE:
+            DashboardNotification.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        DashboardNotification.objects.bulk_create(batch)
 
 
 def _get_active_bank_account(bank_account_id):
     if bank_account_id in (None, "", "null"):
         return BankAccount.get_default()
-    return BankAccount.objects.filter(id=bank_account_id, is_active=True).first()
+    try:
+        return BankAccount.resolve(int(bank_account_id))
+    except (TypeError, ValueError):
+        return None
 
 
 # -------------------------------
@@ -140,6 +150,7 @@ def _get_active_bank_account(bank_account_id):
 class SchoolAccountView(APIView):
     permission_classes = [IsAuthenticated, IsDirectorOrAccountant]
 
+    @cache_response("school-account")
     def get(self, request):
         account = SchoolAccount.get_current()
         return Response(SchoolAccountSerializer(account).data)
@@ -158,21 +169,24 @@ class SchoolAccountInitializeView(APIView):
         serializer = InitializeSchoolAccountSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        account = SchoolAccount.get_current()
-        if account.is_initialized:
-            return Response({'error': 'School account already initialized.'}, status=status.HTTP_400_BAD_REQUEST)
-
-        account.current_balance = serializer.validated_data['initial_balance']
-        account.is_initialized = True
-        account.save(update_fields=['current_balance', 'is_initialized', 'updated_at'])
-
-        LedgerEntry.objects.create(
-            account=account,
-            entry_type='OTHER',
-            amount_delta=account.current_balance,
-            description='Initial school balance set by accountant/admin.',
-            created_by=request.user,
-        )
+        with transaction.atomic():
+            # Locked so two concurrent requests cannot both initialize it.
+            account, _ = SchoolAccount.objects.select_for_update().get_or_create(id=1)
+            if account.is_initialized:
+                return Response({'error': 'School account already initialized.'}, status=status.HTTP_400_BAD_REQUEST)
+
+            account.current_balance = serializer.validated_data['initial_balance']
+            account.is_initialized = True
+            account.save(update_fields=['current_balance', 'is_initialized', 'updated_at'])
+
+            entry = LedgerEntry.objects.create(
+                account=account,
+                entry_type='OTHER',
+                amount_delta=account.current_balance,
+                description='Initial school balance set by accountant/admin.',
+                created_by=request.user,
+            )
+            add_entry_to_monthly_summary(entry)
         return Response(SchoolAccountSerializer(account).data, status=status.HTTP_201_CREATED)
 
 
@@ -197,6 +211,10 @@ class ManualIncomeCreateView(APIView):
 
 
 class BankAccountListCreateView(generics.ListCreateAPIView):
+    @cache_response("bank-accounts")
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
     def get_queryset(self):
         queryset = BankAccount.objects.all()
         is_active = self.request.query_params.get('is_active')
@@ -222,6 +240,7 @@ class BankAccountDetailView(generics.RetrieveUpdateAPIView):
 class LedgerEntryListView(generics.ListAPIView):
     serializer_class = LedgerEntrySerializer
     permission_classes = [IsAuthenticated, IsDirectorOrAccountant]
+    pagination_class = CreatedAtCursorPagination
 
     def get_queryset(self):
         month = self.request.query_params.get('month')  # YYYY-MM
@@ -229,8 +248,8 @@ class LedgerEntryListView(generics.ListAPIView):
         qs = LedgerEntry.objects.select_related('created_by', 'bank_account')
         if month:
             try:
-                start, end = _month_bounds(month)
-                qs = qs.filter(created_at__date__gte=start, created_at__date__lte=end)
+                start, end = month_datetime_range(month)
+                qs = qs.filter(created_at__gte=start, created_at__lt=end)
             except Exception:
                 pass
         if bank_account_id:
@@ -238,9 +257,15 @@ class LedgerEntryListView(generics.ListAPIView):
         return qs
 
 
+def _is_closed_month_request(view, request):
+    month = request.query_params.get('month')
+    return bool(month) and month < timezone.localdate().strftime('%Y-%m')
+
+
 class MonthlyReportView(APIView):
     permission_classes = [IsAuthenticated, IsDirectorOrAccountant]
 
+    @cache_response("monthly-report", condition=_is_closed_month_request)
     def get(self, request):
         month = request.query_params.get('month')
         bank_account_id = request.query_params.get('bank_account_id')
@@ -248,35 +273,23 @@ class MonthlyReportView(APIView):
             month = timezone.localdate().strftime('%Y-%m')
 
         try:
-            start, end = _month_bounds(month)
+            _month_bounds(month)
         except Exception:
             return Response({'error': 'Invalid month format. Use YYYY-MM.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        entries = LedgerEntry.objects.filter(created_at__date__gte=start, created_at__date__lte=end).select_related('bank_account', 'created_by')
+        summaries = MonthlyLedgerSummary.objects.filter(month=month)
         if bank_account_id:
-            entries = entries.filter(bank_account_id=bank_account_id)
-        total_income = entries.filter(amount_delta__gt=0).aggregate(total=Sum('amount_delta')).get('total') or Decimal('0')
-        total_expense_abs = entries.filter(amount_delta__lt=0).aggregate(total=Sum('amount_delta')).get('total') or Decimal('0')
-        total_expense = abs(total_expense_abs)
+            summaries = summaries.filter(bank_account_id=bank_account_id)
+        income_by_type = {}
+        total_expense = Decimal('0')
+        for row in summaries.values('entry_type').annotate(income=Sum('income_total'), expense=Sum('expense_total')):
+            income_by_type[row['entry_type']] = row['income'] or Decimal('0')
+            total_expense += row['expense'] or Decimal('0')
+        total_income = sum(income_by_type.values(), Decimal('0'))
         profit = total_income - total_expense
-        total_registration_fee = (
-            entries.filter(entry_type='REGISTRATION_FEE', amount_delta__gt=0)
-            .aggregate(total=Sum('amount_delta'))
-            .get('total')
-            or Decimal('0')
-        )
-        total_transport_fee = (
-            entries.filter(entry_type='TRANSPORT_FEE', amount_delta__gt=0)
-            .aggregate(total=Sum('amount_delta'))
-            .get('total')
-            or Decimal('0')
-        )
-        total_monthly_fee = (
-            entries.filter(entry_type='MONTHLY_FEE', amount_delta__gt=0)
-            .aggregate(total=Sum('amount_delta'))
-            .get('total')
-            or Decimal('0')
-        )
+        total_registration_fee = income_by_type.get('REGISTRATION_FEE', Decimal('0'))
+        total_transport_fee = income_by_type.get('TRANSPORT_FEE', Decimal('0'))
+        total_monthly_fee = income_by_type.get('MONTHLY_FEE', Decimal('0'))
         total_other_income = total_income - (
             total_registration_fee + total_transport_fee + total_monthly_fee
         )
@@ -291,7 +304,6 @@ class MonthlyReportView(APIView):
                 'total_transport_fee': total_transport_fee,
                 'total_monthly_fee': total_monthly_fee,
                 'total_other_income': total_other_income,
-                'entries': entries,
             }
         )
         return Response(serializer.data)
@@ -314,10 +326,10 @@ class InvoiceListView(generics.ListAPIView):
         user = self.request.user
 
         if user.role == 'PARENT':
-            return Invoice.objects.filter(parent=user)
+            return Invoice.objects.filter(parent=user).order_by('id')
 
         if user.role in ['DIRECTOR', 'ACCOUNTANT'] or user.is_superuser:
-            return Invoice.objects.all()
+            return Invoice.objects.order_by('id')
 
         return Invoice.objects.none()
 
@@ -353,10 +365,10 @@ class PaymentListView(generics.ListAPIView):
         user = self.request.user
 
         if user.role == 'PARENT':
-            return Payment.objects.filter(invoice__parent=user)
+            return Payment.objects.filter(invoice__parent=user).order_by('-paid_at', '-id')
 
         if user.role in ['DIRECTOR', 'ACCOUNTANT'] or user.is_superuser:
-            return Payment.objects.all()
+            return Payment.objects.order_by('-paid_at', '-id')
 
         return Payment.objects.none()
 
@@ -617,18 +629,17 @@ class PayrollListView(generics.ListAPIView):
 
     def get_queryset(self):
         user = self.request.user
+        payrolls = Payroll.objects.select_related(
+            'employee', 'employee__user', 'requested_by', 'reviewed_by'
+        ).order_by('-month', 'id')
 
         if user.role == 'ACCOUNTANT':
-            return Payroll.objects.select_related('employee', 'employee__user', 'requested_by', 'reviewed_by').all()
+            return payrolls
 
         if user.role == 'DIRECTOR' or user.is_superuser:
-            return Payroll.objects.select_related('employee', 'employee__user', 'requested_by', 'reviewed_by').filter(
-                status__in=['PAYMENT_REQUESTED', 'APPROVED', 'REJECTED', 'PAID']
-            )
+            return payrolls.filter(status__in=['PAYMENT_REQUESTED', 'APPROVED', 'REJECTED', 'PAID'])
 
-        return Payroll.objects.select_related('employee', 'employee__user', 'requested_by', 'reviewed_by').filter(
-            employee__user=user
-        )
+        return payrolls.filter(employee__user=user)
 
 
 class PayrollDetailView(generics.RetrieveAPIView):
@@ -653,71 +664,36 @@ class PayrollGenerateView(APIView):
         except Exception:
             return Response({'error': 'Invalid month format. Use YYYY-MM.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        employees = Employee.objects.all()
-        if employee_id:
-            employees = employees.filter(id=employee_id)
-
-        tax_rate = PayrollSetting.get_current().tax_rate_percent
-
-        generated = []
-        for employee in employees:
-            present_days = Attendance.objects.filter(
-                employee=employee,
-                status='PRESENT',
-                date__range=[start_date, end_date],
-            ).count()
-
-            bonus_total = Bonus.objects.filter(employee=employee, month=month).aggregate(total=Sum('amount')).get('total') or Decimal('0')
-            deduction_total = Deduction.objects.filter(employee=employee, month=month).aggregate(total=Sum('amount')).get('total') or Decimal('0')
-
-            base_salary = employee.salary
-            gross_salary = base_salary + overtime_amount + bonus_total - deduction_total
-            tax_amount = (gross_salary * tax_rate) / Decimal('100') if gross_salary > 0 else Decimal('0')
-            net_salary = gross_salary - tax_amount
-
-            payroll, _ = Payroll.objects.get_or_create(
-                employee=employee,
-                month=month,
-                defaults={
-                    'base_salary': base_salary,
-                    'total_present_days': present_days,
-                    'overtime_amount': overtime_amount,
-                    'total_bonus': bonus_total,
-                    'total_deductions': deduction_total,
-                    'gross_salary': gross_salary,
-                    'tax_rate_percent': tax_rate,
-                    'tax_amount': tax_amount,
-                    'net_salary': net_salary,
-                    'status': 'PENDING',
+        if wants_background(request):
+            job = enqueue_job(
+                'finance.generate_payroll',
+                {
+                    'month': month,
+                    'start_date': start_date.isoformat(),
+                    'end_date': end_date.isoformat(),
+                    'employee_id': employee_id,
+                    'overtime_amount': str(overtime_amount),
                 },
+                created_by=request.user,
             )
-
-            if payroll.status == 'PAID':
-                continue
-
-            payroll.base_salary = base_salary
-            payroll.total_present_days = present_days
-            payroll.overtime_amount = overtime_amount
-            payroll.total_bonus = bonus_total
-            payroll.total_deductions = deduction_total
-            payroll.gross_salary = gross_salary
-            payroll.tax_rate_percent = tax_rate
-            payroll.tax_amount = tax_amount
-            payroll.net_salary = net_salary
-
-            if payroll.status in ['REJECTED', 'PENDING']:
-                payroll.status = 'PENDING'
-                payroll.review_comment = ''
-                payroll.reviewed_by = None
-                payroll.reviewed_at = None
-            payroll.save()
-            generated.append(payroll.id)
-
+            return Response(job_accepted_payload(job, request), status=status.HTTP_202_ACCEPTED)
+
+        result = generate_payroll(
+            month=month,
+            start_date=start_date,
+            end_date=end_date,
+            employee_id=employee_id,
+            overtime_amount=overtime_amount,
+        )
         return Response(
             {
                 'message': 'Payroll generated successfully.',
                 'month': month,
-                'generated_payroll_ids': generated,
+                'generated_payroll_ids': result['generated_payroll_ids'],
+                'created': result['created'],
+                'updated': result['updated'],
+                'skipped_paid': result['skipped_paid'],
+                'timings_ms': result['timings_ms'],
             },
             status=status.HTTP_200_OK,
         )
@@ -795,6 +771,69 @@ class PayrollReviewView(APIView):
         return Response(PayrollSerializer(payroll).data, status=status.HTTP_200_OK)
 
 
+def _employee_label(employee):
+    return employee.user.full_name or employee.user.phone_number
+
+
+def _pay_payrolls(payrolls, bank_account, paid_by):
+    """
+    Mark approved ``payrolls`` paid, post their salaries in one ledger batch
+    and notify employees and directors with a single ``bulk_create``.
+
+    Only the payrolls this call moves from APPROVED to PAID are posted and
+    notified, and they are returned; anything paid concurrently is left out.
+    """
+    with transaction.atomic():
+        approved_ids = set(
+            Payroll.objects.select_for_update()
+            .filter(id__in=[payroll.id for payroll in payrolls], status='APPROVED')
+            .values_list('id', flat=True)
+        )
+        payrolls = [payroll for payroll in payrolls if payroll.id in approved_ids]
+        if not payrolls:
+            return []
+        Payroll.objects.filter(id__in=approved_ids).update(status='PAID')
+        record_account_transactions_bulk(
+            {
+                'bank_account': bank_account,
+                'amount_delta': -payroll.net_salary,
+                'entry_type': 'SALARY_PAYMENT',
+                'description': f'Salary paid for {_employee_label(payroll.employee)} ({payroll.month}).',
+                'created_by': paid_by,
+            }
+            for payroll in payrolls
+        )
+
+    notifications = [
+        DashboardNotification(
+            recipient_id=payroll.employee.user_id,
+            category='PAYROLL_PAID',
+            title='Monthly Salary Paid',
+            message=f'Your salary for {payroll.month} has been paid. Net amount: {payroll.net_salary}.',
+        )
+        for payroll in payrolls
+    ]
+    if len(payrolls) == 1:
+        summary = f'Paid: {_employee_label(payrolls[0].employee)} for {payrolls[0].month}.'
+    else:
+        total = sum((payroll.net_salary for payroll in payrolls), Decimal('0'))
+        summary = f'Paid {len(payrolls)} payrolls. Total net amount: {total}.'
+    director_ids = User.objects.filter(Q(role='DIRECTOR') | Q(is_superuser=True)).values_list('id', flat=True)
+    notifications.extend(
+        DashboardNotification(
+            recipient_id=director_id,
+            category='PAYROLL_PAID',
+            title='Employee Paid',
+            message=summary,
+        )
+        for director_id in director_ids
+    )
+    DashboardNotification.objects.bulk_create(notifications)
+    for payroll in payrolls:
+        payroll.status = 'PAID'
+    return payrolls
+
+
 class PayrollPayView(APIView):
     permission_classes = [IsAuthenticated, IsAccountant]
 
@@ -803,40 +842,61 @@ class PayrollPayView(APIView):
         if not bank_account:
             return Response({'error': 'Select a valid active bank account.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        payroll = Payroll.objects.filter(pk=pk).select_related('employee', 'employee__user').first()
-        if not payroll:
-            return Response({'error': 'Payroll not found.'}, status=status.HTTP_404_NOT_FOUND)
+        with transaction.atomic():
+            payroll = (
+                Payroll.objects.select_for_update()
+                .filter(pk=pk)
+                .select_related('employee', 'employee__user')
+                .first()
+            )
+            if not payroll:
+                return Response({'error': 'Payroll not found.'}, status=status.HTTP_404_NOT_FOUND)
 
-        if payroll.status != 'APPROVED':
-            return Response({'error': 'Payroll must be approved before payment.'}, status=status.HTTP_400_BAD_REQUEST)
+            if payroll.status == 'PAID':
+                return Response({'error': 'Payroll is already paid.'}, status=status.HTTP_409_CONFLICT)
+            if payroll.status != 'APPROVED':
+                return Response({'error': 'Payroll must be approved before payment.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        payroll.status = 'PAID'
-        payroll.save(update_fields=['status'])
+            if not _pay_payrolls([payroll], bank_account, request.user):
+                return Response({'error': 'Payroll is already paid.'}, status=status.HTTP_409_CONFLICT)
+        return Response(PayrollSerializer(payroll).data, status=status.HTTP_200_OK)
 
-        record_account_transaction(
-            bank_account=bank_account,
-            amount_delta=-payroll.net_salary,
-            entry_type='SALARY_PAYMENT',
-            description=f'Salary paid for {payroll.employee.user.full_name or payroll.employee.user.phone_number} ({payroll.month}).',
-            created_by=request.user,
-        )
 
-        _notify_users(
-            [payroll.employee.user],
-            'PAYROLL_PAID',
-            'Monthly Salary Paid',
-            f'Your salary for {payroll.month} has been paid. Net amount: {payroll.net_salary}.',
-        )
+class PayrollBulkPayView(APIView):
+    permission_classes = [IsAuthenticated, IsAccountant]
 
-        directors = User.objects.filter(role='DIRECTOR') | User.objects.filter(is_superuser=True)
-        _notify_users(
-            directors.distinct(),
-            'PAYROLL_PAID',
-            'Employee Paid',
-            f'Paid: {payroll.employee.user.full_name or payroll.employee.user.phone_number} for {payroll.month}.',
-        )
+    def post(self, request):
+        serializer = PayrollBulkPaySerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
 
-        return Response(PayrollSerializer(payroll).data, status=status.HTTP_200_OK)
+        bank_account = _get_active_bank_account(serializer.validated_data.get('bank_account_id'))
+        if not bank_account:
+            return Response({'error': 'Select a valid active bank account.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        requested_ids = set(serializer.validated_data['payroll_ids'])
+        with transaction.atomic():
+            payrolls = list(
+                Payroll.objects.select_for_update()
+                .filter(id__in=requested_ids, status='APPROVED')
+                .select_related('employee', 'employee__user')
+                .order_by('id')
+            )
+            if not payrolls:
+                return Response({'error': 'No approved payrolls found.'}, status=status.HTTP_400_BAD_REQUEST)
+            payrolls = _pay_payrolls(payrolls, bank_account, request.user)
+            if not payrolls:
+                return Response({'error': 'The payrolls were already paid.'}, status=status.HTTP_409_CONFLICT)
+
+        paid_ids = [payroll.id for payroll in payrolls]
+        return Response(
+            {
+                'message': 'Payrolls paid successfully.',
+                'paid_payroll_ids': paid_ids,
+                'skipped_payroll_ids': sorted(requested_ids - set(paid_ids)),
+                'total_net_paid': sum((payroll.net_salary for payroll in payrolls), Decimal('0')),
+            },
+            status=status.HTTP_200_OK,
+        )
 
 
 # -------------------------------
@@ -899,6 +959,7 @@ class EmployeeSalaryUpdateView(APIView):
 class DriverStudentListView(generics.ListAPIView):
     serializer_class = DriverStudentDetailSerializer
     permission_classes = [IsAuthenticated, IsDriver]
+    pagination_class = None  # bounded by the bus capacity
 
     def get_queryset(self):
         if not hasattr(self.request.user, 'driver_profile'):
@@ -928,14 +989,8 @@ class AnnouncementCreateView(generics.CreateAPIView):
     permission_classes = [IsAuthenticated, IsDirectorOrSuperuser]
 
     def perform_create(self, serializer):
-        announcement = serializer.save(created_by=self.request.user)
-        recipients = _announcement_recipients(announcement.audience)
-        _notify_users(
-            recipients,
-            'ANNOUNCEMENT',
-            announcement.title,
-            announcement.message,
-        )
+        # Copied to the recipients' dashboards by the finance.fan_out_announcement job.
+        serializer.save(created_by=self.request.user, category='ANNOUNCEMENT')
 
 
 class DriverDelayAnnouncementView(APIView):
@@ -958,14 +1013,12 @@ class DriverDelayAnnouncementView(APIView):
 
         Announcement.objects.create(
             created_by=request.user,
-            audience='ALL',
+            audience='PARENTS_AND_OFFICE',
+            category='DRIVER_DELAY',
             reason=reason,
             title=title,
             message=text,
         )
-
-        recipients = User.objects.filter(role__in=['PARENT', 'DIRECTOR', 'ACCOUNTANT']).distinct()
-        _notify_users(recipients, 'DRIVER_DELAY', title, text)
         return Response({'message': 'Delay alert sent successfully.'}, status=status.HTTP_201_CREATED)
 
 
@@ -975,6 +1028,7 @@ class DriverDelayAnnouncementView(APIView):
 class DashboardNotificationListView(generics.ListAPIView):
     serializer_class = DashboardNotificationSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = CreatedAtCursorPagination
 
     def get_queryset(self):
         return DashboardNotification.objects.filter(recipient=self.request.user, is_hidden=False)
@@ -0,0 +1,10 @@
+from django.contrib import admin
+
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("id", "name", "status", "attempts", "max_attempts", "run_after", "created_by", "created_at", "finished_at")
+    list_filter = ("status", "name")
+    search_fields = ("name", "error")
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from jobs.services import run_pending_jobs
+
+
+class Command(BaseCommand):
+    help = "Runs queued background jobs. Polls the queue until stopped unless --once is given."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Drain the due jobs and exit.")
+        parser.add_argument("--sleep", type=float, default=5.0, help="Seconds to wait when the queue is empty.")
+        parser.add_argument("--max-jobs", type=int, default=None)
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            remaining = None if options["max_jobs"] is None else options["max_jobs"] - total
+            for job in run_pending_jobs(max_jobs=remaining):
+                total += 1
+                self.stdout.write(f"{job.name} #{job.pk}: {job.status} (attempt {job.attempts}/{job.max_attempts})")
+            if options["once"] or (remaining is not None and total >= options["max_jobs"]):
+                break
+            time.sleep(options["sleep"])
+        self.stdout.write(self.style.SUCCESS(f"Done. Ran {total} jobs."))
@@ -0,0 +1,18 @@
+JOB_HANDLERS = {}
+
+
+def job_handler(name):
+    """Register ``func`` as the handler run by the worker for jobs named ``name``."""
+
+    def decorator(func):
+        JOB_HANDLERS[name] = func
+        return func
+
+    return decorator
+
+
+def get_handler(name):
+    try:
+        return JOB_HANDLERS[name]
+    except KeyError:
+        raise ValueError(f"No job handler registered for '{name}'.")
@@ -0,0 +1,27 @@
+from rest_framework import serializers
+
+from .models import Job
+
+
+class JobSerializer(serializers.ModelSerializer):
+    created_by_name = serializers.CharField(source="created_by.full_name", read_only=True, default=None)
+
+    class Meta:
+        model = Job
+        fields = [
+            "id",
+            "name",
+            "payload",
+            "status",
+            "attempts",
+            "max_attempts",
+            "result",
+            "error",
+            "run_after",
+            "created_by",
+            "created_by_name",
+            "created_at",
+            "updated_at",
+            "finished_at",
+        ]
+        read_only_fields = fields
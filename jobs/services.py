@@ -0,0 +1,96 @@
+import traceback
+from datetime import timedelta
+
+from django.db.models import Q
+from django.urls import reverse
+from django.utils import timezone
+
+from kgsystems.cache import request_memo
+
+from .models import Job
+from .registry import get_handler
+
+RETRY_BASE_DELAY = timedelta(seconds=30)
+# A RUNNING job older than this is assumed to belong to a dead worker.
+STALE_LOCK_AFTER = timedelta(minutes=30)
+TRUE_VALUES = {True, "true", "True", "1", 1}
+
+
+def enqueue_job(name, payload=None, *, created_by=None, max_attempts=3):
+    get_handler(name)
+    return Job.objects.create(
+        name=name,
+        payload=payload or {},
+        created_by=created_by,
+        max_attempts=max_attempts,
+    )
+
+
+def wants_background(request):
+    return (
+        request.query_params.get("background") in TRUE_VALUES
+        or request.data.get("background") in TRUE_VALUES
+    )
+
+
+def job_accepted_payload(job, request=None):
+    status_url = reverse("job-detail", kwargs={"pk": job.pk})
+    if request is not None:
+        status_url = request.build_absolute_uri(status_url)
+    return {"message": "Job queued.", "job_id": job.pk, "status": job.status, "status_url": status_url}
+
+
+def claim_next_job():
+    """
+    Atomically move the next due job to RUNNING and return it.
+
+    The claim is a conditional UPDATE on the job's previous status, so two
+    workers racing for the same row cannot both win. Returns ``None`` when
+    nothing is due.
+    """
+    now = timezone.now()
+    due = Q(status="QUEUED", run_after__lte=now) | Q(status="RUNNING", locked_at__lt=now - STALE_LOCK_AFTER)
+    for job_id, status, locked_at in Job.objects.filter(due).order_by("run_after", "id").values_list(
+        "id", "status", "locked_at"
+    )[:10]:
+        claimed = Job.objects.filter(id=job_id, status=status, locked_at=locked_at).update(
+            status="RUNNING",
+            locked_at=now,
+            updated_at=now,
+        )
+        if claimed:
+            return Job.objects.get(id=job_id)
+    return None
+
+
+def run_job(job):
+    job.attempts += 1
+    try:
+        with request_memo():
+            job.result = get_handler(job.name)(**job.payload)
+    except Exception:
+        job.error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            job.status = "QUEUED"
+            job.run_after = timezone.now() + RETRY_BASE_DELAY * (2 ** (job.attempts - 1))
+        else:
+            job.status = "FAILED"
+            job.finished_at = timezone.now()
+    else:
+        job.status = "SUCCEEDED"
+        job.error = ""
+        job.finished_at = timezone.now()
+    job.locked_at = None
+    job.save(update_fields=["attempts", "result", "error", "status", "run_after", "locked_at", "finished_at", "updated_at"])
+    return job
+
+
+def run_pending_jobs(max_jobs=None):
+    """Run due jobs until none are left (or ``max_jobs`` ran). Returns the jobs run."""
+    processed = []
+    while max_jobs is None or len(processed) < max_jobs:
+        job = claim_next_job()
+        if job is None:
+            break
+        processed.append(run_job(job))
+    return processed
@@ -0,0 +1,101 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from accounts.models import User
+from jobs.models import Job
+from jobs.registry import JOB_HANDLERS, job_handler
+from jobs.services import claim_next_job, enqueue_job, run_pending_jobs
+from students.models import Invoice, Student
+
+
+class JobQueueTests(APITestCase):
+    def setUp(self):
+        self.accountant = User.objects.create_user(
+            phone_number="0911000050",
+            password="pass1234",
+            role="ACCOUNTANT",
+            full_name="Accountant Jobs",
+        )
+        self.other_accountant = User.objects.create_user(
+            phone_number="0911000051",
+            password="pass1234",
+            role="ACCOUNTANT",
+            full_name="Accountant Other",
+        )
+        parent = User.objects.create_user(
+            phone_number="0911000052",
+            password="pass1234",
+            role="PARENT",
+            full_name="Parent Jobs",
+        )
+        Student.objects.create(
+            first_name="Queued",
+            last_name="Student",
+            dob="2019-01-01",
+            gender="M",
+            category="KG",
+            grade_level="KG1",
+            class_name="KG1A",
+            parent=parent,
+        )
+        self.client.force_authenticate(self.accountant)
+
+    def test_background_invoice_generation_is_queued_and_run_by_worker(self):
+        response = self.client.post(
+            reverse("fees-generate-current") + "?background=true", {"due_day": 5}, format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(Invoice.objects.count(), 0)
+        job = Job.objects.get(pk=response.data["job_id"])
+        self.assertEqual(job.name, "students.generate_monthly_invoices")
+        self.assertEqual(job.created_by, self.accountant)
+
+        out = StringIO()
+        call_command("run_jobs", "--once", stdout=out)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, "SUCCEEDED")
+        self.assertEqual(job.result["created"], 1)
+        self.assertEqual(Invoice.objects.count(), 1)
+        self.assertIn("Done. Ran 1 jobs.", out.getvalue())
+
+        detail = self.client.get(reverse("job-detail", kwargs={"pk": job.pk}))
+        self.assertEqual(detail.status_code, status.HTTP_200_OK)
+        self.assertEqual(detail.data["status"], "SUCCEEDED")
+
+        self.client.force_authenticate(self.other_accountant)
+        hidden = self.client.get(reverse("job-detail", kwargs={"pk": job.pk}))
+        self.assertEqual(hidden.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_failing_job_is_retried_then_marked_failed(self):
+        calls = []
+
+        @job_handler("tests.always_fails")
+        def always_fails():
+            calls.append(1)
+            raise RuntimeError("boom")
+
+        self.addCleanup(JOB_HANDLERS.pop, "tests.always_fails")
+        job = enqueue_job("tests.always_fails", max_attempts=2)
+
+        run_pending_jobs()
+        job.refresh_from_db()
+        self.assertEqual(job.status, "QUEUED")
+        self.assertEqual(job.attempts, 1)
+        self.assertGreater(job.run_after, timezone.now())
+        self.assertIsNone(claim_next_job())
+
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now() - timedelta(seconds=1))
+        run_pending_jobs()
+        job.refresh_from_db()
+        self.assertEqual(job.status, "FAILED")
+        self.assertEqual(job.attempts, 2)
+        self.assertIn("RuntimeError: boom", job.error)
+        self.assertEqual(len(calls), 2)
@@ -0,0 +1,34 @@
+from rest_framework import generics
+from rest_framework.permissions import IsAuthenticated
+
+from kgsystems.pagination import CreatedAtCursorPagination
+
+from .models import Job
+from .serializers import JobSerializer
+
+
+class JobQuerysetMixin:
+    def get_queryset(self):
+        user = self.request.user
+        queryset = Job.objects.select_related("created_by")
+        if user.is_superuser or user.role == "DIRECTOR":
+            return queryset
+        return queryset.filter(created_by=user)
+
+
+class JobListView(JobQuerysetMixin, generics.ListAPIView):
+    serializer_class = JobSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = CreatedAtCursorPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        status_filter = self.request.query_params.get("status")
+        if status_filter:
+            queryset = queryset.filter(status=status_filter.upper())
+        return queryset
+
+
+class JobDetailView(JobQuerysetMixin, generics.RetrieveAPIView):
+    serializer_class = JobSerializer
+    permission_classes = [IsAuthenticated]
@@ -0,0 +1,167 @@
+import hashlib
+import json
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.core.cache import cache
+from django.core.signals import request_finished, request_started
+from django.db import transaction
+from django.dispatch import receiver
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+DEFAULT_CACHE_TIMEOUT = 60 * 60
+RESPONSE_CACHE_TIMEOUT = 5 * 60
+
+# Per-request (or per-job) memo, so repeated reads inside one unit of work do
+# not even reach the shared cache. ``None`` outside a request or job.
+_request_memo = ContextVar("kgsystems_request_memo", default=None)
+
+
+def singleton_cache_key(model):
+    return f"singleton:{model._meta.label_lower}"
+
+
+def get_cached(key, loader, timeout=DEFAULT_CACHE_TIMEOUT):
+    """
+    Return the value cached under ``key``, computing it with ``loader`` on a miss.
+
+    Reads go to the request memo first, then to the shared cache. A freshly
+    loaded value is only written to the shared cache once the surrounding
+    transaction commits, so rolled-back rows never leak to other processes.
+    """
+    memo = _request_memo.get()
+    if memo is not None and key in memo:
+        return memo[key]
+
+    value = cache.get(key)
+    if value is None:
+        value = loader()
+        if value is not None:
+            transaction.on_commit(lambda: cache.set(key, value, timeout))
+    if memo is not None:
+        memo[key] = value
+    return value
+
+
+def memoized(key, loader):
+    """Like ``get_cached`` but only memoized for the current request or job."""
+    memo = _request_memo.get()
+    if memo is None:
+        return loader()
+    if key not in memo:
+        memo[key] = loader()
+    return memo[key]
+
+
+def invalidate(*keys):
+    """Drop ``keys`` now and again once the current transaction commits."""
+    memo = _request_memo.get()
+    for key in keys:
+        if memo is not None:
+            memo.pop(key, None)
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def get_cached_singleton(model, loader):
+    """Return the singleton row of ``model`` through ``get_cached``."""
+    return get_cached(singleton_cache_key(model), loader)
+
+
+def invalidate_singleton(model):
+    invalidate(singleton_cache_key(model))
+
+
+def invalidate_singleton_on_save(sender, **kwargs):
+    """``post_save``/``post_delete`` receiver for models read through ``get_cached_singleton``."""
+    invalidate_singleton(sender)
+
+
+def namespace_version(namespace):
+    """
+    Current version of a response-cache namespace.
+
+    A missing version starts from the clock rather than 1, so responses cached
+    under an evicted version can never be served again.
+    """
+    key = f"namespace:{namespace}"
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_namespaces(*namespaces):
+    """Invalidate every response cached under ``namespaces``, now and on commit."""
+
+    def bump():
+        for namespace in namespaces:
+            try:
+                cache.incr(f"namespace:{namespace}")
+            except ValueError:
+                # No version yet, so nothing is cached under this namespace.
+                pass
+
+    bump()
+    transaction.on_commit(bump)
+
+
+def cache_response(*namespaces, timeout=RESPONSE_CACHE_TIMEOUT, per_user=False, condition=None):
+    """
+    Cache the data of a view's successful GET responses.
+
+    Keys combine the view, the versions of ``namespaces``, the caller's role
+    (or id with ``per_user``) and the full path, so bumping a namespace drops
+    every cached variant at once. ``condition(view, request)`` can veto
+    caching. Authentication and permissions still run on every hit because the
+    decorated method is only called after ``APIView.initial``.
+    """
+
+    def decorator(method):
+        @wraps(method)
+        def wrapper(view, request, *args, **kwargs):
+            if condition is not None and not condition(view, request):
+                return method(view, request, *args, **kwargs)
+
+            user = request.user
+            scope = f"user:{user.pk}" if per_user else f"role:{'SUPERUSER' if user.is_superuser else user.role}"
+            versions = ".".join(str(namespace_version(namespace)) for namespace in namespaces)
+            path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+            key = f"response:{type(view).__name__}:{versions}:{scope}:{path}"
+
+            data = cache.get(key)
+            if data is not None:
+                return Response(data)
+
+            response = method(view, request, *args, **kwargs)
+            if response.status_code == 200:
+                data = json.loads(JSONRenderer().render(response.data))
+                transaction.on_commit(lambda: cache.set(key, data, timeout))
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+@contextmanager
+def request_memo():
+    token = _request_memo.set({})
+    try:
+        yield
+    finally:
+        _request_memo.reset(token)
+
+
+@receiver(request_started, dispatch_uid="kgsystems_cache_request_started")
+def _start_request_memo(sender, **kwargs):
+    _request_memo.set({})
+
+
+@receiver(request_finished, dispatch_uid="kgsystems_cache_request_finished")
+def _end_request_memo(sender, **kwargs):
+    _request_memo.set(None)
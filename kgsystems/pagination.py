@@ -0,0 +1,22 @@
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class StandardResultsPagination(PageNumberPagination):
+    """Default page-number pagination for every list endpoint."""
+
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    """Cursor pagination for append-only tables ordered by ``created_at``."""
+
+    ordering = ("-created_at", "-id")
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
+
+
+class AttendanceCursorPagination(CreatedAtCursorPagination):
+    ordering = ("-date", "-id")
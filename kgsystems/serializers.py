@@ -0,0 +1,21 @@
+class SparseFieldsetMixin:
+    """
+    Limit the serialized fields with ``?fields=id,name`` on list/detail GETs.
+
+    Only the view's own serializer is trimmed; nested serializers and other
+    serializers sharing the context keep all their fields. Unknown names are
+    ignored.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get("request")
+        view = self.context.get("view")
+        if request is None or view is None or request.method != "GET":
+            return
+        requested = request.query_params.get("fields")
+        if not requested or not isinstance(self, view.get_serializer_class()):
+            return
+        wanted = {name.strip() for name in requested.split(",") if name.strip()}
+        for name in set(self.fields) - wanted:
+            self.fields.pop(name)
@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
+import sys
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -50,6 +52,7 @@ INSTALLED_APPS = [
     'finance',
     'channels',
     'chat',
+    'jobs',
     'rest_framework',
     'rest_framework_simplejwt',
 ]
@@ -152,6 +155,7 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    'DEFAULT_PAGINATION_CLASS': 'kgsystems.pagination.StandardResultsPagination',
 }
 
 SIMPLE_JWT = {
@@ -167,3 +171,26 @@ CHANNEL_LAYERS = {
         },
     },
 }
+
+# Shared cache for settings lookups and cached API responses. Invalidation
+# only works if every web and job worker shares it, so it defaults to the Redis
+# server the channel layer already needs. Tests use a local-memory cache;
+# CACHE_BACKEND=locmem opts out too, for single-process development only: an
+# invalidation then never reaches other processes, which serve stale data
+# until the entry expires.
+REDIS_URL = os.environ.get("REDIS_URL", "redis://127.0.0.1:6379/1")
+if sys.argv[1:2] == ["test"] or os.environ.get("CACHE_BACKEND") == "locmem":
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "kgsystems",
+        },
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+            "KEY_PREFIX": "kgsystems",
+        },
+    }
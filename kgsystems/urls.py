@@ -25,6 +25,7 @@ urlpatterns = [
     # Students
     path('api/students/', include('students.urls')),
     path('api/chat/', include('chat.urls')),
+    path('api/jobs/', include('jobs.urls')),
     path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
 
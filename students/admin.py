@@ -6,6 +6,7 @@ from .models import (
     ParentNotification,
     Payment,
     PenaltySetting,
+    SectionOccupancy,
     Student,
     StudentCertificate,
     StudentFeeSetting,
@@ -73,3 +74,9 @@ class ParentNotificationAdmin(admin.ModelAdmin):
     list_display = ('parent', 'student', 'notification_type', 'sent_at')
     list_filter = ('notification_type',)
     search_fields = ('parent__full_name', 'parent__phone_number', 'student__first_name', 'student__last_name')
+
+
+@admin.register(SectionOccupancy)
+class SectionOccupancyAdmin(admin.ModelAdmin):
+    list_display = ('grade_level', 'class_name', 'student_count', 'updated_at')
+    list_filter = ('grade_level',)
@@ -0,0 +1,178 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from accounts.models import User
+from chat.models import Message
+from employees.models import Attendance
+from finance.models import BankAccount, Bonus, DashboardNotification, LedgerEntry, Payroll, SchoolAccount
+from finance.services import month_datetime_range
+from students.models import Invoice, ParentNotification, Student
+
+# Only the composite indexes added for these queries (the ParentNotification
+# (invoice, type) one has since become a unique constraint); the indexes the
+# models already had stay in place for the "without" run.
+HOT_QUERY_INDEXES = [
+    "student_grade_class_idx",
+    "student_active_grade_idx",
+    "invoice_month_paid_idx",
+    "invoice_paid_due_idx",
+    "parent_notif_parent_sent_idx",
+    "ledger_created_idx",
+    "ledger_bank_created_idx",
+    "ledger_type_created_idx",
+    "dash_notif_recipient_idx",
+    "payroll_month_status_idx",
+    "bonus_month_employee_idx",
+    "deduction_month_employee_idx",
+    "attendance_emp_status_date_idx",
+    "attendance_date_idx",
+    "message_room_created_idx",
+    "message_room_read_idx",
+]
+MONTHS = 20
+
+
+def _hot_queries(month):
+    start, end = month_datetime_range(month)
+    today = timezone.localdate()
+    return [
+        ("invoices unpaid in month", Invoice.objects.filter(month=month, is_paid=False)),
+        ("overdue unpaid invoices", Invoice.objects.filter(is_paid=False, due_date__lt=today)),
+        ("students in a section", Student.objects.filter(active=True, grade_level="KG1", class_name="KG1A")),
+        (
+            "reminder already sent",
+            ParentNotification.objects.filter(invoice_id=1, notification_type="REMINDER"),
+        ),
+        (
+            "ledger entries in month",
+            LedgerEntry.objects.filter(created_at__gte=start, created_at__lt=end).order_by("-created_at", "-id")[:50],
+        ),
+        (
+            "ledger entries per bank account",
+            LedgerEntry.objects.filter(bank_account_id=1).order_by("-created_at")[:50],
+        ),
+        (
+            "dashboard notifications",
+            DashboardNotification.objects.filter(recipient_id=1, is_hidden=False).order_by("-created_at")[:50],
+        ),
+        ("payroll of employee", Payroll.objects.filter(employee_id=1, month=month)),
+        ("bonuses in month", Bonus.objects.filter(month=month, employee_id__in=[1, 2, 3])),
+        (
+            "present days",
+            Attendance.objects.filter(employee_id=1, status="PRESENT", date__range=[start.date(), end.date()]),
+        ),
+        ("chat history", Message.objects.filter(room_id=1).order_by("-created_at", "-id")[:50]),
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        "Creates a scratch test database, seeds a throwaway invoice and ledger dataset, prints "
+        "the query plans of the hottest filters with and without the composite indexes, then "
+        "destroys the scratch database. The configured database is never touched."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--invoices", type=int, default=50000)
+
+    def handle(self, *args, **options):
+        # The run drops indexes, so it only ever sees a freshly migrated test
+        # database; the connection points back at the real one afterwards.
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            with transaction.atomic():
+                month = self._seed(max(MONTHS, options["invoices"]))
+                self.stdout.write(self.style.MIGRATE_HEADING("With indexes"))
+                self._explain(month, "with indexes")
+                self._drop_indexes()
+                self.stdout.write(self.style.MIGRATE_HEADING("Without indexes"))
+                self._explain(month, "without indexes")
+                transaction.set_rollback(True)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+        self.stdout.write(self.style.SUCCESS("Done. The scratch database was destroyed."))
+
+    def _seed(self, invoice_count):
+        parent = User.objects.create_user(
+            phone_number="0999999999",
+            password=None,
+            role="PARENT",
+            full_name="Benchmark Parent",
+        )
+        students = Student.objects.bulk_create(
+            [
+                Student(
+                    first_name=f"Bench{index}",
+                    last_name="Student",
+                    dob="2019-01-01",
+                    gender="M",
+                    category="KG",
+                    grade_level="KG1",
+                    class_name=f"KG1{chr(65 + index % 10)}",
+                    parent=parent,
+                )
+                for index in range(invoice_count // MONTHS)
+            ],
+            batch_size=1000,
+        )
+        first_month = date(2024, 1, 1)
+        months = []
+        for offset in range(MONTHS):
+            months.append((first_month + timedelta(days=31 * offset)).replace(day=1))
+        Invoice.objects.bulk_create(
+            [
+                Invoice(
+                    student=student,
+                    month=month.strftime("%Y-%m"),
+                    amount=Decimal("1000.00"),
+                    due_date=month.replace(day=5),
+                    is_paid=index % 3 != 0,
+                )
+                for index, student in enumerate(students)
+                for month in months
+            ],
+            batch_size=1000,
+        )
+        bank_account = BankAccount.objects.create(
+            bank_name="Benchmark Bank",
+            account_name="Benchmark",
+            account_holder_name="Benchmark",
+            account_number="BENCH-001",
+        )
+        account = SchoolAccount.get_current()
+        LedgerEntry.objects.bulk_create(
+            [
+                LedgerEntry(
+                    account=account,
+                    bank_account=bank_account,
+                    entry_type="MONTHLY_FEE",
+                    amount_delta=Decimal("1000.00"),
+                )
+                for _ in range(invoice_count)
+            ],
+            batch_size=1000,
+        )
+        self.stdout.write(f"Seeded {len(students) * MONTHS} invoices and {invoice_count} ledger entries.")
+        return months[-1].strftime("%Y-%m")
+
+    def _explain(self, month, phase):
+        # The phase comment keeps the two runs from sharing a cached statement
+        # (and therefore a cached plan) on SQLite.
+        prefix = connection.ops.explain_query_prefix()
+        with connection.cursor() as cursor:
+            for label, queryset in _hot_queries(month):
+                sql, params = queryset.query.sql_with_params()
+                cursor.execute(f"{prefix} {sql} /* {phase} */", params)
+                self.stdout.write(f"-- {label}")
+                for row in cursor.fetchall():
+                    self.stdout.write(" ".join(str(column) for column in row))
+
+    def _drop_indexes(self):
+        with connection.cursor() as cursor:
+            for name in HOT_QUERY_INDEXES:
+                cursor.execute(f"DROP INDEX {connection.ops.quote_name(name)}")
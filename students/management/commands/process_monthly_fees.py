@@ -1,92 +1,172 @@
-from datetime import timedelta
-from decimal import Decimal
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
 
-from django.core.management.base import BaseCommand
-from django.db.models import Sum
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.db.models import Max, Min
 from django.utils import timezone
 
-from students.models import Invoice, ParentNotification, PenaltySetting, Student
+from students.models import Invoice, PenaltySetting, Student
+from students.services import (
+    generate_monthly_invoices,
+    recalculate_penalties,
+    reconcile_paid_invoices,
+    send_due_reminders,
+)
+
+# (phase, label, key of the row count in the service result)
+PHASES = [
+    ("invoices", "Invoices created", "created"),
+    ("penalties", "Penalties updated", "updated"),
+    ("reconcile", "Invoices marked paid", "updated"),
+    ("reminders", "Reminders created", "reminders_created"),
+]
 
 
 def month_key(date_obj):
     return date_obj.strftime("%Y-%m")
 
 
+def _id_ranges(queryset, chunk_size):
+    """Split ``queryset`` into ``[start, stop)`` id ranges of ``chunk_size`` ids."""
+    if not chunk_size:
+        return [None]
+    bounds = queryset.aggregate(first=Min("id"), last=Max("id"))
+    if bounds["first"] is None:
+        return []
+    return [
+        (start, min(start + chunk_size, bounds["last"] + 1))
+        for start in range(bounds["first"], bounds["last"] + 1, chunk_size)
+    ]
+
+
+def _phase_queryset(phase):
+    if phase == "invoices":
+        return Student.objects.filter(active=True)
+    return Invoice.objects.filter(is_paid=False)
+
+
+def _phase_due(phase, params):
+    # Penalties are applied once a day; a rate change re-applies them through a
+    # forced job. The gate is checked here, once, because every chunk stamps
+    # the day and later chunks must still run.
+    if phase == "penalties":
+        return PenaltySetting.get_current().penalties_applied_on != params["today"]
+    return True
+
+
+def _run_chunk(phase, id_range, params):
+    if phase == "invoices":
+        return generate_monthly_invoices(
+            month=params["month"], due_date=params["due_date"], student_id_range=id_range
+        )
+    if phase == "penalties":
+        return recalculate_penalties(today=params["today"], force=True, invoice_id_range=id_range)
+    if phase == "reconcile":
+        return reconcile_paid_invoices(today=params["today"], invoice_id_range=id_range)
+    return send_due_reminders(
+        today=params["today"],
+        days_before=params["reminder_days"],
+        window_days=params["reminder_window"],
+        invoice_id_range=id_range,
+    )
+
+
+def _init_worker():
+    # Needed when the pool spawns fresh interpreters instead of forking.
+    django.setup()
+
+
 class Command(BaseCommand):
     help = (
         "Generates current-month invoices for active students, applies overdue penalties, "
-        "and sends reminders 3 days before due date."
+        "reconciles fully paid invoices and sends reminders ahead of the due date."
     )
 
     def add_arguments(self, parser):
         parser.add_argument("--due-day", type=int, default=5)
+        parser.add_argument("--reminder-days", type=int, default=3, help="Remind this many days before the due date.")
+        parser.add_argument(
+            "--reminder-window",
+            type=int,
+            default=1,
+            help="Also cover invoices due up to this many days earlier, to catch up on skipped runs.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Process chunks in a pool of this many processes. Use with a server database, not SQLite.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=0,
+            help="Partition each phase into id ranges of this size (0 processes each phase in one go).",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Run every phase in one transaction, report the counts and roll back.",
+        )
 
     def handle(self, *args, **options):
+        if options["workers"] < 1 or options["chunk_size"] < 0:
+            raise CommandError("--workers must be >= 1 and --chunk-size must be >= 0.")
+
         today = timezone.localdate()
         due_day = max(1, min(int(options["due_day"]), 28))
-        due_date = today.replace(day=due_day)
-        current_month = month_key(today)
-
-        created_invoices = 0
-        for student in Student.objects.filter(active=True):
-            _, created = Invoice.objects.get_or_create(
-                student=student,
-                month=current_month,
-                defaults={
-                    "amount": student.monthly_tuition_fee,
-                    "due_date": due_date,
-                },
-            )
-            if created:
-                created_invoices += 1
-
-        penalty_setting = PenaltySetting.get_current()
-        updated_penalties = 0
-        unpaid_invoices = Invoice.objects.filter(is_paid=False)
-        for invoice in unpaid_invoices:
-            if invoice.due_date >= today:
-                continue
-            overdue_days = (today - invoice.due_date).days
-            expected_penalty = Decimal(overdue_days) * penalty_setting.penalty_per_day
-            if invoice.penalty_amount != expected_penalty:
-                invoice.penalty_amount = expected_penalty
-                invoice.save(update_fields=["penalty_amount"])
-                updated_penalties += 1
-
-            total_paid = invoice.payments.aggregate(total=Sum("amount")).get("total") or Decimal("0")
-            if total_paid >= invoice.total_amount_due:
-                invoice.is_paid = True
-                invoice.save(update_fields=["is_paid"])
-
-        reminders_created = 0
-        target_due = today + timedelta(days=3)
-        due_soon_invoices = Invoice.objects.filter(is_paid=False, due_date=target_due).select_related(
-            "student", "student__parent"
-        )
-        for invoice in due_soon_invoices:
-            exists = ParentNotification.objects.filter(
-                parent=invoice.student.parent,
-                invoice=invoice,
-                notification_type="REMINDER",
-            ).exists()
-            if exists:
-                continue
-            ParentNotification.objects.create(
-                parent=invoice.student.parent,
-                student=invoice.student,
-                invoice=invoice,
-                notification_type="REMINDER",
-                title="Tuition Reminder",
-                message=(
-                    f"Reminder: Tuition for {invoice.student} ({invoice.month}) is due on "
-                    f"{invoice.due_date}."
-                ),
-            )
-            reminders_created += 1
+        params = {
+            "today": today,
+            "month": month_key(today),
+            "due_date": today.replace(day=due_day),
+            "reminder_days": options["reminder_days"],
+            "reminder_window": options["reminder_window"],
+        }
 
+        workers = options["workers"]
+        if options["dry_run"] and workers > 1:
+            self.stdout.write("Dry run: ignoring --workers so all phases share one rolled-back transaction.")
+            workers = 1
+
+        if options["dry_run"]:
+            with transaction.atomic():
+                counts = self._run_phases(params, options["chunk_size"], workers)
+                transaction.set_rollback(True)
+        else:
+            counts = self._run_phases(params, options["chunk_size"], workers)
+
+        prefix = "Dry run, rolled back. Would have" if options["dry_run"] else "Done."
         self.stdout.write(
             self.style.SUCCESS(
-                f"Done. Created invoices: {created_invoices}, "
-                f"updated penalties: {updated_penalties}, reminders: {reminders_created}"
+                f"{prefix} Created invoices: {counts['invoices']}, "
+                f"updated penalties: {counts['penalties']}, marked paid: {counts['reconcile']}, "
+                f"reminders: {counts['reminders']}"
             )
         )
+
+    def _run_phases(self, params, chunk_size, workers):
+        pool = None
+        if workers > 1:
+            # Forked workers must open their own database connections.
+            connections.close_all()
+            pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+        counts = {}
+        try:
+            for phase, label, count_key in PHASES:
+                started = perf_counter()
+                id_ranges = _id_ranges(_phase_queryset(phase), chunk_size) if _phase_due(phase, params) else []
+                if pool is None:
+                    results = [_run_chunk(phase, id_range, params) for id_range in id_ranges]
+                else:
+                    results = list(
+                        pool.map(_run_chunk, [phase] * len(id_ranges), id_ranges, [params] * len(id_ranges))
+                    )
+                counts[phase] = sum(result[count_key] for result in results)
+                elapsed_ms = round((perf_counter() - started) * 1000, 2)
+                self.stdout.write(f"{label}: {counts[phase]} in {len(id_ranges)} chunk(s) ({elapsed_ms} ms)")
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        return counts
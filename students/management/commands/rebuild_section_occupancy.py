@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from students.services import rebuild_section_occupancy
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the per-section student counters from the student table."
+
+    def handle(self, *args, **options):
+        written = rebuild_section_occupancy()
+        self.stdout.write(self.style.SUCCESS(f"Done. Section rows written: {written}"))
@@ -0,0 +1,45 @@
+# Generated by Django 4.2.30 on 2026-10-18 03:37
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def merge_duplicate_invoices(apps, schema_editor):
+    """
+    Fold duplicate ``(student, month)`` invoices into one before the unique
+    constraint is added. The kept invoice is a paid one if any, else the
+    oldest; payments and notifications of the others are moved onto it.
+    """
+    Invoice = apps.get_model("students", "Invoice")
+    Payment = apps.get_model("students", "Payment")
+    ParentNotification = apps.get_model("students", "ParentNotification")
+    duplicates = (
+        Invoice.objects.values("student_id", "month")
+        .annotate(total=Count("id"))
+        .filter(total__gt=1)
+        .order_by()
+    )
+    for row in duplicates:
+        invoices = list(
+            Invoice.objects.filter(student_id=row["student_id"], month=row["month"]).order_by("-is_paid", "id")
+        )
+        kept, extra = invoices[0], invoices[1:]
+        extra_ids = [invoice.id for invoice in extra]
+        Payment.objects.filter(invoice_id__in=extra_ids).update(invoice_id=kept.id)
+        ParentNotification.objects.filter(invoice_id__in=extra_ids).update(invoice_id=kept.id)
+        Invoice.objects.filter(id__in=extra_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0009_gradecapacitysetting'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_invoices, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='invoice',
+            constraint=models.UniqueConstraint(fields=('student', 'month'), name='unique_student_month_invoice'),
+        ),
+    ]
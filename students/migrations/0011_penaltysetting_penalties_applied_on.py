@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 03:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0010_invoice_unique_student_month'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='penaltysetting',
+            name='penalties_applied_on',
+            field=models.DateField(blank=True, null=True),
+        ),
+    ]
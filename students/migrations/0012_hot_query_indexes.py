@@ -0,0 +1,37 @@
+# Generated by Django 4.2.30 on 2026-10-18 03:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0011_penaltysetting_penalties_applied_on'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['month', 'is_paid'], name='invoice_month_paid_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['is_paid', 'due_date'], name='invoice_paid_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='parentnotification',
+            index=models.Index(fields=['invoice', 'notification_type'], name='parent_notif_invoice_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='parentnotification',
+            index=models.Index(fields=['parent', '-sent_at'], name='parent_notif_parent_sent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['grade_level', 'class_name'], name='student_grade_class_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['active', 'grade_level', 'class_name'], name='student_active_grade_idx'),
+        ),
+    ]
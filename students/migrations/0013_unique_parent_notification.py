@@ -0,0 +1,38 @@
+# Generated by Django 4.2.30 on 2026-10-18 04:08
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def delete_duplicate_notifications(apps, schema_editor):
+    ParentNotification = apps.get_model("students", "ParentNotification")
+    duplicates = (
+        ParentNotification.objects.values("invoice_id", "notification_type")
+        .annotate(keep_id=Min("id"), total=Count("id"))
+        .filter(total__gt=1)
+        .order_by()
+    )
+    for row in duplicates:
+        ParentNotification.objects.filter(
+            invoice_id=row["invoice_id"],
+            notification_type=row["notification_type"],
+        ).exclude(id=row["keep_id"]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0012_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_duplicate_notifications, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='parentnotification',
+            name='parent_notif_invoice_type_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='parentnotification',
+            constraint=models.UniqueConstraint(fields=('invoice', 'notification_type'), name='unique_parent_notification_per_invoice_type'),
+        ),
+    ]
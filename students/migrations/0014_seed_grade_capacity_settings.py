@@ -0,0 +1,26 @@
+# Generated by Django 4.2.30 on 2026-10-18 04:24
+
+from django.db import migrations
+
+
+def seed_grade_capacity_settings(apps, schema_editor):
+    GradeCapacitySetting = apps.get_model("students", "GradeCapacitySetting")
+    grade_levels = [choice[0] for choice in GradeCapacitySetting._meta.get_field("grade_level").choices]
+    GradeCapacitySetting.objects.bulk_create(
+        [
+            GradeCapacitySetting(grade_level=grade_level, max_students_per_section=30)
+            for grade_level in grade_levels
+        ],
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0013_unique_parent_notification'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_grade_capacity_settings, migrations.RunPython.noop),
+    ]
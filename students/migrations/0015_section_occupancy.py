@@ -0,0 +1,50 @@
+# Generated by Django 4.2.30 on 2026-10-18 04:25
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_section_occupancy(apps, schema_editor):
+    Student = apps.get_model("students", "Student")
+    SectionOccupancy = apps.get_model("students", "SectionOccupancy")
+    rows = (
+        Student.objects.exclude(class_name="")
+        .values("grade_level", "class_name")
+        .annotate(total=Count("id"))
+        .order_by()
+    )
+    SectionOccupancy.objects.bulk_create(
+        [
+            SectionOccupancy(grade_level=row["grade_level"], class_name=row["class_name"], student_count=row["total"])
+            for row in rows
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0014_seed_grade_capacity_settings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SectionOccupancy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('grade_level', models.CharField(choices=[('KG1', 'KG 1'), ('KG2', 'KG 2'), ('KG3', 'KG 3'), ('GRADE1', 'Grade 1'), ('GRADE2', 'Grade 2'), ('GRADE3', 'Grade 3'), ('GRADE4', 'Grade 4'), ('GRADE5', 'Grade 5'), ('GRADE6', 'Grade 6'), ('GRADE7', 'Grade 7'), ('GRADE8', 'Grade 8')], max_length=20)),
+                ('class_name', models.CharField(max_length=50)),
+                ('student_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['grade_level', 'class_name'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='sectionoccupancy',
+            constraint=models.UniqueConstraint(fields=('grade_level', 'class_name'), name='unique_section_occupancy'),
+        ),
+        migrations.RunPython(backfill_section_occupancy, migrations.RunPython.noop),
+    ]
@@ -5,6 +5,8 @@ from employees.models import Employee
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 
+from kgsystems.cache import get_cached_singleton
+
 User = get_user_model()
 
 # Choices
@@ -40,8 +42,10 @@ TRANSPORT_CHOICES = (
 
 
 class GradeCapacitySetting(models.Model):
+    DEFAULT_MAX_STUDENTS_PER_SECTION = 30
+
     grade_level = models.CharField(max_length=20, choices=GRADE_LEVEL_CHOICES, unique=True)
-    max_students_per_section = models.PositiveIntegerField(default=30)
+    max_students_per_section = models.PositiveIntegerField(default=DEFAULT_MAX_STUDENTS_PER_SECTION)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
@@ -90,10 +94,40 @@ class Student(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["grade_level", "class_name"], name="student_grade_class_idx"),
+            models.Index(fields=["active", "grade_level", "class_name"], name="student_active_grade_idx"),
+        ]
+
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
 
 
+class SectionOccupancy(models.Model):
+    """
+    Number of students per ``(grade_level, class_name)`` section.
+
+    Kept in step with ``Student`` by the signals in ``students.signals`` so
+    section assignment never has to count a grade's students. Bulk writes
+    that bypass signals must be followed by ``rebuild_section_occupancy``.
+    """
+
+    grade_level = models.CharField(max_length=20, choices=GRADE_LEVEL_CHOICES)
+    class_name = models.CharField(max_length=50)
+    student_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["grade_level", "class_name"]
+        constraints = [
+            models.UniqueConstraint(fields=["grade_level", "class_name"], name="unique_section_occupancy"),
+        ]
+
+    def __str__(self):
+        return f"{self.class_name}: {self.student_count}"
+
+
 class StudentCertificate(models.Model):
     student = models.ForeignKey(
         Student,
@@ -119,6 +153,15 @@ class Invoice(models.Model):
     is_paid = models.BooleanField(default=False)
     penalty_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["student", "month"], name="unique_student_month_invoice"),
+        ]
+        indexes = [
+            models.Index(fields=["month", "is_paid"], name="invoice_month_paid_idx"),
+            models.Index(fields=["is_paid", "due_date"], name="invoice_paid_due_idx"),
+        ]
+
     def __str__(self):
         return f"Invoice - {self.student} - {self.month}"
 
@@ -150,6 +193,8 @@ class Payment(models.Model):
 class PenaltySetting(models.Model):
     # Keep a single active settings row by convention.
     penalty_per_day = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    # Date of the last set-based penalty recalculation (see students.services).
+    penalties_applied_on = models.DateField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -158,8 +203,9 @@ class PenaltySetting(models.Model):
 
     @classmethod
     def get_current(cls):
-        obj, _ = cls.objects.get_or_create(id=1, defaults={"penalty_per_day": 0})
-        return obj
+        return get_cached_singleton(
+            cls, lambda: cls.objects.get_or_create(id=1, defaults={"penalty_per_day": 0})[0]
+        )
 
 
 class StudentFeeSetting(models.Model):
@@ -174,16 +220,18 @@ class StudentFeeSetting(models.Model):
 
     @classmethod
     def get_current(cls):
-        obj, _ = cls.objects.get_or_create(
-            id=1,
-            defaults={
-                "kg_monthly_fee": 0,
-                "elementary_monthly_fee": 0,
-                "registration_fee": 0,
-                "bus_transport_fee": 0,
-            },
+        return get_cached_singleton(
+            cls,
+            lambda: cls.objects.get_or_create(
+                id=1,
+                defaults={
+                    "kg_monthly_fee": 0,
+                    "elementary_monthly_fee": 0,
+                    "registration_fee": 0,
+                    "bus_transport_fee": 0,
+                },
+            )[0],
         )
-        return obj
 
 
 class ParentNotification(models.Model):
@@ -207,6 +255,15 @@ class ParentNotification(models.Model):
 
     class Meta:
         ordering = ["-sent_at"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["invoice", "notification_type"],
+                name="unique_parent_notification_per_invoice_type",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["parent", "-sent_at"], name="parent_notif_parent_sent_idx"),
+        ]
 
     def __str__(self):
         return f"{self.notification_type} - {self.parent} - {self.student}"
@@ -2,9 +2,9 @@
 from rest_framework import serializers
 import random
 from django.db import transaction
-from django.db.models import Count
 from django.utils import timezone
 from finance.models import BankAccount
+from kgsystems.serializers import SparseFieldsetMixin
 from .models import (
     GradeCapacitySetting,
     Invoice,
@@ -12,6 +12,7 @@ from .models import (
     ParentNotification,
     Payment,
     PenaltySetting,
+    SectionOccupancy,
     Student,
     StudentCertificate,
     StudentFeeSetting,
@@ -39,36 +40,45 @@ def _section_label(index):
         index -= 1
 
 
-def _assign_class_name(*, grade_level, exclude_student_id=None):
-    capacity_setting, _ = GradeCapacitySetting.objects.get_or_create(
-        grade_level=grade_level,
-        defaults={"max_students_per_section": 30},
+def _assign_class_name(*, grade_level):
+    """
+    Pick a section of ``grade_level`` with room left, or open the next one.
+
+    Must run inside the transaction that saves the student: the grade's
+    capacity row is locked with ``select_for_update`` (and created first if
+    the grade has none) so concurrent enrollments into the same grade queue
+    up instead of overfilling a section, and the counts come from
+    ``SectionOccupancy`` rather than a scan of the grade's students.
+    """
+    capacities = (
+        GradeCapacitySetting.objects.select_for_update()
+        .filter(grade_level=grade_level)
+        .values_list("max_students_per_section", flat=True)
+    )
+    capacity = capacities.first()
+    if capacity is None:
+        GradeCapacitySetting.objects.get_or_create(grade_level=grade_level)
+        capacity = capacities.get()
+    max_students = max(1, capacity)
+
+    section_counts = dict(
+        SectionOccupancy.objects.filter(grade_level=grade_level).values_list("class_name", "student_count")
     )
-    max_students = max(1, capacity_setting.max_students_per_section)
-    queryset = Student.objects.filter(grade_level=grade_level)
-    if exclude_student_id:
-        queryset = queryset.exclude(id=exclude_student_id)
-
-    section_counts = {
-        row["class_name"]: row["total_students"]
-        for row in queryset.values("class_name").annotate(total_students=Count("id"))
-        if row["class_name"]
-    }
-
-    existing_sections = sorted(section_counts.keys())
     available_existing_sections = [
         class_name
-        for class_name in existing_sections
-        if section_counts.get(class_name, 0) < max_students
+        for class_name in sorted(section_counts)
+        if section_counts[class_name] < max_students
     ]
     if available_existing_sections:
         return random.choice(available_existing_sections)
 
-    next_section_index = len(existing_sections)
+    next_section_index = 0
+    while f"{grade_level}{_section_label(next_section_index)}" in section_counts:
+        next_section_index += 1
     return f"{grade_level}{_section_label(next_section_index)}"
 
 
-class StudentSerializer(serializers.ModelSerializer):
+class StudentSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     dob = serializers.DateField(input_formats=["%d-%m-%Y", "%Y-%m-%d"])
     transport = serializers.ChoiceField(choices=Student._meta.get_field("transport").choices, required=True)
     parent = ParentSerializer(read_only=True)
@@ -130,7 +140,7 @@ class StudentSerializer(serializers.ModelSerializer):
             )
         if self.instance is None:
             bank_account_id = attrs.get("bank_account_id")
-            if bank_account_id is not None and not BankAccount.objects.filter(id=bank_account_id, is_active=True).exists():
+            if bank_account_id is not None and BankAccount.resolve(bank_account_id) is None:
                 raise serializers.ValidationError(
                     {"bank_account_id": ["Select a valid active bank account."]}
                 )
@@ -161,7 +171,6 @@ class StudentSerializer(serializers.ModelSerializer):
         fee_setting = StudentFeeSetting.get_current()
         category = validated_data["category"]
         transport = validated_data["transport"]
-        validated_data["class_name"] = _assign_class_name(grade_level=validated_data["grade_level"])
         validated_data["monthly_tuition_fee"] = self._get_monthly_fee(category, fee_setting)
         validated_data["registration_fee"] = fee_setting.registration_fee
         validated_data["transport_fee"] = (
@@ -174,29 +183,31 @@ class StudentSerializer(serializers.ModelSerializer):
             created_by = request.user
 
         with transaction.atomic():
+            validated_data["class_name"] = _assign_class_name(grade_level=validated_data["grade_level"])
             student = super().create(validated_data)
             for file_obj in certificate_files:
                 StudentCertificate.objects.create(student=student, file=file_obj)
 
-            from finance.services import record_account_transaction
+            from finance.services import record_account_transactions_bulk
 
             student_label = _student_report_label(student)
+            postings = []
             if student.registration_fee > 0:
-                record_account_transaction(
-                    bank_account=bank_account_id,
-                    amount_delta=student.registration_fee,
-                    entry_type="REGISTRATION_FEE",
-                    description=f"Registration fee received for {student_label} ({student.category}).",
-                    created_by=created_by,
+                postings.append(
+                    {
+                        "amount_delta": student.registration_fee,
+                        "entry_type": "REGISTRATION_FEE",
+                        "description": f"Registration fee received for {student_label} ({student.category}).",
+                    }
                 )
 
             if student.transport_fee > 0:
-                record_account_transaction(
-                    bank_account=bank_account_id,
-                    amount_delta=student.transport_fee,
-                    entry_type="TRANSPORT_FEE",
-                    description=f"Transport fee received for {student_label} (BUS).",
-                    created_by=created_by,
+                postings.append(
+                    {
+                        "amount_delta": student.transport_fee,
+                        "entry_type": "TRANSPORT_FEE",
+                        "description": f"Transport fee received for {student_label} (BUS).",
+                    }
                 )
 
             if student.monthly_tuition_fee > 0:
@@ -213,37 +224,56 @@ class StudentSerializer(serializers.ModelSerializer):
                     amount=student.monthly_tuition_fee,
                     paid_by=created_by,
                 )
-                record_account_transaction(
-                    bank_account=bank_account_id,
-                    amount_delta=student.monthly_tuition_fee,
-                    entry_type="MONTHLY_FEE",
-                    description=f"Monthly fee received for {student_label} ({month}).",
-                    created_by=created_by,
+                postings.append(
+                    {
+                        "amount_delta": student.monthly_tuition_fee,
+                        "entry_type": "MONTHLY_FEE",
+                        "description": f"Monthly fee received for {student_label} ({month}).",
+                    }
                 )
 
+            record_account_transactions_bulk(
+                {**posting, "bank_account": bank_account_id, "created_by": created_by} for posting in postings
+            )
+
         return student
 
     def update(self, instance, validated_data):
         category = validated_data.get("category", instance.category)
         transport = validated_data.get("transport", instance.transport)
         grade_level = validated_data.get("grade_level", instance.grade_level)
-        if grade_level != instance.grade_level:
-            validated_data["class_name"] = _assign_class_name(
-                grade_level=grade_level,
-                exclude_student_id=instance.id,
-            )
-        else:
-            validated_data["class_name"] = instance.class_name
         fee_setting = StudentFeeSetting.get_current()
         validated_data["monthly_tuition_fee"] = self._get_monthly_fee(category, fee_setting)
         validated_data["registration_fee"] = fee_setting.registration_fee
         validated_data["transport_fee"] = (
             fee_setting.bus_transport_fee if transport == "BUS" else 0
         )
-        return super().update(instance, validated_data)
+        with transaction.atomic():
+            if grade_level != instance.grade_level:
+                validated_data["class_name"] = _assign_class_name(grade_level=grade_level)
+            else:
+                validated_data["class_name"] = instance.class_name
+            return super().update(instance, validated_data)
+
+
+def _invoice_passed_days(invoice):
+    if invoice.is_paid:
+        return 0
+    today = timezone.localdate()
+    if invoice.due_date >= today:
+        return 0
+    return (today - invoice.due_date).days
+
 
+def _invoice_payment_status(invoice):
+    if invoice.is_paid:
+        return "PAID"
+    if invoice.due_date < timezone.localdate():
+        return "OVERDUE"
+    return "PENDING"
 
-class InvoiceSerializer(serializers.ModelSerializer):
+
+class InvoiceSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     student = StudentSerializer(read_only=True)
     student_id = serializers.PrimaryKeyRelatedField(
         queryset=Student.objects.all(), source='student', write_only=True
@@ -261,23 +291,44 @@ class InvoiceSerializer(serializers.ModelSerializer):
         read_only_fields = ['is_paid', 'penalty_amount', 'total_amount_due', 'passed_days', 'payment_status']
 
     def get_passed_days(self, obj):
-        if obj.is_paid:
-            return 0
-        today = timezone.localdate()
-        if obj.due_date >= today:
-            return 0
-        return (today - obj.due_date).days
+        return _invoice_passed_days(obj)
 
     def get_payment_status(self, obj):
-        if obj.is_paid:
-            return "PAID"
-        today = timezone.localdate()
-        if obj.due_date < today:
-            return "OVERDUE"
-        return "PENDING"
+        return _invoice_payment_status(obj)
+
 
+class InvoiceRowSerializer(serializers.ModelSerializer):
+    """Flat invoice row for dashboards; avoids the nested StudentSerializer."""
 
-class PaymentSerializer(serializers.ModelSerializer):
+    student_name = serializers.SerializerMethodField(read_only=True)
+    grade_level = serializers.CharField(source='student.grade_level', read_only=True)
+    class_name = serializers.CharField(source='student.class_name', read_only=True)
+    parent_name = serializers.CharField(source='student.parent.full_name', read_only=True)
+    parent_phone = serializers.CharField(source='student.parent.phone_number', read_only=True)
+    total_amount_due = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
+    passed_days = serializers.SerializerMethodField(read_only=True)
+    payment_status = serializers.SerializerMethodField(read_only=True)
+
+    class Meta:
+        model = Invoice
+        fields = [
+            'id', 'student_id', 'student_name', 'grade_level', 'class_name',
+            'parent_name', 'parent_phone', 'month', 'amount', 'due_date', 'is_paid',
+            'penalty_amount', 'total_amount_due', 'passed_days', 'payment_status'
+        ]
+        read_only_fields = fields
+
+    def get_student_name(self, obj):
+        return f"{obj.student.first_name} {obj.student.last_name}".strip()
+
+    def get_passed_days(self, obj):
+        return _invoice_passed_days(obj)
+
+    def get_payment_status(self, obj):
+        return _invoice_payment_status(obj)
+
+
+class PaymentSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     invoice = InvoiceSerializer(read_only=True)
     invoice_id = serializers.PrimaryKeyRelatedField(
         queryset=Invoice.objects.all(), source='invoice', write_only=True
@@ -291,7 +342,7 @@ class PaymentSerializer(serializers.ModelSerializer):
         read_only_fields = ['paid_at', 'paid_by']
 
     def validate_bank_account_id(self, value):
-        if not BankAccount.objects.filter(id=value, is_active=True).exists():
+        if BankAccount.resolve(value) is None:
             raise serializers.ValidationError("Select a valid active bank account.")
         return value
 
@@ -333,19 +384,6 @@ class GradeCapacitySettingSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'updated_at']
 
 
-class GradeSectionSerializer(serializers.Serializer):
-    class_name = serializers.CharField()
-    total_students = serializers.IntegerField()
-    students = StudentSerializer(many=True)
-
-
-class StudentGradeGroupSerializer(serializers.Serializer):
-    grade_level = serializers.CharField()
-    total_students = serializers.IntegerField()
-    students = StudentSerializer(many=True)
-    sections = GradeSectionSerializer(many=True)
-
-
 class ParentNotificationSerializer(serializers.ModelSerializer):
     student_name = serializers.SerializerMethodField(read_only=True)
 
@@ -367,8 +405,10 @@ class AccountantDashboardSerializer(serializers.Serializer):
     paid_students = serializers.IntegerField()
     unpaid_students = serializers.IntegerField()
     overdue_students = serializers.IntegerField()
-    paid_invoices = InvoiceSerializer(many=True)
-    unpaid_invoices = InvoiceSerializer(many=True)
+    total_billed = serializers.DecimalField(max_digits=14, decimal_places=2)
+    total_collected = serializers.DecimalField(max_digits=14, decimal_places=2)
+    total_outstanding = serializers.DecimalField(max_digits=14, decimal_places=2)
+    total_penalties = serializers.DecimalField(max_digits=14, decimal_places=2)
 
 
 class AccountantMonthlyListSerializer(serializers.Serializer):
@@ -377,4 +417,3 @@ class AccountantMonthlyListSerializer(serializers.Serializer):
     paid_students = serializers.IntegerField()
     unpaid_students = serializers.IntegerField()
     overdue_students = serializers.IntegerField()
-    unpaid_invoices = InvoiceSerializer(many=True)
@@ -0,0 +1,275 @@
+from datetime import timedelta
+from decimal import Decimal
+from time import perf_counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, DecimalField, F, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from kgsystems.cache import invalidate_singleton
+
+from .models import Invoice, ParentNotification, Payment, PenaltySetting, SectionOccupancy, Student
+
+
+def _elapsed_ms(started):
+    return round((perf_counter() - started) * 1000, 2)
+
+
+def _in_id_range(queryset, id_range, field="id"):
+    """Restrict ``queryset`` to ``start <= field < stop`` when ``id_range`` is given."""
+    if id_range is None:
+        return queryset
+    start, stop = id_range
+    return queryset.filter(**{f"{field}__gte": start, f"{field}__lt": stop})
+
+
+INVOICE_BATCH_SIZE = 500
+REMINDER_BATCH_SIZE = 500
+
+
+def _insert_invoice_batch(batch, *, month):
+    """
+    Insert ``batch`` and return how many rows were inserted.
+
+    If a concurrent run already invoiced some of the students, the batch is
+    retried without them, so the count never includes rows it did not write.
+    """
+    while batch:
+        try:
+            with transaction.atomic():
+                Invoice.objects.bulk_create(batch)
+            return len(batch)
+        except IntegrityError:
+            taken = set(
+                Invoice.objects.filter(month=month, student_id__in=[invoice.student_id for invoice in batch])
+                .values_list("student_id", flat=True)
+            )
+            remaining = [invoice for invoice in batch if invoice.student_id not in taken]
+            if len(remaining) == len(batch):
+                raise
+            batch = remaining
+    return 0
+
+
+def generate_monthly_invoices(*, month, due_date, student_id_range=None):
+    """
+    Create the missing ``(student, month)`` invoices for every active student.
+
+    Existing invoices for the month are fetched in one query and only the
+    missing rows are inserted with ``bulk_create``. The unique constraint on
+    ``(student, month)`` guards against concurrent runs; ``created`` counts
+    only the rows this run actually inserted.
+    """
+    started = perf_counter()
+    students = list(
+        _in_id_range(Student.objects.filter(active=True), student_id_range)
+        .order_by("id")
+        .values_list("id", "monthly_tuition_fee")
+    )
+    invoiced_ids = set(
+        _in_id_range(Invoice.objects.filter(month=month, student__active=True), student_id_range, "student_id")
+        .values_list("student_id", flat=True)
+    )
+    diff_ms = _elapsed_ms(started)
+
+    insert_started = perf_counter()
+    missing = [
+        Invoice(student_id=student_id, month=month, amount=fee, due_date=due_date)
+        for student_id, fee in students
+        if student_id not in invoiced_ids
+    ]
+    created = 0
+    for start in range(0, len(missing), INVOICE_BATCH_SIZE):
+        created += _insert_invoice_batch(missing[start:start + INVOICE_BATCH_SIZE], month=month)
+
+    return {
+        "month": month,
+        "active_students": len(students),
+        "existing": len(invoiced_ids),
+        "created": created,
+        "timings_ms": {
+            "diff": diff_ms,
+            "insert": _elapsed_ms(insert_started),
+            "total": _elapsed_ms(started),
+        },
+    }
+
+
+def recalculate_penalties(*, today=None, force=False, invoice_id_range=None):
+    """
+    Recompute ``penalty_amount`` for every overdue unpaid invoice in one UPDATE.
+
+    The expected penalty is ``(today - due_date) * penalty_per_day``; it is
+    expressed as a CASE over the distinct overdue due dates so the statement
+    stays portable across database backends. Unless ``force`` is set, the run
+    is skipped when penalties were already applied today.
+    """
+    started = perf_counter()
+    today = today or timezone.localdate()
+    setting = PenaltySetting.get_current()
+    if not force and setting.penalties_applied_on == today:
+        return {"skipped": True, "updated": 0, "timings_ms": {"total": _elapsed_ms(started)}}
+
+    overdue = _in_id_range(Invoice.objects.filter(is_paid=False, due_date__lt=today), invoice_id_range)
+    due_dates = list(overdue.order_by().values_list("due_date", flat=True).distinct())
+    updated = 0
+    if due_dates:
+        expected_penalty = Case(
+            *[
+                When(due_date=due_date, then=Value(Decimal((today - due_date).days) * setting.penalty_per_day))
+                for due_date in due_dates
+            ],
+            output_field=DecimalField(max_digits=10, decimal_places=2),
+        )
+        updated = overdue.exclude(penalty_amount=expected_penalty).update(penalty_amount=expected_penalty)
+
+    PenaltySetting.objects.filter(pk=setting.pk).update(penalties_applied_on=today)
+    invalidate_singleton(PenaltySetting)
+    return {
+        "skipped": False,
+        "updated": updated,
+        "timings_ms": {"total": _elapsed_ms(started)},
+    }
+
+
+def reconcile_paid_invoices(*, today=None, invoice_id_range=None):
+    """
+    Flag overdue unpaid invoices whose payments already cover the amount due.
+
+    The payment totals are a correlated subquery, so the whole reconciliation
+    is one SELECT of the matching ids plus one UPDATE.
+    """
+    started = perf_counter()
+    today = today or timezone.localdate()
+    payments_total = (
+        Payment.objects.filter(invoice=OuterRef("pk"))
+        .order_by()
+        .values("invoice")
+        .annotate(total=Sum("amount"))
+        .values("total")
+    )
+    settled_ids = list(
+        _in_id_range(Invoice.objects.filter(is_paid=False, due_date__lt=today), invoice_id_range)
+        .annotate(
+            paid_total=Coalesce(
+                Subquery(payments_total),
+                Value(Decimal("0")),
+                output_field=DecimalField(max_digits=12, decimal_places=2),
+            )
+        )
+        .filter(paid_total__gte=F("amount") + F("penalty_amount"))
+        .values_list("id", flat=True)
+    )
+    updated = Invoice.objects.filter(id__in=settled_ids).update(is_paid=True) if settled_ids else 0
+    return {"updated": updated, "timings_ms": {"total": _elapsed_ms(started)}}
+
+
+def _insert_reminder_batch(batch):
+    """
+    Insert ``batch`` and return how many reminders were inserted.
+
+    Invoices a concurrent run reminded in the meantime are dropped and the
+    batch retried, mirroring ``_insert_invoice_batch``.
+    """
+    while batch:
+        try:
+            with transaction.atomic():
+                ParentNotification.objects.bulk_create(batch)
+            return len(batch)
+        except IntegrityError:
+            taken = set(
+                ParentNotification.objects.filter(
+                    notification_type="REMINDER", invoice_id__in=[reminder.invoice_id for reminder in batch]
+                ).values_list("invoice_id", flat=True)
+            )
+            remaining = [reminder for reminder in batch if reminder.invoice_id not in taken]
+            if len(remaining) == len(batch):
+                raise
+            batch = remaining
+    return 0
+
+
+def send_due_reminders(*, today=None, days_before=3, window_days=1, invoice_id_range=None):
+    """
+    Create a REMINDER notification for unpaid invoices that fall due soon.
+
+    Invoices due between ``today + days_before - window_days + 1`` and
+    ``today + days_before`` are considered, so a wider window catches up on
+    days the run was skipped. Already-reminded invoices are fetched in one
+    query and the missing notifications are inserted with ``bulk_create``;
+    the unique constraint on ``(invoice, notification_type)`` guards against
+    concurrent runs, and ``reminders_created`` counts only the rows this run
+    actually inserted.
+    """
+    started = perf_counter()
+    today = today or timezone.localdate()
+    last_due_date = today + timedelta(days=days_before)
+    first_due_date = last_due_date - timedelta(days=max(window_days, 1) - 1)
+    invoices = list(
+        _in_id_range(
+            Invoice.objects.filter(is_paid=False, due_date__range=[first_due_date, last_due_date]),
+            invoice_id_range,
+        )
+        .exclude(notifications__notification_type="REMINDER")
+        .select_related("student", "student__parent")
+    )
+
+    reminders = [
+        ParentNotification(
+            parent=invoice.student.parent,
+            student=invoice.student,
+            invoice=invoice,
+            notification_type="REMINDER",
+            title="Tuition Reminder",
+            message=(
+                f"Reminder: Tuition for {invoice.student} ({invoice.month}) is due on "
+                f"{invoice.due_date}."
+            ),
+        )
+        for invoice in invoices
+    ]
+    created = 0
+    for start in range(0, len(reminders), REMINDER_BATCH_SIZE):
+        created += _insert_reminder_batch(reminders[start:start + REMINDER_BATCH_SIZE])
+
+    return {
+        "due_from": first_due_date.isoformat(),
+        "due_to": last_due_date.isoformat(),
+        "reminders_created": created,
+        "timings_ms": {"total": _elapsed_ms(started)},
+    }
+
+
+def adjust_section_occupancy(grade_level, class_name, delta):
+    """Add ``delta`` to the student count of a section, creating its row on first use."""
+    if not grade_level or not class_name:
+        return
+    section = SectionOccupancy.objects.filter(grade_level=grade_level, class_name=class_name)
+    if section.update(student_count=F("student_count") + delta, updated_at=timezone.now()):
+        return
+    SectionOccupancy.objects.get_or_create(grade_level=grade_level, class_name=class_name)
+    section.update(student_count=F("student_count") + delta, updated_at=timezone.now())
+
+
+def rebuild_section_occupancy():
+    """
+    Recompute ``SectionOccupancy`` from ``Student`` with one grouped query.
+
+    Needed after bulk writes that bypass the ``Student`` signals. Returns the
+    number of section rows written.
+    """
+    rows = (
+        Student.objects.exclude(class_name="")
+        .values("grade_level", "class_name")
+        .annotate(total=Count("id"))
+        .order_by()
+    )
+    sections = [
+        SectionOccupancy(grade_level=row["grade_level"], class_name=row["class_name"], student_count=row["total"])
+        for row in rows
+    ]
+    with transaction.atomic():
+        SectionOccupancy.objects.all().delete()
+        SectionOccupancy.objects.bulk_create(sections, batch_size=500)
+    return len(sections)
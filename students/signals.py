@@ -1,10 +1,83 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
 from django.dispatch import receiver
-from .models import Student
-from chat.services import create_parent_teacher_room
+from jobs.services import enqueue_job
+from kgsystems.cache import bump_namespaces, invalidate_singleton_on_save
+from .models import GradeCapacitySetting, PenaltySetting, Student, StudentFeeSetting
+from .services import adjust_section_occupancy
+from chat.services import create_parent_teacher_room, ensure_driver_parent_rooms
+from transport.models import BusAssignment
+
+
+def _chat_parties_of(instance):
+    # Read from __dict__ so deferred fields are not fetched.
+    return instance.__dict__.get("parent_id"), instance.__dict__.get("class_teacher_id")
+
+
+@receiver(post_init, sender=Student)
+def remember_loaded_chat_parties(sender, instance, **kwargs):
+    instance._loaded_chat_parties = _chat_parties_of(instance)
 
 
 @receiver(post_save, sender=Student)
 def auto_create_chat(sender, instance, created, **kwargs):
-    if created and instance.class_teacher:
-        create_parent_teacher_room(instance)
\ No newline at end of file
+    parent_id, class_teacher_id = parties = _chat_parties_of(instance)
+    loaded_parent_id, loaded_class_teacher_id = instance._loaded_chat_parties
+    instance._loaded_chat_parties = parties
+    if class_teacher_id and (created or parties != (loaded_parent_id, loaded_class_teacher_id)):
+        create_parent_teacher_room(instance)
+    if not created and parent_id and parent_id != loaded_parent_id:
+        ensure_driver_parent_rooms(BusAssignment.objects.filter(student=instance))
+
+
+for singleton_model in (PenaltySetting, StudentFeeSetting):
+    post_save.connect(invalidate_singleton_on_save, sender=singleton_model)
+    post_delete.connect(invalidate_singleton_on_save, sender=singleton_model)
+
+
+@receiver(post_save, sender=PenaltySetting)
+def reapply_penalties(sender, instance, **kwargs):
+    # The recalculation touches every overdue invoice, so it runs in the job
+    # worker rather than inside the request that saved the new rate.
+    transaction.on_commit(lambda: enqueue_job("students.recalculate_penalties", {"force": True}))
+
+
+@receiver([post_save, post_delete], sender=GradeCapacitySetting)
+def invalidate_grade_capacity_responses(sender, **kwargs):
+    bump_namespaces("grade-capacity")
+
+
+@receiver([post_save, post_delete], sender=PenaltySetting)
+def invalidate_penalty_setting_responses(sender, **kwargs):
+    bump_namespaces("penalty-setting")
+
+
+@receiver([post_save, post_delete], sender=StudentFeeSetting)
+def invalidate_student_fee_setting_responses(sender, **kwargs):
+    bump_namespaces("student-fee-setting")
+
+
+def _section_of(instance):
+    # Read from __dict__ so deferred fields are not fetched.
+    return instance.__dict__.get("grade_level"), instance.__dict__.get("class_name")
+
+
+@receiver(post_init, sender=Student)
+def remember_loaded_section(sender, instance, **kwargs):
+    instance._loaded_section = _section_of(instance)
+
+
+@receiver(post_save, sender=Student)
+def update_section_occupancy(sender, instance, created, **kwargs):
+    section = _section_of(instance)
+    if created:
+        adjust_section_occupancy(*section, 1)
+    elif None not in instance._loaded_section and section != instance._loaded_section:
+        adjust_section_occupancy(*instance._loaded_section, -1)
+        adjust_section_occupancy(*section, 1)
+    instance._loaded_section = section
+
+
+@receiver(post_delete, sender=Student)
+def release_section_occupancy(sender, instance, **kwargs):
+    adjust_section_occupancy(*instance._loaded_section, -1)
@@ -0,0 +1,22 @@
+from datetime import date
+
+from jobs.registry import job_handler
+
+from . import services
+
+
+@job_handler("students.generate_monthly_invoices")
+def generate_monthly_invoices(*, month, due_date):
+    return services.generate_monthly_invoices(month=month, due_date=date.fromisoformat(due_date))
+
+
+@job_handler("students.recalculate_penalties")
+def recalculate_penalties(*, today=None, force=False):
+    today = date.fromisoformat(today) if today else None
+    return services.recalculate_penalties(today=today, force=force)
+
+
+@job_handler("students.send_due_reminders")
+def send_due_reminders(*, today=None, days_before=3, window_days=1):
+    today = date.fromisoformat(today) if today else None
+    return services.send_due_reminders(today=today, days_before=days_before, window_days=window_days)
@@ -1,13 +1,40 @@
+from datetime import date, timedelta
 from decimal import Decimal
+from io import StringIO
 from unittest.mock import patch
 
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import QuerySet
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APITestCase
 
 from accounts.models import User
+from jobs.models import Job
+from jobs.services import run_pending_jobs
+from kgsystems.cache import request_memo
 from finance.models import BankAccount, LedgerEntry, SchoolAccount
-from students.models import GradeCapacitySetting, Invoice, Payment, Student, StudentFeeSetting
+from students.models import (
+    GradeCapacitySetting,
+    Invoice,
+    ParentNotification,
+    Payment,
+    PenaltySetting,
+    SectionOccupancy,
+    Student,
+    StudentCertificate,
+    StudentFeeSetting,
+)
+from students.services import (
+    generate_monthly_invoices,
+    rebuild_section_occupancy,
+    recalculate_penalties,
+    send_due_reminders,
+)
 
 
 class StudentRegistrationFlowTests(APITestCase):
@@ -211,6 +238,30 @@ class StudentGradeListingTests(APITestCase):
         self.assertEqual(response.data[0]["sections"][0]["class_name"], "KG2A")
         self.assertEqual(response.data[1]["grade_level"], "GRADE3")
         self.assertEqual(response.data[1]["students"][0]["first_name"], "Beth")
+        self.assertEqual(response.data[1]["sections"][0]["students"][0]["first_name"], "Beth")
+        self.assertEqual(response.data[1]["sections"][0]["students"], response.data[1]["students"])
+
+    def test_grade_sections_can_be_summarized_or_listed_by_id(self):
+        response = self.client.get(reverse("student-list-by-grade"), {"sections": "summary"})
+        self.assertEqual(response.data[0]["sections"], [{"class_name": "KG2A", "total_students": 1}])
+        self.assertNotIn("students", response.data[0])
+
+        response = self.client.get(reverse("student-list-by-grade"), {"sections": "ids"})
+        beth = Student.objects.get(first_name="Beth")
+        self.assertEqual(response.data[1]["sections"][0]["student_ids"], [beth.id])
+        self.assertNotIn("students", response.data[1])
+        self.assertNotIn("students", response.data[1]["sections"][0])
+
+    def test_student_list_is_paginated_with_sparse_fields(self):
+        response = self.client.get(
+            reverse("student-list-create"),
+            {"page_size": 1, "fields": "id,first_name"},
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 2)
+        self.assertIsNotNone(response.data["next"])
+        self.assertEqual(set(response.data["results"][0]), {"id", "first_name"})
 
 
 class StudentSectionAssignmentTests(APITestCase):
@@ -270,6 +321,32 @@ class StudentSectionAssignmentTests(APITestCase):
         )
         self.assertEqual(classes, ["GRADE1A", "GRADE1A", "GRADE1B"])
 
+    def test_grade_without_capacity_row_gets_the_default_row(self):
+        GradeCapacitySetting.objects.filter(grade_level="GRADE2").delete()
+
+        response = self.client.post(
+            reverse("student-list-create"),
+            data={
+                "first_name": "Dan",
+                "last_name": "Kid",
+                "dob": "2015-01-10",
+                "gender": "M",
+                "category": "ELEMENTARY",
+                "grade_level": "GRADE2",
+                "transport": "FOOT",
+                "parent_id": self.parent.id,
+                "bank_account_id": self.bank_account.id,
+            },
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["class_name"], "GRADE2A")
+        self.assertEqual(
+            GradeCapacitySetting.objects.get(grade_level="GRADE2").max_students_per_section,
+            GradeCapacitySetting.DEFAULT_MAX_STUDENTS_PER_SECTION,
+        )
+
     def test_students_can_be_randomly_placed_into_any_available_section(self):
         Student.objects.create(
             first_name="Existing",
@@ -312,6 +389,42 @@ class StudentSectionAssignmentTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(Student.objects.get(first_name="Dana").class_name, "GRADE1B")
 
+    def test_section_counters_follow_enrollment_grade_changes_and_deletes(self):
+        payload = {
+            "first_name": "Eli",
+            "last_name": "Kid",
+            "dob": "2016-01-10",
+            "gender": "M",
+            "category": "ELEMENTARY",
+            "grade_level": "GRADE1",
+            "transport": "FOOT",
+            "parent_id": self.parent.id,
+            "bank_account_id": self.bank_account.id,
+        }
+
+        def counts():
+            return dict(SectionOccupancy.objects.values_list("class_name", "student_count"))
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse("student-list-create"), data=payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertFalse(
+            any("COUNT(" in query["sql"] and '"students_student"' in query["sql"] for query in queries.captured_queries)
+        )
+        self.assertEqual(counts(), {"GRADE1A": 1})
+
+        student = Student.objects.get(first_name="Eli")
+        student.grade_level = "GRADE2"
+        student.class_name = "GRADE2A"
+        student.save()
+        self.assertEqual(counts(), {"GRADE1A": 0, "GRADE2A": 1})
+
+        student.delete()
+        self.assertEqual(counts(), {"GRADE1A": 0, "GRADE2A": 0})
+
+        self.assertEqual(rebuild_section_occupancy(), 0)
+        self.assertEqual(counts(), {})
+
 
 class GradeCapacitySettingViewTests(APITestCase):
     def setUp(self):
@@ -329,6 +442,15 @@ class GradeCapacitySettingViewTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertTrue(any(item["grade_level"] == "KG1" for item in response.data))
 
+    def test_capacity_list_is_a_pure_read_of_seeded_rows(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("grade-capacity-list"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), len(Student._meta.get_field("grade_level").choices))
+        self.assertEqual(len(queries), 1)
+        self.assertTrue(all(query["sql"].startswith("SELECT") for query in queries.captured_queries))
+
 
 class MonthlyPaymentReportDescriptionTests(APITestCase):
     def setUp(self):
@@ -388,3 +510,520 @@ class MonthlyPaymentReportDescriptionTests(APITestCase):
         entry = LedgerEntry.objects.filter(entry_type="MONTHLY_FEE").latest("created_at")
         self.assertIn("GRADE2 - GRADE2B", entry.description)
         self.assertIn("2026-03", entry.description)
+
+    def test_payment_to_default_account_resolves_bank_account_once(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                reverse("payment-create"),
+                data={"invoice_id": self.invoice.id, "amount": "200.00"},
+                format="json",
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        bank_account_lookups = [
+            query["sql"]
+            for query in queries.captured_queries
+            if query["sql"].startswith("SELECT") and '"finance_bankaccount"."is_active"' in query["sql"]
+        ]
+        # One directory load (cached across requests) plus one instance fetch,
+        # shared by validation and posting.
+        self.assertEqual(len(bank_account_lookups), 2)
+        self.bank_account.refresh_from_db()
+        self.assertEqual(self.bank_account.current_balance, Decimal("200.00"))
+
+
+class MonthlyInvoiceGenerationTests(APITestCase):
+    def setUp(self):
+        self.accountant = User.objects.create_user(
+            phone_number="0911000008",
+            password="pass1234",
+            role="ACCOUNTANT",
+            full_name="Accountant Four",
+        )
+        self.parent = User.objects.create_user(
+            phone_number="0911000009",
+            password="pass1234",
+            role="PARENT",
+            full_name="Parent Five",
+        )
+        self.students = [
+            Student.objects.create(
+                first_name=f"Kid{index}",
+                last_name="Gen",
+                dob="2018-01-01",
+                gender="M",
+                category="KG",
+                grade_level="KG1",
+                class_name="KG1A",
+                transport="FOOT",
+                parent=self.parent,
+                monthly_tuition_fee=Decimal("100.00"),
+                active=index != 2,
+            )
+            for index in range(3)
+        ]
+        self.client.force_authenticate(self.accountant)
+
+    def test_generation_only_creates_missing_invoices_for_active_students(self):
+        Invoice.objects.create(
+            student=self.students[0],
+            month="2026-05",
+            amount=Decimal("100.00"),
+            due_date="2026-05-05",
+        )
+
+        response = self.client.post(
+            reverse("fees-monthly"),
+            data={"month": "2026-05", "due_day": 5},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["generation"]["created"], 1)
+        self.assertEqual(response.data["generation"]["existing"], 1)
+        self.assertIn("total", response.data["generation"]["timings_ms"])
+        self.assertEqual(Invoice.objects.filter(month="2026-05").count(), 2)
+        self.assertFalse(Invoice.objects.filter(student=self.students[2]).exists())
+
+        response = self.client.post(
+            reverse("fees-monthly"),
+            data={"month": "2026-05", "due_day": 5},
+            format="json",
+        )
+
+        self.assertEqual(response.data["generation"]["created"], 0)
+        self.assertEqual(Invoice.objects.filter(month="2026-05").count(), 2)
+
+    def test_created_count_excludes_rows_inserted_by_a_concurrent_run(self):
+        original_values_list = QuerySet.values_list
+
+        def invoice_sneaks_in(queryset, *args, **kwargs):
+            # Another run invoices the first student right after the diff query.
+            result = original_values_list(queryset, *args, **kwargs)
+            if queryset.model is Invoice and not Invoice.objects.filter(month="2026-06").exists():
+                Invoice.objects.create(
+                    student=self.students[0], month="2026-06", amount=Decimal("100.00"), due_date="2026-06-05"
+                )
+            return result
+
+        with patch.object(QuerySet, "values_list", invoice_sneaks_in):
+            result = generate_monthly_invoices(month="2026-06", due_date=date(2026, 6, 5))
+
+        self.assertEqual(result["created"], 1)
+        self.assertEqual(Invoice.objects.filter(month="2026-06").count(), 2)
+
+
+class PenaltyRecalculationTests(APITestCase):
+    def setUp(self):
+        self.director = User.objects.create_user(
+            phone_number="0911000010",
+            password="pass1234",
+            role="DIRECTOR",
+            full_name="Director Three",
+        )
+        self.parent = User.objects.create_user(
+            phone_number="0911000011",
+            password="pass1234",
+            role="PARENT",
+            full_name="Parent Six",
+        )
+        self.student = Student.objects.create(
+            first_name="Late",
+            last_name="Payer",
+            dob="2018-01-01",
+            gender="F",
+            category="KG",
+            grade_level="KG1",
+            class_name="KG1A",
+            transport="FOOT",
+            parent=self.parent,
+        )
+        self.today = timezone.localdate()
+        self.overdue = Invoice.objects.create(
+            student=self.student,
+            month="2026-01",
+            amount=Decimal("100.00"),
+            due_date=self.today - timedelta(days=4),
+        )
+        self.paid = Invoice.objects.create(
+            student=self.student,
+            month="2026-02",
+            amount=Decimal("100.00"),
+            due_date=self.today - timedelta(days=2),
+            is_paid=True,
+        )
+        PenaltySetting.objects.update_or_create(id=1, defaults={"penalty_per_day": Decimal("2.50")})
+        recalculate_penalties(today=self.today, force=True)
+
+    def test_penalty_setting_change_recomputes_overdue_unpaid_invoices_in_a_job(self):
+        self.overdue.refresh_from_db()
+        self.paid.refresh_from_db()
+        self.assertEqual(self.overdue.penalty_amount, Decimal("10.00"))
+        self.assertEqual(self.paid.penalty_amount, Decimal("0"))
+
+        self.client.force_authenticate(self.director)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.put(
+                reverse("fees-penalty-setting"),
+                data={"penalty_per_day": "5.00"},
+                format="json",
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.overdue.refresh_from_db()
+        self.assertEqual(self.overdue.penalty_amount, Decimal("10.00"))
+        self.assertTrue(Job.objects.filter(name="students.recalculate_penalties", payload={"force": True}).exists())
+
+        run_pending_jobs()
+
+        self.overdue.refresh_from_db()
+        self.assertEqual(self.overdue.penalty_amount, Decimal("20.00"))
+
+    def test_recalculation_runs_once_per_day_unless_forced(self):
+        self.assertTrue(recalculate_penalties(today=self.today)["skipped"])
+
+        Invoice.objects.filter(pk=self.overdue.pk).update(penalty_amount=0)
+        result = recalculate_penalties(today=self.today, force=True)
+
+        self.assertEqual(result["updated"], 1)
+        self.overdue.refresh_from_db()
+        self.assertEqual(self.overdue.penalty_amount, Decimal("10.00"))
+
+    def test_invoice_list_does_not_write_penalties(self):
+        Invoice.objects.filter(pk=self.overdue.pk).update(penalty_amount=0)
+        self.client.force_authenticate(self.director)
+
+        response = self.client.get(reverse("invoice-create"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.overdue.refresh_from_db()
+        self.assertEqual(self.overdue.penalty_amount, Decimal("0"))
+
+
+class AccountantDashboardTests(APITestCase):
+    def setUp(self):
+        self.accountant = User.objects.create_user(
+            phone_number="0911000012",
+            password="pass1234",
+            role="ACCOUNTANT",
+            full_name="Accountant Five",
+        )
+        self.parent = User.objects.create_user(
+            phone_number="0911000013",
+            password="pass1234",
+            role="PARENT",
+            full_name="Parent Seven",
+        )
+        today = timezone.localdate()
+        for index in range(4):
+            student = Student.objects.create(
+                first_name=f"Dash{index}",
+                last_name="Kid",
+                dob="2018-01-01",
+                gender="M",
+                category="KG",
+                grade_level="KG1",
+                class_name="KG1A",
+                transport="FOOT",
+                parent=self.parent,
+            )
+            Invoice.objects.create(
+                student=student,
+                month="2026-06",
+                amount=Decimal("100.00"),
+                due_date=today - timedelta(days=1) if index == 3 else today + timedelta(days=5),
+                is_paid=index == 0,
+                penalty_amount=Decimal("5.00") if index == 3 else Decimal("0"),
+            )
+        self.client.force_authenticate(self.accountant)
+
+    def test_dashboard_counters_come_from_a_single_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("fees-dashboard"), {"month": "2026-06"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["total_students"], 4)
+        self.assertEqual(response.data["paid_students"], 1)
+        self.assertEqual(response.data["unpaid_students"], 3)
+        self.assertEqual(response.data["overdue_students"], 1)
+        self.assertEqual(Decimal(response.data["total_outstanding"]), Decimal("305.00"))
+        self.assertNotIn("unpaid_invoices", response.data)
+
+    def test_dashboard_invoice_lists_are_paginated_slim_rows(self):
+        # Summary aggregate, page count and page rows.
+        with self.assertNumQueries(3):
+            response = self.client.get(
+                reverse("fees-dashboard"),
+                {"month": "2026-06", "include_invoices": "unpaid", "page_size": 2},
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("paid_invoices", response.data)
+        unpaid = response.data["unpaid_invoices"]
+        self.assertEqual(unpaid["count"], 3)
+        self.assertEqual(len(unpaid["results"]), 2)
+        self.assertIn("page=2", unpaid["next"])
+        self.assertEqual(unpaid["results"][0]["student_name"], "Dash1 Kid")
+        self.assertNotIn("student", unpaid["results"][0])
+
+    def test_monthly_fees_unpaid_list_is_paginated_slim_rows(self):
+        # Summary aggregate, page count and page rows.
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse("fees-monthly"), {"month": "2026-06", "page_size": 2})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["unpaid_students"], 3)
+        unpaid = response.data["unpaid_invoices"]
+        self.assertEqual(unpaid["count"], 3)
+        self.assertEqual([row["student_name"] for row in unpaid["results"]], ["Dash1 Kid", "Dash2 Kid"])
+        self.assertNotIn("student", unpaid["results"][0])
+
+
+class StudentListQueryCountTests(APITestCase):
+    def setUp(self):
+        self.accountant = User.objects.create_user(
+            phone_number="0911000014",
+            password="pass1234",
+            role="ACCOUNTANT",
+            full_name="Accountant Query",
+        )
+        parent = User.objects.create_user(
+            phone_number="0911000015",
+            password="pass1234",
+            role="PARENT",
+            full_name="Parent Query",
+        )
+        Student.objects.bulk_create(
+            [
+                Student(
+                    first_name=f"Student{index}",
+                    last_name="Query",
+                    dob="2019-01-01",
+                    gender="M",
+                    category="KG",
+                    grade_level="KG1" if index % 2 else "KG2",
+                    class_name="KG1A" if index % 2 else "KG2A",
+                    transport="FOOT",
+                    parent=parent,
+                )
+                for index in range(1000)
+            ]
+        )
+        students = list(Student.objects.order_by("id")[:20])
+        StudentCertificate.objects.bulk_create(
+            [StudentCertificate(student=student, file=f"students/certificates/{student.id}.pdf") for student in students]
+        )
+        Invoice.objects.bulk_create(
+            [
+                Invoice(student=student, month="2026-03", amount=Decimal("1000.00"), due_date="2026-03-05")
+                for student in Student.objects.all()
+            ]
+        )
+
+    def test_student_list_query_count_is_fixed(self):
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse("student-list-create"), {"page_size": 500})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 1000)
+
+    def test_students_by_grade_query_count_is_fixed(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("student-list-by-grade"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(sum(group["total_students"] for group in response.data), 1000)
+
+    def test_invoice_list_query_count_is_fixed(self):
+        self.client.force_authenticate(self.accountant)
+
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse("invoice-create"), {"page_size": 500})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 1000)
+
+
+class ReminderRunTests(APITestCase):
+    def setUp(self):
+        self.accountant = User.objects.create_user(
+            phone_number="0911000016",
+            password="pass1234",
+            role="ACCOUNTANT",
+            full_name="Accountant Reminders",
+        )
+        parent = User.objects.create_user(
+            phone_number="0911000017",
+            password="pass1234",
+            role="PARENT",
+            full_name="Parent Reminders",
+        )
+        today = timezone.localdate()
+        self.invoices = []
+        for index, days_ahead in enumerate([3, 3, 2, 10]):
+            student = Student.objects.create(
+                first_name=f"Remind{index}",
+                last_name="Student",
+                dob="2019-01-01",
+                gender="F",
+                category="KG",
+                grade_level="KG1",
+                class_name="KG1A",
+                parent=parent,
+            )
+            self.invoices.append(
+                Invoice.objects.create(
+                    student=student,
+                    month="2026-03",
+                    amount=Decimal("100.00"),
+                    due_date=today + timedelta(days=days_ahead),
+                )
+            )
+        ParentNotification.objects.create(
+            parent=parent,
+            student=self.invoices[0].student,
+            invoice=self.invoices[0],
+            notification_type="REMINDER",
+            title="Tuition Reminder",
+            message="Already sent.",
+        )
+        self.client.force_authenticate(self.accountant)
+
+    def test_reminders_skip_already_reminded_invoices_in_one_insert(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse("fees-run-reminders"), format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        statements = [query["sql"].split()[0].upper() for query in queries.captured_queries]
+        self.assertEqual(statements.count("SELECT"), 1)
+        self.assertEqual(statements.count("INSERT"), 1)
+        self.assertEqual(response.data["reminders_created"], 1)
+        reminded = set(
+            ParentNotification.objects.filter(notification_type="REMINDER").values_list("invoice_id", flat=True)
+        )
+        self.assertEqual(reminded, {self.invoices[0].id, self.invoices[1].id})
+
+    def test_created_count_excludes_reminders_sent_by_a_concurrent_run(self):
+        original_fetch_all = QuerySet._fetch_all
+
+        def reminder_sneaks_in(queryset):
+            # Another run reminds the second invoice right after the diff query.
+            original_fetch_all(queryset)
+            if queryset.model is Invoice and not ParentNotification.objects.filter(invoice=self.invoices[1]).exists():
+                ParentNotification.objects.create(
+                    parent=self.invoices[1].student.parent,
+                    student=self.invoices[1].student,
+                    invoice=self.invoices[1],
+                    notification_type="REMINDER",
+                    title="Tuition Reminder",
+                    message="Sent concurrently.",
+                )
+
+        with patch.object(QuerySet, "_fetch_all", reminder_sneaks_in):
+            result = send_due_reminders(days_before=3, window_days=2)
+
+        self.assertEqual(result["reminders_created"], 1)
+        reminded = set(
+            ParentNotification.objects.filter(notification_type="REMINDER").values_list("invoice_id", flat=True)
+        )
+        self.assertEqual(reminded, {self.invoices[0].id, self.invoices[1].id, self.invoices[2].id})
+
+    def test_wider_window_catches_up_on_earlier_due_dates(self):
+        response = self.client.post(
+            reverse("fees-run-reminders"), {"days_before": 3, "window_days": 3}, format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["reminders_created"], 2)
+        self.assertFalse(
+            ParentNotification.objects.filter(invoice=self.invoices[3], notification_type="REMINDER").exists()
+        )
+
+
+class ProcessMonthlyFeesCommandTests(APITestCase):
+    def setUp(self):
+        parent = User.objects.create_user(
+            phone_number="0911000018",
+            password="pass1234",
+            role="PARENT",
+            full_name="Parent Nightly",
+        )
+        self.today = timezone.localdate()
+        self.students = [
+            Student.objects.create(
+                first_name=f"Nightly{index}",
+                last_name="Student",
+                dob="2019-01-01",
+                gender="M",
+                category="KG",
+                grade_level="KG1",
+                class_name="KG1A",
+                parent=parent,
+            )
+            for index in range(3)
+        ]
+        self.settled = Invoice.objects.create(
+            student=self.students[0],
+            month="2026-01",
+            amount=Decimal("100.00"),
+            due_date=self.today - timedelta(days=40),
+        )
+        Payment.objects.create(invoice=self.settled, amount=Decimal("500.00"))
+        PenaltySetting.objects.update_or_create(id=1, defaults={"penalty_per_day": Decimal("1.00")})
+
+    def _call(self, *args):
+        out = StringIO()
+        call_command("process_monthly_fees", *args, stdout=out)
+        return out.getvalue()
+
+    def test_dry_run_reports_counts_and_rolls_back(self):
+        output = self._call("--dry-run", "--chunk-size", "1")
+
+        self.assertIn("Dry run, rolled back. Would have Created invoices: 3", output)
+        self.assertIn("marked paid: 1", output)
+        self.assertEqual(Invoice.objects.count(), 1)
+        self.settled.refresh_from_db()
+        self.assertFalse(self.settled.is_paid)
+
+    def test_chunked_run_matches_single_pass(self):
+        output = self._call("--chunk-size", "2")
+
+        self.assertIn("Invoices created: 3 in 2 chunk(s)", output)
+        self.assertIn("Done. Created invoices: 3", output)
+        self.assertEqual(Invoice.objects.filter(month=self.today.strftime("%Y-%m")).count(), 3)
+        self.settled.refresh_from_db()
+        self.assertTrue(self.settled.is_paid)
+        self.assertEqual(self.settled.penalty_amount, Decimal("40.00"))
+
+    def test_penalties_are_skipped_when_already_applied_today(self):
+        PenaltySetting.objects.filter(id=1).update(penalties_applied_on=self.today)
+
+        output = self._call()
+
+        self.assertIn("Penalties updated: 0 in 0 chunk(s)", output)
+        self.settled.refresh_from_db()
+        self.assertEqual(self.settled.penalty_amount, Decimal("0"))
+
+
+class SingletonSettingCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_settings_are_read_once_per_request_and_refreshed_on_save(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            PenaltySetting.objects.update_or_create(id=1, defaults={"penalty_per_day": Decimal("3.00")})
+
+        with self.assertNumQueries(1), request_memo():
+            for _ in range(5):
+                PenaltySetting.get_current()
+        with self.captureOnCommitCallbacks(execute=True):
+            PenaltySetting.get_current()
+        with self.assertNumQueries(0):
+            self.assertEqual(PenaltySetting.get_current().penalty_per_day, Decimal("3.00"))
+
+        setting = PenaltySetting.get_current()
+        setting.penalty_per_day = Decimal("4.00")
+        setting.save()
+
+        self.assertEqual(PenaltySetting.get_current().penalty_per_day, Decimal("4.00"))
@@ -1,7 +1,7 @@
 from calendar import monthrange
-from datetime import date, timedelta
+from datetime import date
 from decimal import Decimal
-from django.db.models import Sum
+from django.db.models import Count, F, Q, Sum
 from django.utils import timezone
 from rest_framework import generics, permissions, status
 from rest_framework.permissions import IsAuthenticated, AllowAny
@@ -22,6 +22,7 @@ from .models import (
 from .serializers import (
     AccountantDashboardSerializer,
     AccountantMonthlyListSerializer,
+    InvoiceRowSerializer,
     InvoiceSerializer,
     ParentNotificationSerializer,
     ParentSerializer,
@@ -30,10 +31,13 @@ from .serializers import (
     GradeCapacitySettingSerializer,
     StudentSerializer,
     StudentFeeSettingSerializer,
-    StudentGradeGroupSerializer,
     _student_report_label,
 )
+from .services import generate_monthly_invoices, send_due_reminders
 from finance.services import record_account_transaction
+from jobs.services import enqueue_job, job_accepted_payload, wants_background
+from kgsystems.cache import cache_response
+from kgsystems.pagination import StandardResultsPagination
 
 
 class IsDirectorOrAccountant(permissions.BasePermission):
@@ -78,9 +82,28 @@ def _apply_penalty(invoice):
         invoice.save(update_fields=["penalty_amount"])
     return invoice
 
+
+def _invoice_month_summary(month):
+    """Counters and sums for a month's invoices, computed in one aggregate query."""
+    unpaid = Q(is_paid=False)
+    summary = Invoice.objects.filter(month=month).aggregate(
+        total_students=Count("id"),
+        paid_students=Count("id", filter=Q(is_paid=True)),
+        unpaid_students=Count("id", filter=unpaid),
+        overdue_students=Count("id", filter=unpaid & Q(due_date__lt=timezone.localdate())),
+        total_billed=Sum("amount"),
+        total_collected=Sum(F("amount") + F("penalty_amount"), filter=Q(is_paid=True)),
+        total_outstanding=Sum(F("amount") + F("penalty_amount"), filter=unpaid),
+        total_penalties=Sum("penalty_amount"),
+    )
+    for key, value in summary.items():
+        if value is None:
+            summary[key] = Decimal("0")
+    return summary
+
 # ---- Parent Views ----
 class ParentListCreateView(generics.ListCreateAPIView):
-    queryset = Parent.objects.filter(role='PARENT')
+    queryset = Parent.objects.filter(role='PARENT').order_by('id')
     serializer_class = ParentSerializer
     def get_permissions(self):
         if self.request.method == "GET":
@@ -104,7 +127,7 @@ class StudentListCreateView(generics.ListCreateAPIView):
     parser_classes = [MultiPartParser, FormParser, JSONParser]
 
     def get_queryset(self):
-        queryset = Student.objects.select_related("parent", "class_teacher").all()
+        queryset = Student.objects.select_related("parent").prefetch_related("certificates")
         category = self.request.query_params.get("category")
         grade_level = self.request.query_params.get("grade_level")
         class_name = self.request.query_params.get("class_name")
@@ -118,72 +141,96 @@ class StudentListCreateView(generics.ListCreateAPIView):
 
 
 class StudentDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Student.objects.all()
+    queryset = Student.objects.select_related("parent").prefetch_related("certificates")
     serializer_class = StudentSerializer
     permission_classes = [IsAuthenticated]
     parser_classes = [MultiPartParser, FormParser, JSONParser]
 
 
+GRADE_ORDER = [
+    "KG1", "KG2", "KG3",
+    "GRADE1", "GRADE2", "GRADE3", "GRADE4",
+    "GRADE5", "GRADE6", "GRADE7", "GRADE8",
+]
+SECTION_MODES = {"full", "summary", "ids"}
+
+
 class StudentGroupedByGradeView(APIView):
+    """
+    Students grouped by grade and section.
+
+    ``?sections=full`` (default) nests the serialized students under each grade
+    and each of its sections. ``summary`` returns only the section counts and
+    ``ids`` only the section member ids; neither serializes the students.
+    """
+
     permission_classes = [AllowAny]
 
     def get(self, request):
-        queryset = Student.objects.select_related("parent", "class_teacher").all()
+        sections_mode = request.query_params.get("sections", "full")
+        if sections_mode not in SECTION_MODES:
+            return Response(
+                {"error": "sections must be one of: full, summary, ids."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        queryset = Student.objects.filter(grade_level__in=GRADE_ORDER)
         category = request.query_params.get("category")
         if category:
             queryset = queryset.filter(category=category)
+        queryset = queryset.order_by("class_name", "first_name", "last_name")
+
+        serialized = {}
+        if sections_mode == "full":
+            students = list(queryset.select_related("parent").prefetch_related("certificates"))
+            rows = [(student.id, student.grade_level, student.class_name) for student in students]
+            serialized = {
+                data["id"]: data
+                for data in StudentSerializer(students, many=True, context={"request": request}).data
+            }
+        else:
+            rows = queryset.values_list("id", "grade_level", "class_name")
+
+        grades = {}
+        for student_id, grade_level, class_name in rows:
+            grades.setdefault(grade_level, {}).setdefault(class_name, []).append(student_id)
 
-        grade_order = [
-            "KG1", "KG2", "KG3",
-            "GRADE1", "GRADE2", "GRADE3", "GRADE4",
-            "GRADE5", "GRADE6", "GRADE7", "GRADE8",
-        ]
         payload = []
-        for grade_level in grade_order:
-            students = list(
-                queryset.filter(grade_level=grade_level).order_by("class_name", "first_name", "last_name")
-            )
-            if not students:
+        for grade_level in GRADE_ORDER:
+            sections_map = grades.get(grade_level)
+            if not sections_map:
                 continue
-            sections_map = {}
-            for student in students:
-                sections_map.setdefault(student.class_name, []).append(student)
-            sections = [
-                {
-                    "class_name": class_name,
-                    "total_students": len(section_students),
-                    "students": section_students,
-                }
-                for class_name, section_students in sections_map.items()
-            ]
-            payload.append(
-                {
-                    "grade_level": grade_level,
-                    "total_students": len(students),
-                    "students": students,
-                    "sections": sections,
-                }
-            )
-
-        serializer = StudentGradeGroupSerializer(
-            payload,
-            many=True,
-            context={"request": request},
-        )
-        return Response(serializer.data)
+            sections = []
+            for class_name, student_ids in sections_map.items():
+                section = {"class_name": class_name, "total_students": len(student_ids)}
+                if sections_mode == "full":
+                    section["students"] = [serialized[student_id] for student_id in student_ids]
+                elif sections_mode == "ids":
+                    section["student_ids"] = student_ids
+                sections.append(section)
+            grade = {
+                "grade_level": grade_level,
+                "total_students": sum(len(student_ids) for student_ids in sections_map.values()),
+            }
+            if sections_mode == "full":
+                grade["students"] = [student for section in sections for student in section["students"]]
+            grade["sections"] = sections
+            payload.append(grade)
+        return Response(payload)
 
 
 class GradeCapacitySettingListView(generics.ListCreateAPIView):
     serializer_class = GradeCapacitySettingSerializer
     permission_classes = [IsAuthenticated, IsDirectorOrSuperuser]
+    pagination_class = None  # one row per grade level
+
+    @cache_response("grade-capacity")
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
 
     def get_queryset(self):
-        grade_levels = [choice[0] for choice in Student._meta.get_field("grade_level").choices]
-        for grade_level in grade_levels:
-            GradeCapacitySetting.objects.get_or_create(
-                grade_level=grade_level,
-                defaults={"max_students_per_section": 30},
-            )
+        # Rows are seeded by a data migration; a grade added to the choices
+        # since then gets its row on the first placement into that grade.
         return GradeCapacitySetting.objects.all()
 
 
@@ -200,20 +247,27 @@ class InvoiceListCreateView(generics.ListCreateAPIView):
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        queryset = super().get_queryset().select_related("student")
-        for invoice in queryset:
-            _apply_penalty(invoice)
-        return queryset
+        return (
+            super()
+            .get_queryset()
+            .select_related("student__parent")
+            .prefetch_related("student__certificates")
+            .order_by("-month", "id")
+        )
 
 
 # ---- Payment Views ----
 class PaymentListCreateView(generics.ListCreateAPIView):
-    queryset = Payment.objects.all()
+    queryset = (
+        Payment.objects.select_related("invoice__student__parent", "paid_by")
+        .prefetch_related("invoice__student__certificates")
+        .order_by("-paid_at", "-id")
+    )
     serializer_class = PaymentSerializer
     permission_classes = [IsAuthenticated]
 
     def perform_create(self, serializer):
-        bank_account_id = serializer.validated_data["bank_account_id"]
+        bank_account_id = serializer.validated_data.get("bank_account_id")
         payment = serializer.save(paid_by=self.request.user)
         invoice = payment.invoice
         _apply_penalty(invoice)
@@ -233,22 +287,25 @@ class PaymentListCreateView(generics.ListCreateAPIView):
         if total_paid >= total_due and not invoice.is_paid:
             invoice.is_paid = True
             invoice.save(update_fields=["is_paid"])
-            ParentNotification.objects.create(
-                parent=invoice.student.parent,
-                student=invoice.student,
+            ParentNotification.objects.get_or_create(
                 invoice=invoice,
                 notification_type="THANK_YOU",
-                title="Payment Received",
-                message=(
-                    f"Thank you. Payment for {invoice.student} ({invoice.month}) "
-                    "has been received successfully."
-                ),
+                defaults={
+                    "parent": invoice.student.parent,
+                    "student": invoice.student,
+                    "title": "Payment Received",
+                    "message": (
+                        f"Thank you. Payment for {invoice.student} ({invoice.month}) "
+                        "has been received successfully."
+                    ),
+                },
             )
 
 
 class PenaltySettingView(APIView):
     permission_classes = [IsAuthenticated, IsDirectorOrSuperuser]
 
+    @cache_response("penalty-setting")
     def get(self, request):
         setting = PenaltySetting.get_current()
         return Response(PenaltySettingSerializer(setting).data)
@@ -264,6 +321,7 @@ class PenaltySettingView(APIView):
 class StudentFeeSettingView(APIView):
     permission_classes = [IsAuthenticated, IsDirectorOrSuperuser]
 
+    @cache_response("student-fee-setting")
     def get(self, request):
         setting = StudentFeeSetting.get_current()
         return Response(StudentFeeSettingSerializer(setting).data)
@@ -286,78 +344,70 @@ class GenerateCurrentMonthInvoicesView(APIView):
         due_day = max(1, min(due_day, 28))
         due_date = today.replace(day=due_day)
 
-        created = 0
-        active_students = Student.objects.filter(active=True).select_related("parent")
-        for student in active_students:
-            _, was_created = Invoice.objects.get_or_create(
-                student=student,
-                month=month,
-                defaults={
-                    "amount": student.monthly_tuition_fee,
-                    "due_date": due_date,
-                },
+        if wants_background(request):
+            job = enqueue_job(
+                "students.generate_monthly_invoices",
+                {"month": month, "due_date": due_date.isoformat()},
+                created_by=request.user,
             )
-            if was_created:
-                created += 1
+            return Response(job_accepted_payload(job, request), status=status.HTTP_202_ACCEPTED)
+
+        result = generate_monthly_invoices(month=month, due_date=due_date)
 
         return Response(
-            {"message": "Current month invoices generated.", "month": month, "created": created},
+            {"message": "Current month invoices generated.", **result},
             status=status.HTTP_201_CREATED,
         )
 
 
+def _paginated_invoice_rows(view, request, invoices):
+    """One page of ``invoices`` as slim rows, in the paginator's response shape."""
+    # A paginator per list, so several lists can share the page query parameters.
+    paginator = view.pagination_class()
+    rows = paginator.paginate_queryset(invoices, request, view=view)
+    return paginator.get_paginated_response(InvoiceRowSerializer(rows, many=True).data).data
+
+
+def _month_invoice_rows(month):
+    return (
+        Invoice.objects.filter(month=month)
+        .select_related("student", "student__parent")
+        .order_by("student__first_name", "student__last_name", "id")
+    )
+
+
 class AccountantMonthlyDashboardView(APIView):
     permission_classes = [IsAuthenticated, IsDirectorOrAccountant]
+    pagination_class = StandardResultsPagination
 
     def get(self, request):
         month = request.query_params.get("month") or _month_key(timezone.localdate())
-        invoices = Invoice.objects.filter(month=month).select_related("student", "student__parent")
-        for invoice in invoices:
-            _apply_penalty(invoice)
-
-        paid_qs = invoices.filter(is_paid=True)
-        unpaid_qs = invoices.filter(is_paid=False)
-        overdue_qs = unpaid_qs.filter(due_date__lt=timezone.localdate())
-
-        payload = {
-            "month": month,
-            "total_students": invoices.count(),
-            "paid_students": paid_qs.count(),
-            "unpaid_students": unpaid_qs.count(),
-            "overdue_students": overdue_qs.count(),
-            "paid_invoices": paid_qs,
-            "unpaid_invoices": unpaid_qs,
-        }
-        serializer = AccountantDashboardSerializer(payload)
-        return Response(serializer.data)
+        summary = _invoice_month_summary(month)
+        payload = dict(AccountantDashboardSerializer({"month": month, **summary}).data)
+
+        include = request.query_params.get("include_invoices", "")
+        if include in {"paid", "unpaid", "all"}:
+            invoices = _month_invoice_rows(month)
+            for key, is_paid in (("paid_invoices", True), ("unpaid_invoices", False)):
+                if include in {"all", key.split("_")[0]}:
+                    payload[key] = _paginated_invoice_rows(self, request, invoices.filter(is_paid=is_paid))
+        return Response(payload)
 
 
 class AccountantMonthlyFeesView(APIView):
     permission_classes = [IsAuthenticated, IsDirectorOrAccountant]
+    pagination_class = StandardResultsPagination
 
-    def _build_payload(self, month):
-        invoices = Invoice.objects.filter(month=month).select_related("student", "student__parent")
-        for invoice in invoices:
-            _apply_penalty(invoice)
-
-        paid_qs = invoices.filter(is_paid=True)
-        unpaid_qs = invoices.filter(is_paid=False)
-        overdue_qs = unpaid_qs.filter(due_date__lt=timezone.localdate())
-
-        payload = {
-            "month": month,
-            "total_students": invoices.count(),
-            "paid_students": paid_qs.count(),
-            "unpaid_students": unpaid_qs.count(),
-            "overdue_students": overdue_qs.count(),
-            "unpaid_invoices": unpaid_qs,
-        }
-        serializer = AccountantMonthlyListSerializer(payload)
-        return serializer.data
+    def _build_payload(self, request, month):
+        payload = dict(AccountantMonthlyListSerializer({"month": month, **_invoice_month_summary(month)}).data)
+        payload["unpaid_invoices"] = _paginated_invoice_rows(
+            self, request, _month_invoice_rows(month).filter(is_paid=False)
+        )
+        return payload
 
     def get(self, request):
         month = request.query_params.get("month") or _month_key(timezone.localdate())
-        return Response(self._build_payload(month))
+        return Response(self._build_payload(request, month))
 
     def post(self, request):
         month = request.data.get("month") or _month_key(timezone.localdate())
@@ -370,53 +420,49 @@ class AccountantMonthlyFeesView(APIView):
         due_day = max(1, min(due_day, end_date.day))
         due_date = start_date.replace(day=due_day)
 
-        active_students = Student.objects.filter(active=True).select_related("parent")
-        for student in active_students:
-            Invoice.objects.get_or_create(
-                student=student,
-                month=month,
-                defaults={
-                    "amount": student.monthly_tuition_fee,
-                    "due_date": due_date,
-                },
+        if wants_background(request):
+            job = enqueue_job(
+                "students.generate_monthly_invoices",
+                {"month": month, "due_date": due_date.isoformat()},
+                created_by=request.user,
             )
+            return Response(job_accepted_payload(job, request), status=status.HTTP_202_ACCEPTED)
+
+        result = generate_monthly_invoices(month=month, due_date=due_date)
 
-        return Response(self._build_payload(month), status=status.HTTP_201_CREATED)
+        payload = self._build_payload(request, month)
+        payload["generation"] = result
+        return Response(payload, status=status.HTTP_201_CREATED)
 
 
 class ReminderRunView(APIView):
     permission_classes = [IsAuthenticated, IsDirectorOrAccountant]
 
     def post(self, request):
-        today = timezone.localdate()
-        target_due_date = today + timedelta(days=3)
-        invoices = Invoice.objects.filter(is_paid=False, due_date=target_due_date).select_related(
-            "student", "student__parent"
-        )
+        try:
+            days_before = int(request.data.get("days_before", 3))
+            window_days = int(request.data.get("window_days", 1))
+        except (TypeError, ValueError):
+            return Response(
+                {"error": "days_before and window_days must be integers."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if days_before < 0 or window_days < 1:
+            return Response(
+                {"error": "days_before must be >= 0 and window_days >= 1."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
-        created = 0
-        for invoice in invoices:
-            exists = ParentNotification.objects.filter(
-                parent=invoice.student.parent,
-                invoice=invoice,
-                notification_type="REMINDER",
-            ).exists()
-            if exists:
-                continue
-            ParentNotification.objects.create(
-                parent=invoice.student.parent,
-                student=invoice.student,
-                invoice=invoice,
-                notification_type="REMINDER",
-                title="Tuition Reminder",
-                message=(
-                    f"Reminder: Tuition for {invoice.student} ({invoice.month}) is due on "
-                    f"{invoice.due_date}."
-                ),
+        if wants_background(request):
+            job = enqueue_job(
+                "students.send_due_reminders",
+                {"days_before": days_before, "window_days": window_days},
+                created_by=request.user,
             )
-            created += 1
+            return Response(job_accepted_payload(job, request), status=status.HTTP_202_ACCEPTED)
 
-        return Response({"message": "Reminder run completed.", "reminders_created": created})
+        result = send_due_reminders(days_before=days_before, window_days=window_days)
+        return Response({"message": "Reminder run completed.", **result})
 
 
 class ParentNotificationListView(generics.ListAPIView):
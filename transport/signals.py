@@ -1,14 +1,51 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_init, post_save
 from django.dispatch import receiver
 
-from chat.services import ensure_driver_parent_room
-from .models import BusAssignment
+from accounts.models import DriverProfile, User
+from chat.services import ensure_driver_parent_room, ensure_driver_parent_rooms
+from kgsystems.cache import bump_namespaces
+from .models import Bus, BusAssignment, Route
+
+
+# Loaded values are read from __dict__ so deferred fields are not fetched.
+@receiver(post_init, sender=BusAssignment)
+def remember_loaded_bus(sender, instance, **kwargs):
+    instance._loaded_bus_id = instance.__dict__.get("bus_id")
 
 
 @receiver(post_save, sender=BusAssignment)
 def create_driver_parent_chat_room(sender, instance, created, **kwargs):
-    if not created:
+    moved = instance.bus_id != instance._loaded_bus_id
+    instance._loaded_bus_id = instance.bus_id
+    if not (created or moved):
         return
     driver_profile = instance.bus.driver
     if driver_profile and driver_profile.user_id:
         ensure_driver_parent_room(instance.student, driver_profile.user)
+
+
+@receiver(post_init, sender=Bus)
+def remember_loaded_driver(sender, instance, **kwargs):
+    instance._loaded_driver_id = instance.__dict__.get("driver_id")
+
+
+@receiver(post_save, sender=Bus)
+def create_new_driver_parent_chat_rooms(sender, instance, created, **kwargs):
+    changed = instance.driver_id != instance._loaded_driver_id
+    instance._loaded_driver_id = instance.driver_id
+    if changed and not created:
+        ensure_driver_parent_rooms(BusAssignment.objects.filter(bus=instance))
+
+
+@receiver([post_save, post_delete], sender=Bus)
+@receiver([post_save, post_delete], sender=Route)
+@receiver([post_save, post_delete], sender=DriverProfile)
+def invalidate_transport_responses(sender, **kwargs):
+    bump_namespaces("transport")
+
+
+@receiver(post_save, sender=User)
+def invalidate_transport_responses_for_driver(sender, instance, **kwargs):
+    # Bus listings show the driver's name.
+    if instance.role == "DRIVER":
+        bump_namespaces("transport")
@@ -1,3 +1,4 @@
+from django.core.cache import cache
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
@@ -102,3 +103,32 @@ class BusAssignmentApiTests(APITestCase):
 
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertIn("student", response.data)
+
+
+class TransportResponseCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.director = User.objects.create_user(
+            phone_number="0913000005",
+            password="pass1234",
+            role="DIRECTOR",
+            full_name="Director Cache",
+        )
+        self.route = Route.objects.create(name="South Route")
+        Bus.objects.create(bus_number="BUS-20", plate_number="AA-12345", capacity=20, route=self.route)
+        self.client.force_authenticate(self.director)
+
+    def test_bus_list_is_served_from_cache_until_a_bus_changes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            first = self.client.get(reverse("bus-list"))
+
+        with self.assertNumQueries(0):
+            cached = self.client.get(reverse("bus-list"))
+        self.assertEqual(cached.status_code, status.HTTP_200_OK)
+        self.assertEqual(cached.data, first.data)
+
+        Bus.objects.create(bus_number="BUS-21", plate_number="AA-54321", capacity=20, route=self.route)
+
+        refreshed = self.client.get(reverse("bus-list"))
+        self.assertEqual(refreshed.data["count"], 2)
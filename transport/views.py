@@ -1,4 +1,6 @@
 from rest_framework import generics, permissions
+
+from kgsystems.cache import cache_response
 from .models import Bus, Route, BusAssignment, DriverAlert, FuelRequest
 from .serializers import BusSerializer, RouteSerializer, BusAssignmentSerializer, DriverAlertSerializer, FuelRequestSerializer
 from chat.services import broadcast_driver_alert, ensure_driver_parent_room
@@ -18,20 +20,28 @@ class IsDirectorOrSuperuser(permissions.BasePermission):
         )
 
 class BusListView(generics.ListCreateAPIView):
-    queryset = Bus.objects.all()
+    queryset = Bus.objects.select_related("driver__user", "route").order_by("bus_number")
     serializer_class = BusSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    @cache_response("transport")
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
     def get_permissions(self):
         if self.request.method == "POST":
             return [permissions.IsAuthenticated(), IsDirectorOrSuperuser()]
         return [permissions.IsAuthenticated()]
 
 class RouteListView(generics.ListCreateAPIView):
-    queryset = Route.objects.all()
+    queryset = Route.objects.order_by("id")
     serializer_class = RouteSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    @cache_response("transport")
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
     def get_permissions(self):
         if self.request.method == "POST":
             return [permissions.IsAuthenticated(), IsDirectorOrSuperuser()]